@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Availability Intent Benchmark
+Compares the compiled trie matcher against the old substring keyword scan
+on the driver status message corpus (data/raw/driver_status_messages.csv)
+"""
+import csv
+import os
+import sys
+import time
+
+# Add the backend path
+backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'backend')
+sys.path.insert(0, backend_path)
+
+from agents.availability_intent import availability_matcher, AVAILABLE, BUSY
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 'driver_status_messages.csv')
+ROUNDS = 2000
+
+
+def legacy_parse(status: str):
+    """The original AvailabilityAgent._parse_availability_status keyword scan"""
+    status = status.upper().strip()
+
+    available_keywords = [
+        "FREE", "AVAILABLE", "READY", "ONLINE", "ACTIVE",
+        "WORKING", "ON", "YES", "OPEN"
+    ]
+
+    busy_keywords = [
+        "BUSY", "OCCUPIED", "UNAVAILABLE", "OFF", "OFFLINE",
+        "BREAK", "NO", "CLOSED", "NOT AVAILABLE"
+    ]
+
+    if any(keyword in status for keyword in available_keywords):
+        return AVAILABLE
+    elif any(keyword in status for keyword in busy_keywords):
+        return BUSY
+    return None
+
+
+def load_corpus():
+    with open(CORPUS_PATH, newline='', encoding='utf-8') as f:
+        return [(row['message'], row['expected'] or None) for row in csv.DictReader(f)]
+
+
+def evaluate(name, classify, corpus):
+    correct = sum(1 for message, expected in corpus if classify(message) == expected)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for message, _ in corpus:
+            classify(message)
+    elapsed = time.perf_counter() - start
+
+    per_message_us = elapsed / (ROUNDS * len(corpus)) * 1e6
+    print(f"   {name:<16} accuracy {correct}/{len(corpus)} ({correct / len(corpus):.0%})   {per_message_us:.2f} µs/message")
+    return correct
+
+
+def main():
+    corpus = load_corpus()
+
+    print("🤖 Availability Intent Benchmark")
+    print("=" * 35)
+    print(f"   {len(corpus)} messages x {ROUNDS} rounds\n")
+
+    evaluate("legacy keywords", legacy_parse, corpus)
+    evaluate("trie matcher", availability_matcher.classify, corpus)
+
+    misses = [(m, e, availability_matcher.classify(m)) for m, e in corpus if availability_matcher.classify(m) != e]
+    if misses:
+        print("\n   Trie matcher misses:")
+        for message, expected, got in misses:
+            print(f"   - {message!r}: expected {expected}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
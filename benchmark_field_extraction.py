@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Field Extraction Benchmark
+Compares the single-pass compiled field scanner against the old per-field regex
+extractors on the receipt / freight bill OCR text corpus (data/raw/receipt_ocr_samples.json)
+"""
+import json
+import os
+import re
+import sys
+import time
+
+# Add the backend path
+backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'backend')
+sys.path.insert(0, backend_path)
+
+from agents.document_digitizer import DocumentDigitizerAgent
+from agents.ocr_document import OcrDocument
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 'receipt_ocr_samples.json')
+ROUNDS = 500
+
+RECEIPT_FIELDS = ("amount", "date", "receipt_number", "vehicle_number")
+FREIGHT_FIELDS = ("amount", "date", "bill_number", "vehicle_number", "consignor", "consignee", "origin", "destination", "weight")
+
+
+def legacy_amount(text):
+    """The original DocumentDigitizerAgent._extract_amount_from_text"""
+    amount_patterns = [
+        r'(?:total|amount|sum|paid|payment)?\s*[:\-]?\s*(?:rs\.?|₹|inr)?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'₹\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'rs\.?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*(?:rs\.?|₹|inr)',
+        r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
+    ]
+    found_amounts = []
+    for pattern in amount_patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            amount_str = match.group(1) if match.groups() else match.group(0)
+            try:
+                clean_amount = amount_str.replace(',', '').replace('₹', '').replace('rs', '').replace('.', '').strip()
+                if len(clean_amount) > 2 and clean_amount.isdigit():
+                    amount = float(clean_amount[:-2] + '.' + clean_amount[-2:])
+                else:
+                    amount = float(clean_amount)
+                if amount > 1:
+                    found_amounts.append(amount)
+            except ValueError:
+                continue
+    return max(found_amounts) if found_amounts else None
+
+
+def legacy_first(patterns, text, flags=re.IGNORECASE, group=1):
+    for pattern in patterns:
+        match = re.search(pattern, text, flags)
+        if match:
+            return match.group(group).strip()
+    return None
+
+
+def legacy_vehicle(text):
+    found = legacy_first([r'(?:vehicle|truck|lorry)\s*(?:#|no\.?|number)?\s*:?\s*([a-zA-Z0-9\s]+)'], text)
+    return found or legacy_first([r'[A-Z]{2}\s*\d{2}\s*[A-Z]{1,2}\s*\d{4}'], text, flags=0, group=0)
+
+
+def legacy_weight(text):
+    match = re.search(r'(\d+(?:\.\d+)?)\s*(kg|kgs|ton|tons|mt)', text, re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+def legacy_extract(text, fields):
+    """The original per-field extractors, each scanning the text on its own"""
+    extractors = {
+        "amount": legacy_amount,
+        "date": lambda t: legacy_first([
+            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', r'\d{1,2}\s+\w+\s+\d{2,4}', r'\w+\s+\d{1,2},?\s+\d{2,4}'
+        ], t, flags=0, group=0),
+        "receipt_number": lambda t: legacy_first([
+            r'(?:receipt|bill|invoice)\s*(?:#|no\.?|number)?\s*:?\s*([a-zA-Z0-9]+)', r'(?:#|no\.?)\s*([a-zA-Z0-9]+)'
+        ], t),
+        "bill_number": lambda t: legacy_first([
+            r'(?:bill|invoice|lr)\s*(?:#|no\.?|number)?\s*:?\s*([a-zA-Z0-9]+)', r'lr\s*(?:#|no\.?)?\s*:?\s*([a-zA-Z0-9]+)'
+        ], t),
+        "vehicle_number": legacy_vehicle,
+        "consignor": lambda t: legacy_first([r'(?:consignor|from|sender)[:]*\s*([^\n]+)'], t),
+        "consignee": lambda t: legacy_first([r'(?:consignee|to|receiver)[:]*\s*([^\n]+)'], t),
+        "origin": lambda t: legacy_first([r'(?:origin|from|pickup)[:]*\s*([^\n]+)'], t),
+        "destination": lambda t: legacy_first([r'(?:destination|to|delivery)[:]*\s*([^\n]+)'], t),
+        "weight": legacy_weight,
+    }
+    return {field: extractors[field](text) for field in fields}
+
+
+def engine_extract(agent, document, fields):
+    extractors = {
+        "amount": lambda d: agent._extract_amount_from_text(d)["amount"],
+        "date": agent._extract_date,
+        "receipt_number": agent._extract_receipt_number,
+        "bill_number": agent._extract_bill_number,
+        "vehicle_number": agent._extract_vehicle_number,
+        "consignor": agent._extract_consignor,
+        "consignee": agent._extract_consignee,
+        "origin": agent._extract_origin,
+        "destination": agent._extract_destination,
+        "weight": lambda d: (agent._extract_weight(d) or {}).get("value"),
+    }
+    return {field: extractors[field](document) for field in fields}
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        samples = json.load(f)
+    for sample in samples:
+        sample["fields"] = RECEIPT_FIELDS if sample["type"] == "receipt" else FREIGHT_FIELDS
+        sample["text"] = "\n".join(sample["lines"])
+    return samples
+
+
+def evaluate(name, extract, corpus):
+    correct = total = 0
+    misses = []
+    for sample in corpus:
+        extracted = extract(sample)
+        for field in sample["fields"]:
+            total += 1
+            if extracted[field] == sample["expected"][field]:
+                correct += 1
+            else:
+                misses.append((sample["id"], field, sample["expected"][field], extracted[field]))
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for sample in corpus:
+            extract(sample)
+    elapsed = time.perf_counter() - start
+
+    per_document_us = elapsed / (ROUNDS * len(corpus)) * 1e6
+    print(f"   {name:<16} fields {correct}/{total} ({correct / total:.0%})   {per_document_us:.1f} µs/document")
+    return misses
+
+
+def main():
+    corpus = load_corpus()
+    agent = DocumentDigitizerAgent()
+
+    print("🤖 Field Extraction Benchmark")
+    print("=" * 35)
+    print(f"   {len(corpus)} documents x {ROUNDS} rounds\n")
+
+    evaluate("legacy regexes", lambda s: legacy_extract(s["text"], s["fields"]), corpus)
+    # A fresh OcrDocument per call, so memoized fields do not flatter the timing
+    misses = evaluate(
+        "single-pass scan",
+        lambda s: engine_extract(agent, OcrDocument(tokens=[], lines=s["lines"]), s["fields"]),
+        corpus
+    )
+
+    if misses:
+        print("\n   Single-pass scan misses:")
+        for sample_id, field, expected, got in misses:
+            print(f"   - {sample_id} {field}: expected {expected!r}, got {got!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+OCR Engine Benchmark
+Per-call latency of the persistent in-process engine (tesserocr) against the
+pytesseract subprocess path, on a small receipt crop and a full receipt page
+(both already preprocessed, so only the OCR call is timed)
+"""
+import os
+import statistics
+import sys
+import time
+
+# Add the backend path
+backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'backend')
+sys.path.insert(0, backend_path)
+
+import cv2
+import numpy as np
+
+from agents.ocr_engines import ENGINES, available_engines
+
+ROUNDS = 20
+CONFIG = "--psm 6"
+
+RECEIPT_LINES = [
+    "HIGHWAY FUELS PVT LTD",
+    "BILL NO: 458213",
+    "DATE: 14/03/2024",
+    "DIESEL 62.40 L @ 89.62",
+    "VEHICLE: HR55AB1234",
+    "TOTAL: 5592.29",
+]
+
+
+def render(lines, width):
+    """Binarized text as it leaves the preprocessing pipeline"""
+    page = np.full((120 + 110 * len(lines), width), 255, dtype=np.uint8)
+    for i, line in enumerate(lines):
+        cv2.putText(page, line, (40, 120 + i * 110), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 4, cv2.LINE_AA)
+    _, page = cv2.threshold(page, 128, 255, cv2.THRESH_BINARY)
+    return page
+
+
+def load_corpus():
+    return [
+        ("total line crop", render(RECEIPT_LINES[-1:], 700)),
+        ("full receipt", render(RECEIPT_LINES, 1240)),
+    ]
+
+
+def evaluate(name, corpus):
+    started = time.perf_counter()
+    try:
+        engine = ENGINES[name]()
+        engine.warm(CONFIG)
+        engine.image_to_data(corpus[0][1], CONFIG)
+    except Exception as e:
+        print(f"   {name:<12} unavailable: {e}")
+        return
+    cold_ms = (time.perf_counter() - started) * 1000
+    print(f"   {name:<12} first call (start-up + model load) {cold_ms:.0f} ms")
+
+    for label, image in corpus:
+        samples = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            data = engine.image_to_data(image, CONFIG)
+            samples.append((time.perf_counter() - start) * 1000)
+        words = " ".join(word for word in data["text"] if word.strip())
+        p95 = sorted(samples)[int(0.95 * (len(samples) - 1))]
+        print(f"   - {label:<16} {statistics.mean(samples):7.1f} ms/call (p95 {p95:.1f})   {words[:40]!r}")
+
+
+def main():
+    corpus = load_corpus()
+
+    print("🤖 OCR Engine Benchmark")
+    print("=" * 35)
+    print(f"   {len(corpus)} images x {ROUNDS} calls, installed: {', '.join(available_engines()) or 'none'}\n")
+
+    for name in ENGINES:
+        evaluate(name, corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Multi-page PDF Freight Bill Benchmark
+Extracts a synthetic multi-page freight bill PDF with one OCR worker (pages read
+one after another) and with a pool of workers (pages read in parallel), reporting
+time to the first page, total time, the merged fields, and the peak worker memory
+"""
+import asyncio
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# Add the backend path
+backend_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'backend')
+sys.path.insert(0, backend_path)
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from agents.document_digitizer import DocumentDigitizerAgent
+from agents.ocr_pool import OcrWorkerPool
+
+PAGES = 6
+WORKERS = max(2, min(4, os.cpu_count() or 1))
+TOTAL = 28350.0
+BILL_NUMBER = "784512"
+
+
+def render_pdf():
+    """A letter-size 300 DPI bill: header on the first page, items in between, totals on the last"""
+    items = [f"CARTONS LOT {i:02d}  {10 + i} x 150 {(10 + i) * 150:>9.2f}" for i in range(1, 30)]
+    pages = [["SHARMA ROADLINES", f"LR NO: {BILL_NUMBER}", "DATE: 12/03/2025", "CONSIGNOR: ABC TEXTILES",
+              "FROM: DELHI", "TO: MUMBAI", "VEHICLE: HR55AB1234"]]
+    pages += [items[i:i + 20] for i in range(0, 20 * (PAGES - 2), 20)][:PAGES - 2]
+    pages.append(["SUB TOTAL 27000.00", "GST 5% 1350.00", f"TOTAL: {TOTAL:.2f}", "THANK YOU"])
+
+    images = []
+    for lines in pages:
+        page = np.full((3300, 2550), 255, dtype=np.uint8)
+        for i, line in enumerate(lines):
+            cv2.putText(page, line, (100, 200 + i * 140), cv2.FONT_HERSHEY_SIMPLEX, 2.0, 0, 4, cv2.LINE_AA)
+        images.append(Image.fromarray(page))
+
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="PDF", save_all=True, append_images=images[1:], resolution=300)
+    return buffer.getvalue()
+
+
+async def extract(agent, pdf_data):
+    start = time.perf_counter()
+    first_page_ms = None
+    async for event in agent.stream_freight_bill_pages(pdf_data):
+        if first_page_ms is None:
+            first_page_ms = (time.perf_counter() - start) * 1000
+    return event, first_page_ms, (time.perf_counter() - start) * 1000
+
+
+def evaluate(name, workers, pdf_path, pdf_data):
+    agent = DocumentDigitizerAgent()
+    agent.ocr_cache = None  # every run OCRs every page
+    agent.ocr_pool = OcrWorkerPool(workers=workers, max_pending=workers)
+    try:
+        asyncio.run(agent.ocr_pool.run_pdf_page(pdf_path, 0))  # engine start-up outside the timings
+        result, first_page_ms, total_ms = asyncio.run(extract(agent, pdf_data))
+    finally:
+        agent.ocr_pool.shutdown()
+
+    details = result["freight_details"]
+    correct = details["freight_amount"]["amount"] == TOTAL and details["bill_number"] == BILL_NUMBER
+    print(f"   {name:<22} first page {first_page_ms:6.0f} ms   all {result['page_count']} pages {total_ms:6.0f} ms   "
+          f"total + bill number {'ok' if correct else 'WRONG'}")
+
+
+def main():
+    pdf_data = render_pdf()
+
+    print("🤖 Multi-page PDF Freight Bill Benchmark")
+    print("=" * 35)
+    print(f"   {PAGES} pages (2550x3300 @ 300 DPI), {len(pdf_data) // 1024} KB PDF\n")
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf_file:
+        pdf_file.write(pdf_data)
+        pdf_file.flush()
+        evaluate("1 worker (sequential)", 1, pdf_file.name, pdf_data)
+        evaluate(f"{WORKERS} workers (parallel)", WORKERS, pdf_file.name, pdf_data)
+
+    # ru_maxrss is in KB on Linux: the largest single worker, which holds one page at a time
+    peak_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"\n   peak worker memory {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
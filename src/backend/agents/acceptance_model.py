@@ -0,0 +1,269 @@
+"""
+Acceptance Model - Per-driver feature store and vectorized acceptance scoring
+Keeps trip-history aggregates in memory so predictions never re-read a driver's full history
+"""
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+DEFAULT_PREFERRED_HOURS = list(range(9, 18))  # Default business hours
+
+# Logistic weights over [logit(base_rate), long_trip, short_trip, preferred_hour].
+# At p=0.5 a 0.45 logit step moves the probability by ~0.1, matching the
+# hand-tuned adjustments the agent used before.
+DEFAULT_WEIGHTS = np.array([1.0, -0.45, 0.45, 0.45], dtype=np.float64)
+DEFAULT_BIAS = 0.0
+
+
+class DriverFeatureStore:
+    """
+    Per-driver aggregates (hour histogram, distance sum, acceptance counts).
+
+    Each trip's contribution is remembered by id, so a status change or a
+    re-sent row replaces the old contribution instead of double counting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}  # driver_id -> row in the arrays below
+        self._contributions: Dict[str, Dict[str, Tuple[int, int, float, int]]] = {}
+
+        self.hour_histogram = np.zeros((0, 24), dtype=np.int32)
+        self.total_trips = np.zeros(0, dtype=np.int32)
+        self.accepted_trips = np.zeros(0, dtype=np.int32)
+        self.distance_sum = np.zeros(0, dtype=np.float64)
+
+    def has_driver(self, driver_id: Any) -> bool:
+        return str(driver_id) in self._index
+
+    def load_driver(self, driver_id: Any, trips: List[Dict[str, Any]]) -> None:
+        """
+        (Re)build a driver's aggregates from their full trip history
+        """
+        driver_id = str(driver_id)
+        with self._lock:
+            row = self._row_for(driver_id)
+            self.hour_histogram[row] = 0
+            self.total_trips[row] = 0
+            self.accepted_trips[row] = 0
+            self.distance_sum[row] = 0.0
+            self._contributions[driver_id] = {}
+
+            for trip in trips:
+                self._apply(driver_id, row, trip)
+
+    def observe(self, trip: Dict[str, Any]) -> None:
+        """
+        Incrementally fold a created/updated trip into its driver's aggregates.
+        Drivers not loaded yet are skipped; they are built on first use.
+        """
+        driver_id = trip.get("driver_id") if trip else None
+        if driver_id is None:
+            return
+
+        driver_id = str(driver_id)
+        with self._lock:
+            row = self._index.get(driver_id)
+            if row is not None:
+                self._apply(driver_id, row, trip)
+
+    def features(self, driver_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Gather aggregate rows for the given drivers (unknown drivers get zeros)
+        """
+        with self._lock:
+            rows = np.array([self._index.get(str(d), -1) for d in driver_ids], dtype=np.int64)
+            known = rows >= 0
+            safe_rows = np.where(known, rows, 0)
+
+            def take(values: np.ndarray) -> np.ndarray:
+                if len(values) == 0:
+                    return np.zeros((len(rows),) + values.shape[1:], dtype=values.dtype)
+                picked = values[safe_rows].copy()
+                picked[~known] = 0
+                return picked
+
+            return {
+                "hour_histogram": take(self.hour_histogram),
+                "total_trips": take(self.total_trips),
+                "accepted_trips": take(self.accepted_trips),
+                "distance_sum": take(self.distance_sum)
+            }
+
+    def _row_for(self, driver_id: str) -> int:
+        row = self._index.get(driver_id)
+        if row is not None:
+            return row
+
+        row = len(self._index)
+        self._index[driver_id] = row
+        if row >= len(self.total_trips):
+            capacity = max(16, 2 * len(self.total_trips))
+            self.hour_histogram = _grow(self.hour_histogram, capacity)
+            self.total_trips = _grow(self.total_trips, capacity)
+            self.accepted_trips = _grow(self.accepted_trips, capacity)
+            self.distance_sum = _grow(self.distance_sum, capacity)
+        return row
+
+    def _apply(self, driver_id: str, row: int, trip: Dict[str, Any]) -> None:
+        trip_id = str(trip.get("id"))
+        contributions = self._contributions.setdefault(driver_id, {})
+
+        previous = contributions.pop(trip_id, None)
+        if previous is not None:
+            self._add(row, previous, sign=-1)
+
+        contribution = (
+            1,
+            0 if trip.get("status") == "cancelled" else 1,
+            float(trip.get("distance_km") or 0),
+            _trip_hour(trip)
+        )
+        contributions[trip_id] = contribution
+        self._add(row, contribution, sign=1)
+
+    def _add(self, row: int, contribution: Tuple[int, int, float, int], sign: int) -> None:
+        total, accepted, distance, hour = contribution
+        self.total_trips[row] += sign * total
+        self.accepted_trips[row] += sign * accepted
+        self.distance_sum[row] += sign * distance
+        if hour >= 0:
+            self.hour_histogram[row, hour] += sign
+
+
+class AcceptanceModel:
+    """
+    Lightweight logistic model that scores many (driver, trip) pairs in one NumPy call
+    """
+
+    def __init__(
+        self,
+        feature_store: DriverFeatureStore,
+        weights: Optional[np.ndarray] = None,
+        bias: float = DEFAULT_BIAS
+    ):
+        self.feature_store = feature_store
+        self.weights = DEFAULT_WEIGHTS if weights is None else np.asarray(weights, dtype=np.float64)
+        self.bias = bias
+
+    def predict(self, pairs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score a batch of {"driver_id", "trip_details"} pairs
+        """
+        if not pairs:
+            return []
+
+        driver_ids = [str(pair["driver_id"]) for pair in pairs]
+        trip_details = [pair.get("trip_details") or {} for pair in pairs]
+        aggregates = self.feature_store.features(driver_ids)
+
+        total = aggregates["total_trips"].astype(np.float64)
+        accepted = aggregates["accepted_trips"].astype(np.float64)
+        has_history = total > 0
+
+        base_rate = np.where(has_history, accepted / np.maximum(total, 1), 0.5)
+        avg_distance = np.where(has_history, aggregates["distance_sum"] / np.maximum(total, 1), 0.0)
+
+        trip_distance = np.array(
+            [float(details.get("distance_km")) if details.get("distance_km") is not None else np.nan for details in trip_details],
+            dtype=np.float64
+        )
+        has_distance = ~np.isnan(trip_distance)
+        long_trip = has_distance & (trip_distance > avg_distance * 1.5)
+        short_trip = has_distance & ~long_trip & (trip_distance < avg_distance * 0.7)
+
+        hours = np.array([_request_hour(details) for details in trip_details], dtype=np.int64)
+        preferred = self._preferred_hour_mask(aggregates["hour_histogram"], hours)
+
+        clipped_rate = np.clip(base_rate, 0.01, 0.99)
+        X = np.column_stack([
+            np.log(clipped_rate / (1 - clipped_rate)),
+            long_trip.astype(np.float64),
+            short_trip.astype(np.float64),
+            preferred.astype(np.float64)
+        ])
+        probabilities = 1.0 / (1.0 + np.exp(-(X @ self.weights + self.bias)))
+        probabilities = np.clip(probabilities, 0.1, 0.9)
+
+        results = []
+        for i, driver_id in enumerate(driver_ids):
+            if not has_history[i]:
+                results.append({
+                    "driver_id": driver_id,
+                    "acceptance_probability": 0.5,  # Default for new drivers
+                    "confidence": "low",
+                    "factors": ["No historical data available"]
+                })
+                continue
+
+            factors = []
+            if long_trip[i]:
+                factors.append("Trip longer than usual")
+            elif short_trip[i]:
+                factors.append("Trip shorter than usual")
+            if preferred[i]:
+                factors.append("Within preferred working hours")
+
+            trips_analyzed = int(total[i])
+            results.append({
+                "driver_id": driver_id,
+                "acceptance_probability": round(float(probabilities[i]), 4),
+                "confidence": "high" if trips_analyzed > 10 else "medium" if trips_analyzed > 3 else "low",
+                "factors": factors,
+                "historical_acceptance_rate": float(base_rate[i]),
+                "total_trips_analyzed": trips_analyzed
+            })
+
+        return results
+
+    def _preferred_hour_mask(self, histogram: np.ndarray, hours: np.ndarray) -> np.ndarray:
+        """
+        Hours with above-average activity (over active hours), else business hours
+        """
+        active_hours = (histogram > 0).sum(axis=1)
+        mean_activity = histogram.sum(axis=1) / np.maximum(active_hours, 1)
+        hour_counts = histogram[np.arange(len(hours)), hours]
+        above_average = hour_counts > mean_activity
+
+        # Drivers with no above-average hour fall back to business hours
+        has_preference = (histogram > mean_activity[:, None]).any(axis=1)
+        business_hours = (hours >= DEFAULT_PREFERRED_HOURS[0]) & (hours <= DEFAULT_PREFERRED_HOURS[-1])
+        return np.where(has_preference, above_average, business_hours)
+
+
+def _grow(values: np.ndarray, capacity: int) -> np.ndarray:
+    grown = np.zeros((capacity,) + values.shape[1:], dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
+
+
+def _trip_hour(trip: Dict[str, Any]) -> int:
+    created_at = trip.get("created_at")
+    if not created_at:
+        return -1
+    try:
+        if isinstance(created_at, datetime):
+            return created_at.hour
+        return datetime.fromisoformat(str(created_at).replace('Z', '+00:00')).hour
+    except ValueError:
+        return -1
+
+
+def _request_hour(trip_details: Dict[str, Any]) -> int:
+    """
+    Hour the trip would be offered; defaults to now like the single-driver prediction
+    """
+    hour = trip_details.get("departure_hour")
+    if hour is not None:
+        try:
+            return int(hour) % 24
+        except (TypeError, ValueError):
+            pass
+    return datetime.now().hour
+
+
+# Shared instances used by the availability agent and the trip routes
+driver_feature_store = DriverFeatureStore()
+acceptance_model = AcceptanceModel(driver_feature_store)
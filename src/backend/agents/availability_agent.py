@@ -24,6 +24,33 @@ except ImportError:
     get_supabase_client = None
     Client = None
 
+try:
+    from agents.pending_trip_index import pending_trip_index
+except ImportError:
+    pending_trip_index = None
+
+try:
+    from app.driver_query import DriverQuery
+except ImportError:
+    DriverQuery = None
+
+try:
+    from agents.availability_intent import availability_matcher, AVAILABLE
+except ImportError:
+    availability_matcher = None
+    AVAILABLE = "available"
+
+try:
+    from agents.presence_store import presence_store
+except ImportError:
+    presence_store = None
+
+try:
+    from agents.acceptance_model import acceptance_model, driver_feature_store
+except ImportError:
+    acceptance_model = None
+    driver_feature_store = None
+
 class AvailabilityAgent:
     def __init__(self):
         self.name = "Availability Agent"
@@ -41,43 +68,41 @@ class AvailabilityAgent:
         try:
             supabase = get_supabase_client()
             
-            # Find driver by phone number
-            driver_result = supabase.table("drivers").select("*").eq("phone", phone_number).execute()
-            
-            if not driver_result.data:
-                return {
-                    "success": False,
-                    "message": "Driver not found",
-                    "action": "register_driver"
-                }
-            
-            driver = driver_result.data[0]
-            driver_id = driver["id"]
-            
             # Parse status from natural language
             is_available = self._parse_availability_status(status)
             
-            # Update driver data
-            update_data = {
-                "is_available": is_available,
-                "last_seen": datetime.utcnow().isoformat()
-            }
-            
-            if location:
-                update_data["current_location"] = location
-            
-            # Update in database
-            result = supabase.table("drivers").update(update_data).eq("id", driver_id).execute()
-            
-            if result.data:
+            if presence_store is not None:
+                # In-memory update; the presence store persists it in the next batch
+                presence_store.ensure_loaded(supabase)
+                driver = presence_store.get_by_phone(phone_number)
+                
+                if not driver:
+                    return {
+                        "success": False,
+                        "message": "Driver not found",
+                        "action": "register_driver"
+                    }
+                
+                updated_driver = presence_store.set_presence(driver["id"], is_available, location)
+            else:
+                updated_driver = await self._update_driver_row(phone_number, is_available, location, supabase)
+                
+                if updated_driver is None:
+                    return {
+                        "success": False,
+                        "message": "Driver not found",
+                        "action": "register_driver"
+                    }
+            
+            if updated_driver:
                 # If driver became available, check for pending trips
                 if is_available:
-                    optimal_trip = await self._find_optimal_trip_for_driver(driver_id, supabase)
+                    optimal_trip = await self._find_optimal_trip_for_driver(updated_driver, supabase)
                     if optimal_trip:
                         return {
                             "success": True,
                             "message": f"Status updated to available. New trip opportunity found!",
-                            "driver": result.data[0],
+                            "driver": updated_driver,
                             "suggested_trip": optimal_trip,
                             "action": "trip_suggestion"
                         }
@@ -85,7 +110,7 @@ class AvailabilityAgent:
                 return {
                     "success": True,
                     "message": f"Status updated to {'available' if is_available else 'busy'}",
-                    "driver": result.data[0],
+                    "driver": updated_driver,
                     "action": "status_updated"
                 }
             else:
@@ -102,11 +127,44 @@ class AvailabilityAgent:
                 "action": "error"
             }
     
+    async def _update_driver_row(
+        self, 
+        phone_number: str, 
+        is_available: bool, 
+        location: Optional[str], 
+        supabase: Client
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Direct database update, used when the presence store is unavailable.
+        Returns None if the driver is unknown and {} if the update failed.
+        """
+        # Find driver by phone number
+        driver_result = supabase.table("drivers").select("*").eq("phone", phone_number).execute()
+        
+        if not driver_result.data:
+            return None
+        
+        driver_id = driver_result.data[0]["id"]
+        
+        update_data = {
+            "is_available": is_available,
+            "last_seen": datetime.utcnow().isoformat()
+        }
+        
+        if location:
+            update_data["current_location"] = location
+        
+        result = supabase.table("drivers").update(update_data).eq("id", driver_id).execute()
+        
+        return result.data[0] if result.data else {}
+    
     async def get_available_drivers(
         self, 
         location: Optional[str] = None,
         radius_km: float = 50.0,
-        min_rating: float = 3.0
+        min_rating: float = 3.0,
+        vehicle_type: Optional[str] = None,
+        min_capacity_tons: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Get available drivers with intelligent filtering and ranking
@@ -114,14 +172,27 @@ class AvailabilityAgent:
         try:
             supabase = get_supabase_client()
             
-            # Get all available drivers
-            result = supabase.table("drivers").select("*").eq("is_available", True).execute()
+            if DriverQuery is not None:
+                # Rating/vehicle/capacity predicates run in the database
+                query = DriverQuery().min_rating(min_rating).vehicle_type(vehicle_type).min_capacity(min_capacity_tons)
+                
+                if presence_store is not None:
+                    # Availability is authoritative in memory; push it down as an id set
+                    presence_store.ensure_loaded(supabase)
+                    query = query.ids(presence_store.driver_ids(is_available=True))
+                    drivers = presence_store.overlay(query.fetch_supabase(supabase))
+                else:
+                    drivers = query.available().fetch_supabase(supabase)
+            elif presence_store is not None:
+                presence_store.ensure_loaded(supabase)
+                drivers = presence_store.available_drivers()
+            else:
+                result = supabase.table("drivers").select("*").eq("is_available", True).execute()
+                drivers = result.data or []
             
-            if not result.data:
+            if not drivers:
                 return []
             
-            drivers = result.data
-            
             # If location is specified, calculate distances and filter
             if location:
                 drivers = await self._filter_drivers_by_location(drivers, location, radius_km)
@@ -148,9 +219,13 @@ class AvailabilityAgent:
             supabase = get_supabase_client()
             
             # Get available drivers near pickup location
+            preferences = preferences or {}
             available_drivers = await self.get_available_drivers(
                 location=pickup_location,
-                radius_km=preferences.get("max_distance_km", 25.0) if preferences else 25.0
+                radius_km=preferences.get("max_distance_km", 25.0),
+                min_rating=preferences.get("min_rating", 3.0),
+                vehicle_type=preferences.get("vehicle_type"),
+                min_capacity_tons=preferences.get("min_capacity_tons")
             )
             
             if not available_drivers:
@@ -193,74 +268,71 @@ class AvailabilityAgent:
         """
         Predict likelihood of driver accepting a trip based on historical data
         """
+        predictions = await self.predict_acceptance_batch([
+            {"driver_id": driver_id, "trip_details": trip_details}
+        ])
+        prediction = predictions[0]
+        prediction.pop("driver_id", None)
+        return prediction
+    
+    async def predict_acceptance_batch(
+        self, 
+        pairs: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Score many (driver, trip) pairs at once from precomputed driver aggregates
+        """
+        if acceptance_model is None or driver_feature_store is None:
+            return self._neutral_acceptance(pairs, "Acceptance model not available")
+        
         try:
-            supabase = get_supabase_client()
-            
-            # Get driver's trip history
-            history_result = supabase.table("trips").select("*").eq("driver_id", str(driver_id)).execute()
-            
-            if not history_result.data:
-                return {
-                    "acceptance_probability": 0.5,  # Default for new drivers
-                    "confidence": "low",
-                    "factors": ["No historical data available"]
-                }
-            
-            trip_history = history_result.data
-            
-            # Analyze patterns
-            total_trips = len(trip_history)
-            accepted_trips = len([t for t in trip_history if t["status"] != "cancelled"])
-            
-            # Calculate base acceptance rate
-            base_rate = accepted_trips / total_trips if total_trips > 0 else 0.5
-            
-            # Adjust based on trip characteristics
-            factors = []
-            adjustment = 0
-            
-            # Distance factor
-            if "distance_km" in trip_details:
-                avg_distance = sum([t.get("distance_km", 0) for t in trip_history]) / total_trips
-                if trip_details["distance_km"] > avg_distance * 1.5:
-                    adjustment -= 0.1
-                    factors.append("Trip longer than usual")
-                elif trip_details["distance_km"] < avg_distance * 0.7:
-                    adjustment += 0.1
-                    factors.append("Trip shorter than usual")
-            
-            # Time of day factor
-            current_hour = datetime.now().hour
-            preferred_hours = self._get_driver_preferred_hours(trip_history)
-            if current_hour in preferred_hours:
-                adjustment += 0.1
-                factors.append("Within preferred working hours")
-            
-            # Calculate final probability
-            final_probability = max(0.1, min(0.9, base_rate + adjustment))
-            
-            confidence = "high" if total_trips > 10 else "medium" if total_trips > 3 else "low"
+            # Build aggregates for drivers seen for the first time, in one query
+            missing = sorted({
+                str(pair["driver_id"]) for pair in pairs
+                if not driver_feature_store.has_driver(pair["driver_id"])
+            })
+            if missing:
+                supabase = get_supabase_client()
+                history_result = supabase.table("trips").select(
+                    "id, driver_id, status, distance_km, created_at"
+                ).in_("driver_id", missing).execute()
+                
+                history_by_driver = {driver_id: [] for driver_id in missing}
+                for trip in history_result.data or []:
+                    history_by_driver[str(trip["driver_id"])].append(trip)
+                
+                for driver_id, trips in history_by_driver.items():
+                    driver_feature_store.load_driver(driver_id, trips)
             
-            return {
-                "acceptance_probability": final_probability,
-                "confidence": confidence,
-                "factors": factors,
-                "historical_acceptance_rate": base_rate,
-                "total_trips_analyzed": total_trips
-            }
+            return acceptance_model.predict(pairs)
         
         except Exception as e:
             print(f"Error predicting driver acceptance: {e}")
-            return {
+            return self._neutral_acceptance(pairs, f"Error in prediction: {str(e)}")
+    
+    def _neutral_acceptance(self, pairs: List[Dict[str, Any]], reason: str) -> List[Dict[str, Any]]:
+        """
+        Even odds for every pair, flagged as a low-confidence fallback
+        """
+        return [
+            {
+                "driver_id": str(pair.get("driver_id")),
                 "acceptance_probability": 0.5,
                 "confidence": "low",
-                "factors": [f"Error in prediction: {str(e)}"]
+                "fallback": True,
+                "factors": [reason]
             }
+            for pair in pairs
+        ]
     
     def _parse_availability_status(self, status: str) -> bool:
         """
         Parse natural language status into boolean availability
         """
+        if availability_matcher is not None:
+            # Whole-token trie match with negation and Hinglish synonyms; unknown -> busy
+            return availability_matcher.classify(status) == AVAILABLE
+        
         status = status.upper().strip()
         
         available_keywords = [
@@ -283,25 +355,27 @@ class AvailabilityAgent:
     
     async def _find_optimal_trip_for_driver(
         self, 
-        driver_id: str, 
+        driver: Dict[str, Any], 
         supabase: Client
     ) -> Optional[Dict[str, Any]]:
         """
         Find the most suitable pending trip for a newly available driver
         """
         try:
-            # Get pending trips
+            if pending_trip_index is not None:
+                # Warm the index once; afterwards the trip routes keep it in sync
+                if not pending_trip_index.loaded:
+                    trips_result = supabase.table("trips").select("*").eq("status", "pending").execute()
+                    pending_trip_index.load(trips_result.data or [])
+                
+                return pending_trip_index.best_trip_for_driver(driver)
+            
+            # Fallback: scan all pending trips
             trips_result = supabase.table("trips").select("*").eq("status", "pending").execute()
             
             if not trips_result.data:
                 return None
             
-            # Get driver info
-            driver_result = supabase.table("drivers").select("*").eq("id", driver_id).execute()
-            if not driver_result.data:
-                return None
-            
-            driver = driver_result.data[0]
             pending_trips = trips_result.data
             
             # Score each trip for this driver
@@ -521,27 +595,3 @@ class AvailabilityAgent:
         common_words = loc1_words.intersection(loc2_words)
         
         return len(common_words) > 0
-    
-    def _get_driver_preferred_hours(self, trip_history: List[Dict[str, Any]]) -> List[int]:
-        """
-        Analyze driver's preferred working hours from history
-        """
-        hour_counts = {}
-        
-        for trip in trip_history:
-            if trip.get("created_at"):
-                try:
-                    created_time = datetime.fromisoformat(trip["created_at"].replace('Z', '+00:00'))
-                    hour = created_time.hour
-                    hour_counts[hour] = hour_counts.get(hour, 0) + 1
-                except:
-                    continue
-        
-        if not hour_counts:
-            return list(range(9, 18))  # Default business hours
-        
-        # Return hours with above-average activity
-        avg_activity = sum(hour_counts.values()) / len(hour_counts)
-        preferred_hours = [hour for hour, count in hour_counts.items() if count > avg_activity]
-        
-        return preferred_hours if preferred_hours else list(range(9, 18))
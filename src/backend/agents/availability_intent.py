@@ -0,0 +1,166 @@
+"""
+Availability Intent Matcher - Classifies driver status messages as available / busy
+Token-level trie built once at import, with negation handling and Hindi/Hinglish synonyms
+"""
+import re
+from typing import Dict, List, Optional, Any, Tuple
+
+AVAILABLE = "available"
+BUSY = "busy"
+
+# Phrases are matched on whole tokens, so "NO" never fires inside "NOT" or "ONLINE"
+INTENT_PHRASES = {
+    AVAILABLE: [
+        "FREE", "AVAILABLE", "READY", "ONLINE", "ACTIVE", "WORKING", "ON", "YES", "OPEN",
+        "ON DUTY", "I AM FREE", "IM FREE", "VACANT", "EMPTY", "UNLOADED", "DELIVERED",
+        "TRIP DONE", "TRIP COMPLETE", "TRIP COMPLETED",
+        # Hinglish
+        "KHALI", "KHAALI", "FREE HU", "FREE HOON", "FREE HAI", "TAYYAR", "TAIYAR", "TAYAR",
+        "GAADI KHALI", "GADI KHALI", "KAAM CHAHIYE", "LOAD CHAHIYE", "TRIP KHATAM",
+        "KAAM KHATAM", "FAARIG", "FARIG",
+        # Devanagari
+        "खाली", "फ्री", "तैयार", "उपलब्ध", "फारिग"
+    ],
+    BUSY: [
+        "BUSY", "OCCUPIED", "UNAVAILABLE", "OFF", "OFFLINE", "BREAK", "NO", "CLOSED",
+        "OFF DUTY", "ON BREAK", "ON LEAVE", "LEAVE", "LOADED", "ON TRIP", "ON THE WAY",
+        "DRIVING", "SLEEPING", "RESTING", "HOLIDAY",
+        # Hinglish
+        "VYAST", "CHUTTI", "CHHUTTI", "RASTE MEIN", "RAASTE MEIN", "RASTE ME", "GHAR PE",
+        "GHAR PAR", "SO RAHA", "ARAAM", "ARAM", "LOAD HAI", "GAADI BHARI", "GADI BHARI",
+        "ABHI NAHI", "AAJ NAHI",
+        # Devanagari
+        "व्यस्त", "बिज़ी", "बिजी", "छुट्टी", "रास्ते में"
+    ]
+}
+
+# A negator flips the polarity of the phrase after it ("NOT FREE") or, in
+# Hindi word order, of the phrase just before it ("FREE NAHI HU")
+NEGATORS = {
+    "NOT", "NO", "NEVER", "DONT", "CANT", "CANNOT", "WONT", "ISNT", "AINT",
+    "NAHI", "NAHIN", "NHI", "NAI", "NA", "MAT",
+    "नहीं", "नही", "मत"
+}
+
+# How many filler tokens may sit between a negator and the phrase it negates
+NEGATION_WINDOW = 2
+
+# Punctuation becomes a boundary token so "NO, I AM FREE" is not read as "NOT FREE"
+_TOKEN_RE = re.compile(r"[A-Zऀ-ॿ]+|[,.!?;:|।]")
+_BOUNDARY = "."
+_PHRASE_END = "$intent"
+
+
+def _build_trie(phrases: Dict[str, List[str]]) -> Dict[str, Any]:
+    trie: Dict[str, Any] = {}
+    for intent, phrase_list in phrases.items():
+        for phrase in phrase_list:
+            node = trie
+            for token in tokenize(phrase):
+                node = node.setdefault(token, {})
+            node[_PHRASE_END] = intent
+    return trie
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Uppercase and split into word tokens; apostrophes are dropped so "DON'T" -> "DONT"
+    """
+    tokens = _TOKEN_RE.findall(text.upper().replace("'", "").replace("’", ""))
+    return [token if token[0].isalpha() else _BOUNDARY for token in tokens]
+
+
+class AvailabilityIntentMatcher:
+    """
+    Single left-to-right pass over the tokens with longest-match lookup in the trie.
+
+    Every matched phrase produces a signal; a nearby negator flips it. When a
+    message carries several signals ("was busy, now free") the last one wins.
+    """
+
+    def __init__(self, phrases: Optional[Dict[str, List[str]]] = None):
+        self._trie = _build_trie(phrases or INTENT_PHRASES)
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Return AVAILABLE, BUSY or None when the message carries no availability intent
+        """
+        return self.analyze(text)["intent"]
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        tokens = tokenize(text or "")
+        signals: List[Tuple[str, int, int, bool]] = []  # (intent, start, end, negated)
+        last_negator = None
+        last_boundary = -1
+        i = 0
+
+        while i < len(tokens):
+            if tokens[i] == _BOUNDARY:
+                last_negator = None
+                last_boundary = i
+                i += 1
+                continue
+
+            intent, end = self._longest_match(tokens, i)
+
+            if intent is None:
+                if tokens[i] in NEGATORS:
+                    last_negator = i
+                    # Postfix negation: "FREE NAHI (HU)" flips the phrase right before it
+                    if (signals and not signals[-1][3] and signals[-1][2] > last_boundary
+                            and i - signals[-1][2] <= NEGATION_WINDOW):
+                        prev_intent, start, prev_end, _ = signals[-1]
+                        signals[-1] = (prev_intent, start, prev_end, True)
+                        last_negator = None
+                i += 1
+                continue
+
+            # A bare "NO" with another phrase shortly after acts as a negator ("NO LONGER BUSY")
+            if tokens[i] in NEGATORS and end == i + 1 and self._phrase_ahead(tokens, end):
+                last_negator = i
+                i += 1
+                continue
+
+            negated = last_negator is not None and i - last_negator <= NEGATION_WINDOW
+            signals.append((intent, i, end, negated))
+            last_negator = None
+            i = end
+
+        if not signals:
+            return {"intent": None, "signals": [], "tokens": tokens}
+
+        intent, _, _, negated = signals[-1]
+        if negated:
+            intent = BUSY if intent == AVAILABLE else AVAILABLE
+
+        return {
+            "intent": intent,
+            "signals": [
+                {"phrase": " ".join(tokens[start:end]), "intent": sig_intent, "negated": sig_negated}
+                for sig_intent, start, end, sig_negated in signals
+            ],
+            "tokens": tokens
+        }
+
+    def _phrase_ahead(self, tokens: List[str], start: int) -> bool:
+        for j in range(start, min(start + NEGATION_WINDOW, len(tokens))):
+            if tokens[j] == _BOUNDARY:
+                return False
+            if self._longest_match(tokens, j)[0] is not None:
+                return True
+        return False
+
+    def _longest_match(self, tokens: List[str], start: int) -> Tuple[Optional[str], int]:
+        node = self._trie
+        intent, end = None, start
+        for j in range(start, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if _PHRASE_END in node:
+                intent, end = node[_PHRASE_END], j + 1
+        return intent, end
+
+
+# Built once at import and shared
+availability_matcher = AvailabilityIntentMatcher()
@@ -0,0 +1,98 @@
+"""
+Circuit Breaker - Fail fast on downstreams (DB, OCR, routing) that keep failing or timing out
+"""
+import threading
+import time
+from typing import Dict, Any
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and calls
+    are rejected without touching the downstream. Once ``reset_timeout_seconds``
+    has passed a single trial call is let through (half-open); success closes
+    the breaker again, failure re-opens it. A call that ends without an outcome
+    (cancelled, or turned away by backpressure) must ``release`` instead, or the
+    trial slot stays taken.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go through right now
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Neutral outcome: the call ended without telling anything about the downstream,
+        so a half-open trial slot is freed for the next caller
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_seconds": self.reset_timeout_seconds
+        }
+
+
+# One breaker per downstream, shared by every agent that calls it
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    "db": CircuitBreaker("db"),
+    "ocr": CircuitBreaker("ocr", failure_threshold=3, reset_timeout_seconds=60.0),
+    "routing": CircuitBreaker("routing")
+}
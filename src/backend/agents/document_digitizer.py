@@ -2,44 +2,132 @@
 Document Digitizer Agent - Extracts information from receipts and documents using OCR
 Processes expense receipts, freight bills, and other logistics documents
 """
-import cv2
-import numpy as np
-import pytesseract
-from PIL import Image
-import re
 import base64
 import io
-from typing import Dict, Optional, List, Any
+from typing import AsyncIterator, Dict, Optional, List, Any, Union
 from datetime import datetime
+import asyncio
+import hashlib
 import json
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from agents.ocr_pool import ocr_pool, OcrQueueFull, pipeline_version
+from agents.ocr_document import OcrDocument, per_document
+from agents.field_extraction import AMOUNT_KINDS, FieldCandidates, scan_fields
+from agents.ocr_pdf import is_pdf, page_count
+
+try:
+    from app.ocr_cache import ocr_cache, content_key
+except ImportError:
+    ocr_cache = None
+
+try:
+    from app.receipt_fingerprints import receipt_fingerprints, fields_agree
+except ImportError:
+    receipt_fingerprints = None
+
+# Confidence of the extracted amount by the strongest candidate kind found:
+# labelled total, other labelled amount, currency-marked amount, bare number
+AMOUNT_RANK_CONFIDENCE = {3: 0.9, 2: 0.8, 1: 0.7, 0: 0.5}
+
+BILL_NUMBER_LABELS = ("bill", "invoice", "inv", "lr", "gr", "bilty")
+
 
 class DocumentDigitizerAgent:
     def __init__(self):
         self.name = "Document Digitizer Agent"
         self.version = "1.0.0"
         
-        # Configure tesseract (adjust path if needed)
-        # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+        # Decoding, preprocessing and Tesseract run in the shared OCR worker pool
+        # (OCR_ENGINE picks tesserocr or pytesseract; set TESSDATA_PREFIX / PATH for the
+        # workers if the trained data or the tesseract binary is not on the default path)
+        self.ocr_pool = ocr_pool
+        
+        # Identical images (same bytes, same pipeline) are OCRed once
+        self.ocr_cache = ocr_cache
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        
+        # Perceptual-hash index of past receipts, for re-submitted photos
+        self.receipt_fingerprints = receipt_fingerprints
     
-    async def extract_freight_amount(self, image_data: bytes) -> Dict[str, Any]:
+    async def load_document(self, image_data: Union[bytes, OcrDocument], mode: str = "full") -> OcrDocument:
+        """
+        OCR an image once (in a worker process); extractors all read the returned
+        document, so pass it instead of the bytes to run several of them.
+        Repeat uploads of the same bytes are served from the OCR cache, and
+        concurrent uploads of the same bytes share one OCR job.
+        
+        mode="amount" only reads the total / bill number regions at full
+        resolution (see agents.ocr_regions); a full document already cached or
+        being OCRed for the same bytes is used instead.
+        """
+        if isinstance(image_data, OcrDocument):
+            return image_data
+        if self.ocr_cache is None:
+            document = await self.ocr_pool.run(image_data, mode=mode)
+            document.sha256 = hashlib.sha256(image_data).hexdigest()
+            return document
+        
+        keys = [content_key(image_data, pipeline_version())]
+        if mode != "full":
+            keys.append(content_key(image_data, pipeline_version(mode=mode)))
+        key = keys[-1]
+        
+        for cached_key in keys:
+            document = self.ocr_cache.get(cached_key)
+            if document is not None:
+                document.sha256 = cached_key[0]
+                return document
+        
+        for pending_key in keys:
+            pending = self._in_flight.get(pending_key)
+            if pending is not None:
+                return await asyncio.shield(pending)
+        
+        # The OCR runs in its own task and every requester (the first one included)
+        # only shields it: a requester that is cancelled, e.g. on a client disconnect,
+        # neither cancels the others nor loses the result for the cache
+        task = asyncio.create_task(self._ocr_and_cache(image_data, mode, key))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._ocr_done(key, done))
+        return await asyncio.shield(task)
+    
+    async def _ocr_and_cache(self, image_data: bytes, mode: str, key: tuple) -> OcrDocument:
+        document = await self.ocr_pool.run(image_data, mode=mode)
+        document.sha256 = key[0]
+        try:
+            self.ocr_cache.put(key, document)
+        except Exception as e:
+            print(f"OCR cache write failed: {e}")
+        return document
+    
+    def _ocr_done(self, key: tuple, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so a failure nobody is still awaiting does not warn
+    
+    async def extract_freight_amount(self, image_data: Union[bytes, OcrDocument]) -> Dict[str, Any]:
         """
         Extract freight amount from receipt image using OCR
         """
         try:
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Preprocess image for better OCR
-            processed_image = self._preprocess_image_for_ocr(image)
-            
-            # Extract text using OCR
-            extracted_text = pytesseract.image_to_string(processed_image, config='--psm 6')
+            # Amount-only path: full-resolution OCR of the total / bill number regions
+            document = await self.load_document(image_data, mode="amount")
             
             # Extract amount using regex patterns
-            amount_info = self._extract_amount_from_text(extracted_text)
+            amount_info = self._extract_amount_from_text(document)
             
             # Extract additional details
-            receipt_details = self._extract_receipt_details(extracted_text)
+            receipt_details = self._extract_receipt_details(document)
             
             return {
                 "success": True,
@@ -47,10 +135,13 @@ class DocumentDigitizerAgent:
                 "currency": amount_info.get("currency", "INR"),
                 "confidence": amount_info.get("confidence", 0.5),
                 "receipt_details": receipt_details,
-                "raw_text": extracted_text,
+                "raw_text": document.text,
+                "ocr_cache_hit": document.from_cache,
                 "processing_timestamp": datetime.utcnow().isoformat()
             }
         
+        except OcrQueueFull:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -60,43 +151,40 @@ class DocumentDigitizerAgent:
                 "processing_timestamp": datetime.utcnow().isoformat()
             }
     
-    async def process_expense_receipt(self, image_data: bytes) -> Dict[str, Any]:
+    async def process_expense_receipt(self, image_data: Union[bytes, OcrDocument]) -> Dict[str, Any]:
         """
         Process expense receipt and extract comprehensive information
         """
         try:
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Preprocess image
-            processed_image = self._preprocess_image_for_ocr(image)
-            
-            # Extract text
-            extracted_text = pytesseract.image_to_string(processed_image, config='--psm 6')
+            document = await self.load_document(image_data)
             
             # Parse receipt information
             receipt_info = {
-                "vendor": self._extract_vendor_name(extracted_text),
-                "date": self._extract_date(extracted_text),
-                "amount": self._extract_amount_from_text(extracted_text),
-                "category": self._classify_expense_category(extracted_text),
-                "items": self._extract_line_items(extracted_text),
-                "location": self._extract_location(extracted_text),
-                "receipt_number": self._extract_receipt_number(extracted_text)
+                "vendor": self._extract_vendor_name(document),
+                "date": self._extract_date(document),
+                "amount": self._extract_amount_from_text(document),
+                "category": self._classify_expense_category(document),
+                "items": self._extract_line_items(document),
+                "location": self._extract_location(document),
+                "receipt_number": self._extract_receipt_number(document)
             }
             
             # Calculate confidence score
-            confidence = self._calculate_extraction_confidence(receipt_info, extracted_text)
+            confidence = self._calculate_extraction_confidence(receipt_info, document)
             
             return {
                 "success": True,
                 "receipt_info": receipt_info,
                 "confidence": confidence,
-                "raw_text": extracted_text,
+                "raw_text": document.text,
+                "ocr_cache_hit": document.from_cache,
                 "processing_timestamp": datetime.utcnow().isoformat(),
-                "suggested_expense": self._generate_expense_suggestion(receipt_info)
+                "suggested_expense": self._generate_expense_suggestion(receipt_info),
+                **self._check_duplicate_receipt(document)
             }
         
+        except OcrQueueFull:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -105,38 +193,36 @@ class DocumentDigitizerAgent:
                 "processing_timestamp": datetime.utcnow().isoformat()
             }
     
-    async def extract_freight_bill_details(self, image_data: bytes) -> Dict[str, Any]:
+    async def extract_freight_bill_details(self, image_data: Union[bytes, OcrDocument]) -> Dict[str, Any]:
         """
         Extract details from freight bills and shipping documents
+        (a single image, or a PDF whose pages are OCRed in parallel and merged)
         """
+        if isinstance(image_data, bytes) and is_pdf(image_data):
+            result: Dict[str, Any] = {}
+            async for event in self.stream_freight_bill_pages(image_data):
+                result = event
+            return result
+        
         try:
-            image = Image.open(io.BytesIO(image_data))
-            processed_image = self._preprocess_image_for_ocr(image)
-            extracted_text = pytesseract.image_to_string(processed_image, config='--psm 6')
+            document = await self.load_document(image_data)
             
             # Extract freight-specific information
-            freight_details = {
-                "consignor": self._extract_consignor(extracted_text),
-                "consignee": self._extract_consignee(extracted_text),
-                "origin": self._extract_origin(extracted_text),
-                "destination": self._extract_destination(extracted_text),
-                "weight": self._extract_weight(extracted_text),
-                "freight_amount": self._extract_amount_from_text(extracted_text),
-                "bill_number": self._extract_bill_number(extracted_text),
-                "vehicle_number": self._extract_vehicle_number(extracted_text),
-                "date": self._extract_date(extracted_text)
-            }
+            freight_details = self._freight_details(document)
             
-            confidence = self._calculate_extraction_confidence(freight_details, extracted_text)
+            confidence = self._calculate_extraction_confidence(freight_details, document)
             
             return {
                 "success": True,
                 "freight_details": freight_details,
                 "confidence": confidence,
-                "raw_text": extracted_text,
+                "raw_text": document.text,
+                "ocr_cache_hit": document.from_cache,
                 "processing_timestamp": datetime.utcnow().isoformat()
             }
         
+        except OcrQueueFull:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -145,74 +231,263 @@ class DocumentDigitizerAgent:
                 "processing_timestamp": datetime.utcnow().isoformat()
             }
     
-    def _preprocess_image_for_ocr(self, image: Image.Image) -> np.ndarray:
-        """
-        Preprocess image to improve OCR accuracy
+    async def stream_freight_bill_pages(self, pdf_data: bytes) -> AsyncIterator[Dict[str, Any]]:
         """
-        # Convert PIL Image to OpenCV format
-        opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2GRAY)
+        Extract a multi-page PDF freight bill page by page.
         
-        # Apply denoising
-        denoised = cv2.fastNlMeansDenoising(gray)
+        Pages are rasterized lazily inside the OCR workers and at most one page per
+        worker is in flight, so memory stays bounded by a page per worker however
+        long the PDF is. Yields a "page" event as each page finishes (in completion
+        order) with that page's fields and the fields merged so far, then a final
+        "complete" event shaped like extract_freight_bill_details' result.
         
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-        )
-        
-        # Morphological operations to clean up the image
-        kernel = np.ones((1, 1), np.uint8)
-        cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+        Raises OcrQueueFull only if the first page cannot be queued; later pages
+        wait for room in the OCR backlog instead.
+        """
+        started = datetime.utcnow()
+        sha = hashlib.sha256(pdf_data).hexdigest()
+        pages: Dict[int, Optional[OcrDocument]] = {}
+        details: Dict[int, Dict[str, Any]] = {}
+        tasks: Dict[asyncio.Task, int] = {}
         
-        return cleaned
+        handle, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(handle, "wb") as pdf_file:
+                pdf_file.write(pdf_data)
+            try:
+                total_pages = page_count(path)
+            except Exception as e:
+                yield {
+                    "event": "complete",
+                    "success": False,
+                    "error": f"Unreadable PDF: {e}",
+                    "confidence": 0.0,
+                    "processing_timestamp": datetime.utcnow().isoformat()
+                }
+                return
+            
+            next_page = 0
+            while next_page < total_pages or tasks:
+                while next_page < total_pages and len(tasks) < self.ocr_pool.workers:
+                    task = asyncio.create_task(self._load_pdf_page(path, sha, next_page, wait=bool(pages or tasks)))
+                    tasks[task] = next_page
+                    next_page += 1
+                
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.get):
+                    index = tasks.pop(task)
+                    try:
+                        pages[index] = task.result()
+                    except OcrQueueFull:
+                        raise
+                    except Exception as e:
+                        pages[index] = None
+                        yield {
+                            "event": "page",
+                            "page": index + 1,
+                            "page_count": total_pages,
+                            "success": False,
+                            "error": str(e)
+                        }
+                        continue
+                    details[index] = self._freight_details(pages[index])
+                    yield {
+                        "event": "page",
+                        "page": index + 1,
+                        "page_count": total_pages,
+                        "success": True,
+                        "freight_details": details[index],
+                        "merged_details": self._merge_freight_details([details[i] for i in sorted(details)]),
+                        "ocr_cache_hit": pages[index].from_cache
+                    }
+        finally:
+            for task in tasks:
+                task.cancel()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        
+        documents = [pages[index] for index in sorted(pages) if pages[index] is not None]
+        if not documents:
+            yield {
+                "event": "complete",
+                "success": False,
+                "error": "No page of the PDF could be read",
+                "page_count": total_pages,
+                "confidence": 0.0,
+                "processing_timestamp": datetime.utcnow().isoformat()
+            }
+            return
+        
+        freight_details = self._merge_freight_details([details[index] for index in sorted(details)])
+        document = OcrDocument(tokens=[], lines=[line for document in documents for line in document.lines])
+        yield {
+            "event": "complete",
+            "success": True,
+            "freight_details": freight_details,
+            "confidence": self._calculate_extraction_confidence(freight_details, document),
+            "raw_text": "\f".join(document.text for document in documents),
+            "page_count": total_pages,
+            "pages": [
+                {"page": index + 1, "success": pages[index] is not None} for index in sorted(pages)
+            ],
+            "ocr_cache_hit": all(document.from_cache for document in documents),
+            "processing_seconds": round((datetime.utcnow() - started).total_seconds(), 3),
+            "processing_timestamp": datetime.utcnow().isoformat()
+        }
+    
+    async def _load_pdf_page(self, path: str, sha: str, index: int, wait: bool) -> OcrDocument:
+        """
+        OCR one page of a PDF file, cached per page under the PDF's hash
+        """
+        key = (sha, f"{pipeline_version()}|pdf-page-{index}")
+        if self.ocr_cache is not None:
+            document = self.ocr_cache.get(key)
+            if document is not None:
+                document.sha256 = sha
+                return document
+        
+        while True:
+            try:
+                document = await self.ocr_pool.run_pdf_page(path, index)
+                break
+            except OcrQueueFull as e:
+                # Other pages of this PDF are already queued: wait for room rather than fail the upload
+                if not wait:
+                    raise
+                await asyncio.sleep(min(e.retry_after_seconds, 1))
+        
+        document.sha256 = sha
+        if self.ocr_cache is not None:
+            try:
+                self.ocr_cache.put(key, document)
+            except Exception as e:
+                print(f"OCR cache write failed: {e}")
+        return document
+    
+    def _freight_details(self, document: OcrDocument) -> Dict[str, Any]:
+        return {
+            "consignor": self._extract_consignor(document),
+            "consignee": self._extract_consignee(document),
+            "origin": self._extract_origin(document),
+            "destination": self._extract_destination(document),
+            "weight": self._extract_weight(document),
+            "freight_amount": self._extract_amount_from_text(document),
+            "bill_number": self._extract_bill_number(document),
+            "vehicle_number": self._extract_vehicle_number(document),
+            "date": self._extract_date(document)
+        }
     
-    def _extract_amount_from_text(self, text: str) -> Dict[str, Any]:
+    def _merge_freight_details(self, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Extract monetary amounts from text using regex patterns
+        Freight details of a multi-page bill from its pages' details, in page order:
+        each field from the first page that has it, and the freight amount chosen
+        among the amounts of every page (a total on the last page beats a line
+        amount on the first)
         """
-        amount_patterns = [
-            r'(?:total|amount|sum|paid|payment)?\s*[:\-]?\s*(?:rs\.?|₹|inr)?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'₹\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'rs\.?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*(?:rs\.?|₹|inr)',
-            r'(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'  # Generic number pattern
+        found_amounts = [
+            {**found, "page": number}
+            for number, page in enumerate(pages, start=1)
+            for found in page["freight_amount"]["alternatives"]
         ]
+        return {
+            field: self._select_amount(found_amounts) if field == "freight_amount"
+            else next((page[field] for page in pages if page[field] is not None), None)
+            for field in (pages[0] if pages else ())
+        }
+    
+    def link_receipt_expense(self, fingerprint_id: Optional[int], expense_id: Any, trip_id: Any = None) -> None:
+        """
+        Record the expense created from a receipt so later near-duplicates point at it
+        """
+        if self.receipt_fingerprints is not None and fingerprint_id is not None and expense_id is not None:
+            self.receipt_fingerprints.attach_expense(fingerprint_id, expense_id, trip_id)
+    
+    def _check_duplicate_receipt(self, document: OcrDocument) -> Dict[str, Any]:
+        """
+        Look the receipt up among earlier ones by perceptual hash, then remember it.
+        The hash only finds receipts that look alike (same template, same table);
+        a match counts when the OCRed fields agree too, or the bytes are identical.
+        """
+        if self.receipt_fingerprints is None or document.dhash is None or not document.sha256:
+            return {"possible_duplicate": False, "duplicate_matches": [], "receipt_fingerprint_id": None}
         
-        found_amounts = []
+        fields = {
+            "amount": self._extract_amount_from_text(document)["amount"],
+            "receipt_date": self._extract_date(document),
+            "receipt_number": self._extract_receipt_number(document)
+        }
+        try:
+            matches = [
+                match for match in self.receipt_fingerprints.find_near(document.dhash)
+                if (match["sha256"] == document.sha256 and match["expense_id"])
+                or (match["sha256"] != document.sha256 and fields_agree(match, fields))
+            ]
+            fingerprint_id = self.receipt_fingerprints.register(document.dhash, document.sha256, fields=fields)
+        except Exception as e:
+            print(f"Receipt duplicate check failed: {e}")
+            return {"possible_duplicate": False, "duplicate_matches": [], "receipt_fingerprint_id": None}
         
-        for pattern in amount_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                amount_str = match.group(1) if match.groups() else match.group(0)
-                try:
-                    # Clean amount string
-                    clean_amount = amount_str.replace(',', '').replace('₹', '').replace('rs', '').replace('.', '').strip()
-                    
-                    # Convert to float (assuming last two digits are decimal places if > 100)
-                    if len(clean_amount) > 2 and clean_amount.isdigit():
-                        amount = float(clean_amount[:-2] + '.' + clean_amount[-2:]) if len(clean_amount) > 2 else float(clean_amount)
-                    else:
-                        amount = float(clean_amount)
-                    
-                    if amount > 1:  # Reasonable minimum amount
-                        found_amounts.append({
-                            "amount": amount,
-                            "raw_text": amount_str,
-                            "pattern_used": pattern
-                        })
-                except ValueError:
-                    continue
+        return {
+            # Only a match that already became an expense risks double reimbursement
+            "possible_duplicate": any(match["expense_id"] for match in matches),
+            "duplicate_matches": [
+                {
+                    "expense_id": match["expense_id"],
+                    "trip_id": match["trip_id"],
+                    "hamming_distance": match["distance"],
+                    "exact_copy": match["sha256"] == document.sha256,
+                    "first_seen_at": match["seen_at"]
+                }
+                for match in matches[:5]
+            ],
+            "receipt_fingerprint_id": fingerprint_id
+        }
+    
+    @per_document
+    def _field_candidates(self, document: OcrDocument) -> FieldCandidates:
+        """Single scan of the text for every field pattern; the extractors below resolve from it"""
+        return scan_fields(document.text)
+    
+    @per_document
+    def _extract_amount_from_text(self, document: OcrDocument) -> Dict[str, Any]:
+        """
+        Extract monetary amounts from text, preferring labelled totals over
+        currency-marked amounts over bare numbers
+        """
+        found_amounts = []
         
+        for candidate in self._field_candidates(document).of(*AMOUNT_KINDS):
+            if candidate.value <= 1:  # Reasonable minimum amount
+                continue
+            if candidate.kind == "amount_labeled":
+                rank = 3 if "total" in candidate.label or candidate.label.startswith("net") else 2
+            elif candidate.kind == "amount_currency":
+                rank = 1
+            elif "." in candidate.raw or len(candidate.raw.replace(",", "")) <= 7:
+                rank = 0
+            else:
+                continue  # phone numbers and other long digit runs
+            found_amounts.append({
+                "amount": candidate.value,
+                "raw_text": candidate.raw,
+                "kind": candidate.kind,
+                "label": candidate.label,
+                "rank": rank
+            })
+        
+        return self._select_amount(found_amounts)
+    
+    def _select_amount(self, found_amounts: List[Dict[str, Any]]) -> Dict[str, Any]:
         if found_amounts:
-            # Return the largest amount found (likely the total)
-            best_amount = max(found_amounts, key=lambda x: x["amount"])
+            # Largest amount among the strongest kind found (likely the total)
+            best_rank = max(found["rank"] for found in found_amounts)
+            best_amount = max((found for found in found_amounts if found["rank"] == best_rank), key=lambda x: x["amount"])
             return {
                 "amount": best_amount["amount"],
                 "currency": "INR",
-                "confidence": 0.8 if len(found_amounts) == 1 else 0.6,
+                "confidence": AMOUNT_RANK_CONFIDENCE[best_rank],
                 "alternatives": found_amounts
             }
         
@@ -223,9 +498,20 @@ class DocumentDigitizerAgent:
             "alternatives": []
         }
     
-    def _extract_vendor_name(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_receipt_details(self, document: OcrDocument) -> Dict[str, Any]:
+        """Receipt header fields shown alongside an extracted amount"""
+        return {
+            "vendor": self._extract_vendor_name(document),
+            "date": self._extract_date(document),
+            "receipt_number": self._extract_receipt_number(document),
+            "category": self._classify_expense_category(document)
+        }
+    
+    @per_document
+    def _extract_vendor_name(self, document: OcrDocument) -> Optional[str]:
         """Extract vendor/merchant name from receipt text"""
-        lines = text.split('\n')
+        lines = document.lines
         
         # Look for likely vendor names in the first few lines
         for i, line in enumerate(lines[:5]):
@@ -233,29 +519,21 @@ class DocumentDigitizerAgent:
             if len(line) > 3 and not line.isdigit() and not self._is_address_line(line):
                 # Skip common receipt headers
                 skip_words = ['receipt', 'bill', 'invoice', 'tax', 'gst', 'date', 'time']
-                if not any(word in line.lower() for word in skip_words):
+                if not any(word in document.lower_lines[i] for word in skip_words):
                     return line
         
         return None
     
-    def _extract_date(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_date(self, document: OcrDocument) -> Optional[str]:
         """Extract date from receipt text"""
-        date_patterns = [
-            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',
-            r'\d{1,2}\s+\w+\s+\d{2,4}',
-            r'\w+\s+\d{1,2},?\s+\d{2,4}'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(0)
-        
-        return None
+        candidate = self._field_candidates(document).first("date")
+        return candidate.value if candidate else None
     
-    def _classify_expense_category(self, text: str) -> str:
+    @per_document
+    def _classify_expense_category(self, document: OcrDocument) -> str:
         """Classify expense category based on receipt content"""
-        text_lower = text.lower()
+        text_lower = document.lower
         
         fuel_keywords = ['petrol', 'diesel', 'fuel', 'hp', 'bharat petroleum', 'iocl', 'bpcl']
         if any(keyword in text_lower for keyword in fuel_keywords):
@@ -279,34 +557,33 @@ class DocumentDigitizerAgent:
         
         return "other"
     
-    def _extract_line_items(self, text: str) -> List[Dict[str, Any]]:
+    @per_document
+    def _extract_line_items(self, document: OcrDocument) -> List[Dict[str, Any]]:
         """Extract individual line items from receipt"""
-        lines = text.split('\n')
         items = []
-        
-        for line in lines:
-            line = line.strip()
-            # Look for lines with item and price pattern
-            item_pattern = r'(.+?)\s+(\d+(?:\.\d{2})?)'
-            match = re.search(item_pattern, line)
-            
-            if match and len(line) > 5:
-                item_name = match.group(1).strip()
-                try:
-                    price = float(match.group(2))
-                    if price > 0 and len(item_name) > 2:
-                        items.append({
-                            "name": item_name,
-                            "price": price
-                        })
-                except ValueError:
-                    continue
+        prices_by_line: Dict[int, list] = {}
+        
+        for candidate in self._field_candidates(document).of("number", "amount_currency"):
+            prices_by_line.setdefault(candidate.line, []).append(candidate)
+        
+        # The item is the text before the first number on its line (quantity or
+        # price), the price is the last number (the line total on itemized bills)
+        for line_index, prices in prices_by_line.items():
+            line = document.lines[line_index]
+            item_name = line[:prices[0].column].strip()
+            price = prices[-1].value
+            if price > 0 and len(item_name) > 2 and len(line.strip()) > 5:
+                items.append({
+                    "name": item_name,
+                    "price": price
+                })
         
         return items
     
-    def _extract_location(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_location(self, document: OcrDocument) -> Optional[str]:
         """Extract location/address from receipt"""
-        lines = text.split('\n')
+        lines = document.lines
         
         # Look for address-like lines
         for line in lines:
@@ -315,94 +592,72 @@ class DocumentDigitizerAgent:
         
         return None
     
-    def _extract_receipt_number(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_receipt_number(self, document: OcrDocument) -> Optional[str]:
         """Extract receipt/bill number"""
-        patterns = [
-            r'(?:receipt|bill|invoice)\s*(?:#|no\.?|number)?\s*:?\s*([a-zA-Z0-9]+)',
-            r'(?:#|no\.?)\s*([a-zA-Z0-9]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return None
+        candidate = self._field_candidates(document).first("doc_number")
+        return candidate.value if candidate else None
+    
+    def _extract_party(self, document: OcrDocument, labels: tuple, fallback: str) -> Optional[str]:
+        """A labelled party / place; the generic from/to label only when no specific one is present"""
+        candidates = self._field_candidates(document)
+        candidate = candidates.first("party", labels) or candidates.first("party", (fallback,))
+        return candidate.value if candidate else None
     
-    def _extract_consignor(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_consignor(self, document: OcrDocument) -> Optional[str]:
         """Extract consignor from freight bill"""
-        pattern = r'(?:consignor|from|sender)[:]*\s*([^\n]+)'
-        match = re.search(pattern, text, re.IGNORECASE)
-        return match.group(1).strip() if match else None
+        return self._extract_party(document, ("consignor", "shipper", "sender"), "from")
     
-    def _extract_consignee(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_consignee(self, document: OcrDocument) -> Optional[str]:
         """Extract consignee from freight bill"""
-        pattern = r'(?:consignee|to|receiver)[:]*\s*([^\n]+)'
-        match = re.search(pattern, text, re.IGNORECASE)
-        return match.group(1).strip() if match else None
+        return self._extract_party(document, ("consignee", "receiver"), "to")
     
-    def _extract_origin(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_origin(self, document: OcrDocument) -> Optional[str]:
         """Extract origin location from freight bill"""
-        pattern = r'(?:origin|from|pickup)[:]*\s*([^\n]+)'
-        match = re.search(pattern, text, re.IGNORECASE)
-        return match.group(1).strip() if match else None
+        return self._extract_party(document, ("origin", "pickup"), "from")
     
-    def _extract_destination(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_destination(self, document: OcrDocument) -> Optional[str]:
         """Extract destination from freight bill"""
-        pattern = r'(?:destination|to|delivery)[:]*\s*([^\n]+)'
-        match = re.search(pattern, text, re.IGNORECASE)
-        return match.group(1).strip() if match else None
+        return self._extract_party(document, ("destination", "delivery"), "to")
     
-    def _extract_weight(self, text: str) -> Optional[Dict[str, Any]]:
+    @per_document
+    def _extract_weight(self, document: OcrDocument) -> Optional[Dict[str, Any]]:
         """Extract weight information"""
-        pattern = r'(\d+(?:\.\d+)?)\s*(kg|kgs|ton|tons|mt)'
-        match = re.search(pattern, text, re.IGNORECASE)
+        candidate = self._field_candidates(document).first("weight")
         
-        if match:
+        if candidate:
             return {
-                "value": float(match.group(1)),
-                "unit": match.group(2).lower()
+                "value": candidate.value,
+                "unit": candidate.unit
             }
         
         return None
     
-    def _extract_bill_number(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_bill_number(self, document: OcrDocument) -> Optional[str]:
         """Extract bill number from freight bill"""
-        patterns = [
-            r'(?:bill|invoice|lr)\s*(?:#|no\.?|number)?\s*:?\s*([a-zA-Z0-9]+)',
-            r'lr\s*(?:#|no\.?)?\s*:?\s*([a-zA-Z0-9]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return None
+        candidate = self._field_candidates(document).first("doc_number", BILL_NUMBER_LABELS)
+        return candidate.value if candidate else None
     
-    def _extract_vehicle_number(self, text: str) -> Optional[str]:
+    @per_document
+    def _extract_vehicle_number(self, document: OcrDocument) -> Optional[str]:
         """Extract vehicle number"""
-        pattern = r'(?:vehicle|truck|lorry)\s*(?:#|no\.?|number)?\s*:?\s*([a-zA-Z0-9\s]+)'
-        match = re.search(pattern, text, re.IGNORECASE)
-        
-        if match:
-            return match.group(1).strip()
-        
-        # Look for Indian vehicle number pattern
-        indian_vehicle_pattern = r'[A-Z]{2}\s*\d{2}\s*[A-Z]{1,2}\s*\d{4}'
-        match = re.search(indian_vehicle_pattern, text)
+        candidates = self._field_candidates(document)
         
-        if match:
-            return match.group(0)
-        
-        return None
+        # A labelled number first, then any Indian registration plate in the text
+        candidate = candidates.first("vehicle") or candidates.first("plate")
+        return candidate.value if candidate else None
     
     def _is_address_line(self, line: str) -> bool:
         """Check if a line looks like an address"""
         address_indicators = ['road', 'street', 'lane', 'area', 'city', 'pin', 'pincode', 'state']
         return any(indicator in line.lower() for indicator in address_indicators)
     
-    def _calculate_extraction_confidence(self, extracted_info: Dict[str, Any], raw_text: str) -> float:
+    def _calculate_extraction_confidence(self, extracted_info: Dict[str, Any], document: OcrDocument) -> float:
         """Calculate confidence score for extraction"""
         confidence = 0.0
         total_fields = len(extracted_info)
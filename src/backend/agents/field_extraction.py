@@ -0,0 +1,149 @@
+"""
+Field Extraction - Single-pass field scanner for receipt and freight bill OCR text
+Every field pattern is one named alternative of a regex compiled once at import;
+a scan walks the text once and emits typed candidates with their positions
+"""
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+_NUMBER = r"\d{1,3}(?:,\d{2,3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?"  # 12,500 / 1,25,000.50 / 5592.29
+_CURRENCY = r"(?:rs\.?|₹|inr)"
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_NUMBER_LABEL = r"(?:#|no\b\.?|number)?\s*[:\-.]?\s*"
+_PARTY_LABELS = r"consignor|consignee|shipper|sender|receiver|origin|pickup|destination|delivery|from|to"
+
+# (kind, pattern) in priority order. Alternatives are tried left to right at each
+# position, so labelled fields come before bare shapes (dates, weights, plates) and
+# those before plain numbers; a matched span is consumed, so a bill number or a
+# date is never also read as an amount. Subgroups are named "<kind>__value*" /
+# "<kind>__label*" so one kind can have several alternatives.
+FIELD_PATTERNS = [
+    ("amount_labeled",
+     r"\b(?P<amount_labeled__label>grand\s+total|net\s+(?:amount|payable)|total(?:\s+amount)?|amount(?:\s+paid)?"
+     r"|paid|payment|freight(?:\s+charges?)?)\b\s*[:\-=]?\s*" + _CURRENCY + r"?\s*(?P<amount_labeled__value>" + _NUMBER + ")"),
+    ("doc_number",
+     r"\b(?P<doc_number__label>receipt|bill|invoice|inv|lr|gr|bilty)\b\.?\s*" + _NUMBER_LABEL +
+     r"(?P<doc_number__value>(?=[a-z/-]*\d)[a-z0-9][a-z0-9/-]*)"
+     r"|(?P<doc_number__label2>#|\bno\b)\.?\s*:?\s*(?P<doc_number__value2>(?=[a-z/-]*\d)[a-z0-9][a-z0-9/-]*)"),
+    ("vehicle",
+     r"\b(?:vehicle|veh|truck|lorry)\b\s*" + _NUMBER_LABEL + r"(?P<vehicle__value>[a-z]{2}[ -]?\d{1,2}[ -]?[a-z]{0,3}[ -]?\d{1,4}\b|[a-z0-9-]*\d[a-z0-9-]*)"),
+    ("party",
+     r"\b(?P<party__label>" + _PARTY_LABELS + r")\b\s*[:\-]?[ \t]*"
+     r"(?P<party__value>[^\n]+?)(?=[ \t]+(?:" + _PARTY_LABELS + r")\b\s*[:\-]|[ \t]*$)"),
+    ("date",
+     r"\b(?P<date__value>\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}|\d{1,2}\s+" + _MONTH + r",?\s+\d{2,4}"
+     r"|" + _MONTH + r"\s+\d{1,2},?\s+\d{2,4})"),
+    ("weight",
+     r"(?P<weight__value>" + _NUMBER + r")\s*(?P<weight__unit>kgs?|tons?|mt)\b"),
+    ("amount_currency",
+     _CURRENCY + r"\s*(?P<amount_currency__value>" + _NUMBER + r")"
+     r"|(?P<amount_currency__value2>" + _NUMBER + r")\s*(?:/-|" + _CURRENCY + r"\b)"),
+    ("plate",
+     r"\b(?P<plate__value>[a-z]{2}[ -]?\d{2}[ -]?[a-z]{1,2}[ -]?\d{4})\b"),
+    ("number",
+     r"(?<![\w.,])(?P<number__value>" + _NUMBER + r")(?![\w])"),
+]
+
+# Fields only start at a word start (or at "#" / "₹"); the guard in front of the
+# alternation lets the scanner skip the middle of words without trying every branch
+FIELD_REGEX = re.compile(
+    r"(?<![^\W_])(?=[\w#₹])(?:" + "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in FIELD_PATTERNS) + ")",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Group numbers of each kind's value / label / unit subgroups, resolved once
+_SUBGROUPS = {
+    kind: {
+        "values": [FIELD_REGEX.groupindex[name] for name in FIELD_REGEX.groupindex if name.startswith(f"{kind}__value")],
+        "labels": [FIELD_REGEX.groupindex[name] for name in FIELD_REGEX.groupindex if name.startswith(f"{kind}__label")],
+        "unit": FIELD_REGEX.groupindex.get(f"{kind}__unit")
+    }
+    for kind, _ in FIELD_PATTERNS
+}
+
+AMOUNT_KINDS = ("amount_labeled", "amount_currency", "number")
+
+
+@dataclass
+class FieldCandidate:
+    kind: str
+    value: Any  # float for amounts / numbers / weights, str otherwise
+    raw: str
+    start: int
+    end: int
+    line: int
+    column: int
+    label: Optional[str] = None
+    unit: Optional[str] = None
+
+
+def parse_number(raw: str) -> Optional[float]:
+    try:
+        return float(raw.replace(",", ""))
+    except ValueError:
+        return None
+
+
+class FieldCandidates:
+    """
+    Candidates from one scan, grouped by kind in text order
+    """
+
+    def __init__(self, candidates: List[FieldCandidate]):
+        self.all = candidates
+        self.by_kind: Dict[str, List[FieldCandidate]] = {}
+        for candidate in candidates:
+            self.by_kind.setdefault(candidate.kind, []).append(candidate)
+
+    def of(self, *kinds: str) -> List[FieldCandidate]:
+        if len(kinds) == 1:
+            return self.by_kind.get(kinds[0], [])
+        return sorted((c for kind in kinds for c in self.by_kind.get(kind, [])), key=lambda c: c.start)
+
+    def first(self, kind: str, labels: Optional[tuple] = None) -> Optional[FieldCandidate]:
+        for candidate in self.by_kind.get(kind, []):
+            if labels is None or candidate.label in labels:
+                return candidate
+        return None
+
+
+def scan_fields(text: str) -> FieldCandidates:
+    """
+    One pass of FIELD_REGEX over the text
+    """
+    line_starts = [0]
+    newline = text.find("\n")
+    while newline != -1:
+        line_starts.append(newline + 1)
+        newline = text.find("\n", newline + 1)
+    candidates = []
+
+    for match in FIELD_REGEX.finditer(text):
+        kind = match.lastgroup
+        groups = _SUBGROUPS[kind]
+        raw = next(match.group(i) for i in groups["values"] if match.group(i) is not None)
+
+        value: Any = raw.strip()
+        if kind in AMOUNT_KINDS or kind == "weight":
+            value = parse_number(raw)
+            if value is None:
+                continue
+
+        label = next((match.group(i) for i in groups["labels"] if match.group(i) is not None), None)
+        unit = match.group(groups["unit"]) if groups["unit"] else None
+        line = bisect.bisect_right(line_starts, match.start()) - 1
+        candidates.append(FieldCandidate(
+            kind=kind,
+            value=value,
+            raw=raw,
+            start=match.start(),
+            end=match.end(),
+            line=line,
+            column=match.start() - line_starts[line],
+            label=" ".join(label.lower().split()) if label else None,
+            unit=unit.lower() if unit else None
+        ))
+
+    return FieldCandidates(candidates)
@@ -0,0 +1,117 @@
+"""
+Fleet Monitor - Progress and issue summary for every active trip in one vectorized pass
+Takes rows already loaded by set-based queries; no per-trip lookups
+"""
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+# Same thresholds the single-trip monitor uses for its issues and recommendations
+PROGRESS_DELAY_COMPLETION_PCT = 20
+SPEEDING_KMH = 80
+
+ISSUE_SEVERITY = {
+    "late_arrival": "high",
+    "progress_delay": "medium",
+    "off_route": "medium",
+    "speeding": "low",
+    "no_telemetry": "low"
+}
+_SEVERITY_RANK = {"low": 1, "medium": 2, "high": 3}
+
+
+def aggregate_expenses(trip_ids: List[str], expenses: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Total and count of expenses per trip, aligned with trip_ids
+    """
+    position = {trip_id: i for i, trip_id in enumerate(trip_ids)}
+    index = np.fromiter((position.get(str(e.get("trip_id")), -1) for e in expenses), dtype=np.int64, count=len(expenses))
+    amount = np.fromiter((float(e.get("amount") or 0) for e in expenses), dtype=np.float64, count=len(expenses))
+    known = index >= 0
+
+    return {
+        "total": np.bincount(index[known], weights=amount[known], minlength=len(trip_ids)),
+        "count": np.bincount(index[known], minlength=len(trip_ids))
+    }
+
+
+def summarize_fleet(
+    trips: List[Dict[str, Any]],
+    drivers: Dict[str, Dict[str, Any]],
+    expenses: List[Dict[str, Any]],
+    progress: Dict[str, Optional[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Per-trip compact summary (most severe first) plus fleet counters.
+
+    progress maps trip id -> tracker snapshot (None when the trip has no state yet).
+    """
+    n = len(trips)
+    trip_ids = [str(trip["id"]) for trip in trips]
+    snapshots = [progress.get(trip_id) or {} for trip_id in trip_ids]
+
+    def column(key: str, default: float = np.nan) -> np.ndarray:
+        return np.array([default if s.get(key) is None else s[key] for s in snapshots], dtype=np.float64)
+
+    has_telemetry = np.array([bool(s.get("has_telemetry")) for s in snapshots], dtype=bool)
+    completion = column("completion_percentage", 0.0)
+    speed = column("current_speed_kmh")
+    on_schedule = np.array([s.get("on_schedule") for s in snapshots], dtype=object)
+    off_route = np.array([bool(s.get("off_route")) for s in snapshots], dtype=bool)
+    in_progress = np.array([trip.get("status") == "in_progress" for trip in trips], dtype=bool)
+    freight = np.array([float(trip.get("freight_amount") or 0) for trip in trips], dtype=np.float64)
+
+    masks = {
+        "late_arrival": on_schedule == False,  # noqa: E712 - elementwise over an object array holding None
+        "progress_delay": has_telemetry & in_progress & (completion < PROGRESS_DELAY_COMPLETION_PCT),
+        "off_route": off_route,
+        "speeding": np.nan_to_num(speed, nan=0.0) > SPEEDING_KMH,
+        "no_telemetry": ~has_telemetry
+    }
+    issue_matrix = np.column_stack([masks[name] for name in ISSUE_SEVERITY]) if n else np.zeros((0, len(ISSUE_SEVERITY)), dtype=bool)
+    issue_names = np.array(list(ISSUE_SEVERITY))
+    ranks = np.array([_SEVERITY_RANK[ISSUE_SEVERITY[name]] for name in ISSUE_SEVERITY])
+    worst = (issue_matrix * ranks).max(axis=1) if n else np.zeros(0, dtype=int)
+    rank_names = {rank: name for name, rank in _SEVERITY_RANK.items()}
+
+    spend = aggregate_expenses(trip_ids, expenses)
+    expense_ratio = np.divide(spend["total"], freight, out=np.full(n, np.nan), where=freight > 0)
+
+    # Worst trips first so ops screens can show the top of the list
+    summaries = []
+    for i in np.argsort(-worst, kind="stable").tolist():
+        trip = trips[i]
+        driver = drivers.get(str(trip.get("driver_id"))) or {}
+        snapshot = snapshots[i]
+        summaries.append({
+            "trip_id": trip_ids[i],
+            "status": trip.get("status"),
+            "driver_id": trip.get("driver_id"),
+            "driver_name": driver.get("name"),
+            "vehicle_id": trip.get("vehicle_id") or driver.get("vehicle_id"),
+            "route": f"{trip.get('pickup_location')} -> {trip.get('delivery_location')}",
+            "completion_percentage": float(completion[i]),
+            "current_speed_kmh": None if np.isnan(speed[i]) else float(speed[i]),
+            "eta": snapshot.get("eta"),
+            "on_schedule": snapshot.get("on_schedule"),
+            "last_update": snapshot.get("last_update"),
+            "issues": issue_names[issue_matrix[i]].tolist(),
+            "severity": rank_names.get(int(worst[i])),
+            "total_expenses": round(float(spend["total"][i]), 2),
+            "expense_count": int(spend["count"][i]),
+            "expense_to_freight_ratio": None if np.isnan(expense_ratio[i]) else round(float(expense_ratio[i]), 3)
+        })
+
+    tracked = completion[has_telemetry]
+    return {
+        "trip_count": n,
+        "fleet": {
+            "with_telemetry": int(has_telemetry.sum()),
+            "on_schedule": int((on_schedule == True).sum()),  # noqa: E712
+            "average_completion_percentage": round(float(tracked.mean()), 1) if tracked.size else None,
+            "issues_by_type": {name: int(masks[name].sum()) for name in ISSUE_SEVERITY},
+            "trips_with_issues": int(issue_matrix.any(axis=1).sum()) if n else 0,
+            "total_expenses": round(float(spend["total"].sum()), 2)
+        },
+        "trips": summaries
+    }
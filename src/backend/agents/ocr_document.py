@@ -0,0 +1,153 @@
+"""
+OCR Document - One OCR pass over an image, shared by every extractor
+Holds the word tokens with bounding boxes, the text and its line splits, and memoized field results
+"""
+import functools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class OcrToken:
+    text: str
+    conf: float
+    left: int
+    top: int
+    width: int
+    height: int
+    line: int  # index into OcrDocument.lines
+
+
+@dataclass
+class OcrDocument:
+    """
+    Built once per image inside the OCR worker from a single ``image_to_data``
+    call; the plain text and lines are rebuilt from the tokens so there is no
+    second Tesseract pass. ``image`` / ``processed`` are only populated in the
+    worker and are dropped before the document crosses back to the API process.
+    """
+    tokens: List[OcrToken]
+    lines: List[str]
+    width: int = 0
+    height: int = 0
+    ocr_seconds: float = 0.0
+    dhash: Optional[int] = None  # 64-bit perceptual hash of the decoded image
+    sha256: Optional[str] = None  # of the uploaded bytes, set when loaded through the cache
+    from_cache: bool = False
+    # Preprocessing decisions and per-stage timings in ms (see agents.ocr_preprocess)
+    preprocess: Dict[str, Any] = field(default_factory=dict)
+    image: Any = None
+    processed: Any = None
+    _memo: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self.text = "\n".join(self.lines)
+        self.lower = self.text.lower()
+        self.lower_lines = [line.lower() for line in self.lines]
+
+    @classmethod
+    def from_tesseract_data(cls, data: Dict[str, List[Any]], width: int = 0, height: int = 0, **kwargs) -> "OcrDocument":
+        """
+        Build from Tesseract's column dict, as returned by pytesseract
+        ``image_to_data(..., output_type=Output.DICT)`` or agents.ocr_engines
+        """
+        tokens: List[OcrToken] = []
+        lines: List[str] = []
+        words: List[str] = []
+        current = None
+
+        for i, word in enumerate(data.get("text", [])):
+            word = (word or "").strip()
+            if not word:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            if key != current:
+                if words:
+                    lines.append(" ".join(words))
+                words, current = [], key
+            tokens.append(OcrToken(
+                text=word,
+                conf=float(data["conf"][i]),
+                left=int(data["left"][i]),
+                top=int(data["top"][i]),
+                width=int(data["width"][i]),
+                height=int(data["height"][i]),
+                line=len(lines)
+            ))
+            words.append(word)
+        if words:
+            lines.append(" ".join(words))
+
+        return cls(tokens=tokens, lines=lines, width=width, height=height, **kwargs)
+
+    @property
+    def mean_confidence(self) -> Optional[float]:
+        confident = [token.conf for token in self.tokens if token.conf >= 0]
+        return sum(confident) / len(confident) if confident else None
+
+    def memo(self, key: str, compute: Callable[["OcrDocument"], Any]) -> Any:
+        """
+        Compute a field once per document; later extractors asking for it reuse the result
+        """
+        if key not in self._memo:
+            self._memo[key] = compute(self)
+        return self._memo[key]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Compact JSON-ready form (tokens as positional lists) for the result cache
+        """
+        return {
+            "lines": self.lines,
+            "tokens": [
+                [t.text, t.conf, t.left, t.top, t.width, t.height, t.line]
+                for t in self.tokens
+            ],
+            "width": self.width,
+            "height": self.height,
+            "ocr_seconds": self.ocr_seconds,
+            "dhash": self.dhash,
+            "preprocess": self.preprocess
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], **kwargs) -> "OcrDocument":
+        return cls(
+            tokens=[OcrToken(*token) for token in data["tokens"]],
+            lines=data["lines"],
+            width=data.get("width", 0),
+            height=data.get("height", 0),
+            ocr_seconds=data.get("ocr_seconds", 0.0),
+            dhash=data.get("dhash"),
+            preprocess=data.get("preprocess", {}),
+            **kwargs
+        )
+
+    def detached(self) -> "OcrDocument":
+        """
+        Copy without the image arrays, cheap to send between processes
+        """
+        return OcrDocument(
+            tokens=self.tokens,
+            lines=self.lines,
+            width=self.width,
+            height=self.height,
+            ocr_seconds=self.ocr_seconds,
+            dhash=self.dhash,
+            sha256=self.sha256,
+            preprocess=self.preprocess
+        )
+
+
+def per_document(extractor):
+    """
+    Memoize an extractor method on the OcrDocument it reads, so a field asked for
+    by several extractors (amount, date, ...) is scanned for only once
+    """
+    key = extractor.__qualname__
+
+    @functools.wraps(extractor)
+    def wrapper(self, document: OcrDocument):
+        return document.memo(key, lambda doc: extractor(self, doc))
+
+    return wrapper
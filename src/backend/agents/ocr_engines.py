@@ -0,0 +1,183 @@
+"""
+OCR Engines - Tesseract backends used by the OCR worker processes
+A persistent in-process engine (tesserocr, language model loaded once per worker)
+with the pytesseract CLI wrapper as the fallback
+"""
+import os
+import shlex
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# auto | tesserocr | pytesseract
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto").lower()
+
+# Columns of Tesseract's TSV output, as returned by pytesseract.image_to_data(output_type=DICT)
+TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text"
+)
+_INT_COLUMNS = TSV_COLUMNS[:-2]
+
+
+def parse_tesseract_config(config: str) -> Tuple[str, Optional[int], Dict[str, str]]:
+    """
+    (lang, psm, variables) from a pytesseract-style config string, e.g. "-l eng --psm 6 -c key=value"
+    """
+    lang, psm, variables = "eng", None, {}
+    args = shlex.split(config or "")
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-l" and i + 1 < len(args):
+            lang = args[i + 1]
+            i += 1
+        elif arg == "--psm" and i + 1 < len(args):
+            psm = int(args[i + 1])
+            i += 1
+        elif arg == "-c" and i + 1 < len(args) and "=" in args[i + 1]:
+            key, value = args[i + 1].split("=", 1)
+            variables[key] = value
+            i += 1
+        i += 1
+    return lang, psm, variables
+
+
+def parse_tsv(tsv: str) -> Dict[str, List[Any]]:
+    """
+    Tesseract TSV text into the column dict shape pytesseract returns
+    """
+    data: Dict[str, List[Any]] = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split("\t")
+        if len(fields) < len(TSV_COLUMNS) - 1 or not fields[0].isdigit():
+            continue  # header row
+        if len(fields) == len(TSV_COLUMNS) - 1:
+            fields.append("")
+        for column, value in zip(_INT_COLUMNS, fields):
+            data[column].append(int(value))
+        data["conf"].append(float(fields[10]))
+        data["text"].append(fields[11])
+    return data
+
+
+class TesserocrEngine:
+    """
+    One TessBaseAPI per worker process and language: the model is loaded once and
+    each image is handed over in memory, with no subprocess or temp files
+    """
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._apis: Dict[str, Any] = {}
+
+    def image_to_data(self, image, config: str) -> Dict[str, List[Any]]:
+        import numpy as np
+
+        lang, psm, variables = parse_tesseract_config(config)
+        api = self._api(lang)
+        api.SetPageSegMode(self._tesserocr.PSM.SINGLE_BLOCK if psm is None else psm)
+        for key, value in variables.items():
+            api.SetVariable(key, value)
+
+        pixels = np.ascontiguousarray(image)
+        if pixels.ndim == 2:
+            height, width = pixels.shape
+            api.SetImageBytes(pixels.tobytes(), width, height, 1, width)
+        else:
+            from PIL import Image
+            api.SetImage(Image.fromarray(pixels))
+        try:
+            api.Recognize()
+            return parse_tsv(api.GetTSVText(0))
+        finally:
+            api.Clear()
+
+    def warm(self, config: str) -> None:
+        self._api(parse_tesseract_config(config)[0])
+
+    def _api(self, lang: str):
+        api = self._apis.get(lang)
+        if api is None:
+            # TESSDATA_PREFIX (if set) points at the trained data, as for the CLI
+            path = os.getenv("TESSDATA_PREFIX")
+            api = self._tesserocr.PyTessBaseAPI(path=path, lang=lang) if path else self._tesserocr.PyTessBaseAPI(lang=lang)
+            self._apis[lang] = api
+        return api
+
+
+class PytesseractEngine:
+    """
+    Runs the tesseract binary per image (process start-up and model load on every call)
+    """
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+
+        self._pytesseract = pytesseract
+
+    def image_to_data(self, image, config: str) -> Dict[str, List[Any]]:
+        return self._pytesseract.image_to_data(image, config=config, output_type=self._pytesseract.Output.DICT)
+
+    def warm(self, config: str) -> None:
+        pass
+
+
+ENGINES = {engine.name: engine for engine in (TesserocrEngine, PytesseractEngine)}
+
+_engine = None
+
+
+def available_engines() -> List[str]:
+    """Engines whose Python module is importable here (the binary / tessdata is checked on first use)"""
+    import importlib.util
+
+    return [name for name in ENGINES if importlib.util.find_spec(name) is not None]
+
+
+def resolve_engine_name(preferred: str = OCR_ENGINE) -> Optional[str]:
+    """
+    The engine this process would use: the configured one, or for "auto" the
+    first importable of tesserocr, pytesseract
+    """
+    available = available_engines()
+    if preferred in ENGINES:
+        return preferred
+    return available[0] if available else None
+
+
+def get_engine(config: str = "--psm 6"):
+    """
+    This process's engine, created on first use. An "auto" tesserocr engine that
+    fails to start (e.g. no trained data at the expected path) falls back to pytesseract.
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    name = resolve_engine_name()
+    if name is None:
+        raise ImportError("No OCR engine installed (pip install tesserocr or pytesseract)")
+    try:
+        engine = ENGINES[name]()
+        engine.warm(config)
+    except Exception as e:
+        if OCR_ENGINE != "auto" or name == PytesseractEngine.name:
+            raise
+        print(f"tesserocr engine unavailable ({e}), falling back to pytesseract")
+        engine = PytesseractEngine()
+    _engine = engine
+    return _engine
+
+
+def timed_image_to_data(image, config: str) -> Tuple[Dict[str, List[Any]], str, float]:
+    """
+    (data, engine name, milliseconds) for one OCR call
+    """
+    engine = get_engine(config)
+    started = time.perf_counter()
+    data = engine.image_to_data(image, config)
+    return data, engine.name, (time.perf_counter() - started) * 1000
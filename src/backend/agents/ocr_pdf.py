@@ -0,0 +1,46 @@
+"""
+OCR PDF - Lazy page access for multi-page PDF documents (freight bills)
+Pages are rasterized one at a time inside the OCR workers, so a worker never
+holds more than the page it is reading
+"""
+from typing import Any
+
+PDF_MAGIC = b"%PDF-"
+
+
+def is_pdf(data: bytes) -> bool:
+    # The header may follow a few bytes of junk (allowed within the first 1 KB)
+    return PDF_MAGIC in data[:1024]
+
+
+def page_count(path: str) -> int:
+    """
+    Number of pages; only the cross-reference table is read, no page is rendered
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def render_page(path: str, index: int, dpi: int = 300) -> Any:
+    """
+    One page as a grayscale PIL image at the given resolution (tagged with it,
+    so preprocessing does not resample it again)
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[index]
+        try:
+            image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+    image.info["dpi"] = (dpi, dpi)
+    return image
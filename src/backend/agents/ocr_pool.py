@@ -0,0 +1,316 @@
+"""
+OCR Pool - Run image preprocessing and Tesseract in worker processes
+Keeps CPU-heavy OCR off the API event loop, with a bounded backlog that rejects work when full
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Any
+
+# Add parent directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from agents.ocr_document import OcrDocument
+from agents.ocr_preprocess import PreprocessConfig, preprocess_image_for_ocr
+from agents.ocr_engines import get_engine, resolve_engine_name, timed_image_to_data
+from agents.ocr_pdf import render_page
+from agents.ocr_regions import (
+    BOTTOM_LINES, HEADER_LINES, MAX_ROI_FRACTION, has_labelled_total, line_crops, merge_region_data, next_lines,
+    text_line_bands
+)
+
+DEFAULT_TESSERACT_CONFIG = "--psm 6"
+
+# Bump whenever preprocessing or token handling changes what OCR returns for an image;
+# cached results from other versions are then ignored
+OCR_PIPELINE_VERSION = "3"
+
+# Read from the environment in the API process and again in each spawned worker
+PREPROCESS_CONFIG = PreprocessConfig.from_env()
+
+# "full" OCRs the whole page; "amount" OCRs only the lines around the total and
+# the bill number (the amount-only path, see agents.ocr_regions)
+OCR_MODES = ("full", "amount")
+
+
+def pipeline_version(config: str = DEFAULT_TESSERACT_CONFIG, mode: str = "full") -> str:
+    version = f"{OCR_PIPELINE_VERSION}|{resolve_engine_name()}|{config}|{PREPROCESS_CONFIG.version()}"
+    return version if mode == "full" else f"{version}|{mode}"
+
+
+class OcrQueueFull(Exception):
+    """Raised when the OCR backlog is at capacity; callers should retry later (HTTP 429)"""
+
+    def __init__(self, pending: int, retry_after_seconds: int):
+        super().__init__(f"OCR queue is full ({pending} jobs pending)")
+        self.pending = pending
+        self.retry_after_seconds = retry_after_seconds
+
+
+def dhash_image(image, hash_size: int = 8) -> int:
+    """
+    Difference hash: downscale to (hash_size + 1) x hash_size grayscale and set one
+    bit per horizontally adjacent pixel pair that gets brighter. Robust to rescaling,
+    recompression and small lighting changes between two photos of one receipt.
+    """
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    small = ImageOps.exif_transpose(image).convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def ocr_amount_regions(processed, config: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    OCR the header and bottom lines of the preprocessed page, then more lines
+    bottom-up only while no labelled total has been read, reading all the rest
+    at once before the crops would cover half the page
+    """
+    timings = profile["timings_ms"]
+    stage_started = time.perf_counter()
+    height = processed.shape[0]
+    lines = text_line_bands(processed)
+    timings["layout"] = round((time.perf_counter() - stage_started) * 1000, 2)
+
+    ocr_ms = 0.0
+    if len(lines) <= HEADER_LINES + BOTTOM_LINES:
+        # Short page: reading it whole is as cheap as reading it in pieces
+        data, profile["engine"], ocr_ms = timed_image_to_data(processed, config)
+        read = list(range(len(lines)))
+    else:
+        regions = []
+        read: List[int] = []
+        batch = list(range(HEADER_LINES)) + list(range(len(lines) - BOTTOM_LINES, len(lines)))
+        while batch:
+            for top, bottom in line_crops(lines, batch, height):
+                region, profile["engine"], crop_ms = timed_image_to_data(processed[top:bottom], config)
+                regions.append(((top, bottom), region))
+                ocr_ms += crop_ms
+            read += batch
+            data = merge_region_data(regions)
+            if has_labelled_total(OcrDocument.from_tesseract_data(data).text):
+                break
+            batch = next_lines(len(lines), read, BOTTOM_LINES)
+            if batch and len(read) + len(batch) > len(lines) * MAX_ROI_FRACTION:
+                # No total near the bottom (or none at all): read all the rest at once,
+                # as one crop of the unread middle, so the cost stays about one full pass
+                batch = next_lines(len(lines), read, len(lines))
+
+    profile["roi_lines"] = [len(read), len(lines)]
+    timings["tesseract"] = round(ocr_ms, 2)
+    return data
+
+
+def ocr_image_bytes(image_data: bytes, config: str = DEFAULT_TESSERACT_CONFIG, mode: str = "full") -> OcrDocument:
+    """
+    Decode, preprocess and OCR one image (runs inside a worker process)
+    """
+    import io
+    from PIL import Image
+
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(image_data))
+    image.load()
+    return ocr_image(image, config, mode, started)
+
+
+def ocr_pdf_page(pdf_path: str, page_index: int, config: str = DEFAULT_TESSERACT_CONFIG, mode: str = "full") -> OcrDocument:
+    """
+    Rasterize one PDF page at the OCR resolution and OCR it (runs inside a worker process)
+    """
+    started = time.perf_counter()
+    image = render_page(pdf_path, page_index, PREPROCESS_CONFIG.target_dpi)
+    return ocr_image(image, config, mode, started)
+
+
+def ocr_image(image, config: str, mode: str, started: float) -> OcrDocument:
+    """
+    Preprocess and OCR a decoded image; `started` is when decoding began
+    """
+    decoded = time.perf_counter()
+    processed, profile = preprocess_image_for_ocr(image, PREPROCESS_CONFIG)
+    timings = profile["timings_ms"]
+    timings["decode"] = round((decoded - started) * 1000, 2)
+
+    profile["mode"] = mode
+    if mode == "amount":
+        data = ocr_amount_regions(processed, config, profile)
+    else:
+        data, profile["engine"], ocr_ms = timed_image_to_data(processed, config)
+        timings["tesseract"] = round(ocr_ms, 2)
+
+    stage_started = time.perf_counter()
+    dhash = dhash_image(image)
+    timings["dhash"] = round((time.perf_counter() - stage_started) * 1000, 2)
+
+    document = OcrDocument.from_tesseract_data(
+        data, width=image.width, height=image.height, image=image, processed=processed,
+        dhash=dhash, preprocess=profile
+    )
+    document.ocr_seconds = time.perf_counter() - started
+    return document.detached()
+
+
+def _warm_worker() -> None:
+    # Pay the cv2 import and the OCR engine start-up (tesserocr loads the language
+    # model here) once per worker instead of on the first job; a failure is left to
+    # fail the job itself rather than break the pool
+    try:
+        import cv2  # noqa: F401
+        get_engine(DEFAULT_TESSERACT_CONFIG)
+    except Exception:
+        pass
+
+
+class OcrWorkerPool:
+    """
+    A process pool with an explicit bound on in-flight jobs (queued + running).
+
+    ``submit`` never blocks: when ``max_pending`` jobs are already in flight it
+    raises OcrQueueFull so the API can answer 429 instead of piling up uploads.
+    Workers are spawned lazily on the first job and replaced if the pool breaks
+    (e.g. a worker killed by the OOM killer).
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._avg_seconds: Optional[float] = None
+        self._avg_stage_ms: Dict[str, float] = {}
+        self._engine_calls: Dict[str, Dict[str, float]] = {}
+
+    async def run(self, image_data: bytes, config: str = DEFAULT_TESSERACT_CONFIG, mode: str = "full") -> OcrDocument:
+        """
+        OCR an image in a worker process
+        """
+        return await asyncio.wrap_future(self.submit(image_data, config, mode))
+
+    async def run_pdf_page(self, pdf_path: str, page_index: int, config: str = DEFAULT_TESSERACT_CONFIG,
+                           mode: str = "full") -> OcrDocument:
+        """
+        Rasterize and OCR one page of a PDF file in a worker process
+        """
+        return await asyncio.wrap_future(self._submit(ocr_pdf_page, pdf_path, page_index, config, mode))
+
+    def submit(self, image_data: bytes, config: str = DEFAULT_TESSERACT_CONFIG, mode: str = "full"):
+        return self._submit(ocr_image_bytes, image_data, config, mode)
+
+    def _submit(self, job, *args):
+        mode = args[-1]
+        if mode not in OCR_MODES:
+            raise ValueError(f"Unknown OCR mode: {mode}")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise OcrQueueFull(self._pending, self._retry_after())
+            self._pending += 1
+            executor = self._ensure_executor()
+
+        try:
+            future = executor.submit(job, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                self._pending -= 1
+                self._executor = None
+            raise
+        future.add_done_callback(self._job_done)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_job_seconds": round(self._avg_seconds, 3) if self._avg_seconds is not None else None,
+                "avg_stage_ms": {stage: round(ms, 2) for stage, ms in self._avg_stage_ms.items()},
+                "preprocess": PREPROCESS_CONFIG.version(),
+                "engine": resolve_engine_name(),
+                "engine_calls": {
+                    name: {"calls": int(calls["calls"]), "avg_ms": round(calls["avg_ms"], 2)}
+                    for name, calls in self._engine_calls.items()
+                },
+                "started": self._executor is not None
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a threaded API process can deadlock children on inherited locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker
+            )
+        return self._executor
+
+    def _job_done(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                self._completed += 1
+                document = future.result()
+                seconds = document.ocr_seconds
+                self._avg_seconds = seconds if self._avg_seconds is None else 0.2 * seconds + 0.8 * self._avg_seconds
+                timings = document.preprocess.get("timings_ms", {})
+                for stage, ms in timings.items():
+                    previous = self._avg_stage_ms.get(stage)
+                    self._avg_stage_ms[stage] = ms if previous is None else 0.2 * ms + 0.8 * previous
+                engine = document.preprocess.get("engine")
+                if engine and "tesseract" in timings:
+                    calls = self._engine_calls.setdefault(engine, {"calls": 0, "avg_ms": timings["tesseract"]})
+                    calls["calls"] += 1
+                    calls["avg_ms"] = 0.2 * timings["tesseract"] + 0.8 * calls["avg_ms"]
+            else:
+                self._failed += 1
+                if isinstance(error, BrokenProcessPool):
+                    self._executor = None
+
+    def _retry_after(self) -> int:
+        per_job = self._avg_seconds or 2.0
+        return max(1, math.ceil(self._pending / self.workers * per_job))
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+_default_workers = _env_int("OCR_WORKERS", min(2, os.cpu_count() or 1))
+
+# Shared pool used by the document digitizer
+ocr_pool = OcrWorkerPool(
+    workers=_default_workers,
+    max_pending=_env_int("OCR_MAX_PENDING", _default_workers * 4)
+)
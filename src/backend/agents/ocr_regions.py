@@ -0,0 +1,107 @@
+"""
+OCR Regions - Read only the lines that matter on the amount-only path
+Text lines are found on the binarized page from its ink profile (no OCR), the
+header and bottom lines are OCRed at full resolution, and more lines are read
+bottom-up only until a labelled total has been seen (or, past half the page,
+all the rest is read at once)
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.field_extraction import scan_fields
+
+# Lines read first: the header (bill / invoice number, date) and the bottom of
+# the page (totals, tax); further lines are added this many at a time, bottom-up
+HEADER_LINES = 6
+BOTTOM_LINES = 8
+
+# Once the crops read would pass this share of the page's lines without a labelled
+# total, the rest of the page is read at once instead (cheaper than more small crops)
+MAX_ROI_FRACTION = 0.5
+
+# Ink rows shorter than this (at 300 DPI) are specks, not text lines
+MIN_LINE_HEIGHT = 8
+
+Band = Tuple[int, int]
+
+
+def text_line_bands(binary: np.ndarray, min_height: int = MIN_LINE_HEIGHT) -> List[Band]:
+    """
+    (top, bottom) row ranges of the text lines of a deskewed, binarized page
+    (dark text on white), from its horizontal ink profile
+    """
+    ink_per_row = np.count_nonzero(binary < 128, axis=1)
+    # A row is text when it has more ink than scattered noise does
+    has_ink = ink_per_row > max(2, binary.shape[1] // 200)
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], has_ink.astype(np.int8), [0]))))
+    bands = [(int(top), int(bottom)) for top, bottom in zip(edges[::2], edges[1::2])]
+
+    # Rejoin a line split by a thin gap (e.g. between accents or underlines and the text)
+    merged: List[Band] = []
+    for top, bottom in bands:
+        if merged and top - merged[-1][1] <= 2:
+            merged[-1] = (merged[-1][0], bottom)
+        else:
+            merged.append((top, bottom))
+    return [band for band in merged if band[1] - band[0] >= min_height]
+
+
+def line_crops(lines: List[Band], indices: List[int], height: int) -> List[Band]:
+    """
+    Crops for the chosen lines, consecutive lines sharing one crop, padded
+    halfway into the gaps around them
+    """
+    crops: List[Band] = []
+    for index in sorted(indices):
+        top, bottom = lines[index]
+        above = lines[index - 1][1] if index > 0 else 0
+        below = lines[index + 1][0] if index + 1 < len(lines) else height
+        top, bottom = (top + above) // 2, (bottom + below + 1) // 2
+        if crops and crops[-1][2] == index - 1:
+            crops[-1] = (crops[-1][0], bottom, index)
+        else:
+            crops.append((top, bottom, index))
+    return [(top, bottom) for top, bottom, _ in crops]
+
+
+def has_labelled_total(text: str) -> bool:
+    """
+    Whether the text read so far has a labelled total (the bill number, if the
+    receipt has one, is expected in the header, which is always read first)
+    """
+    return any(
+        "total" in candidate.label or candidate.label.startswith("net")
+        for candidate in scan_fields(text).of("amount_labeled")
+    )
+
+
+def merge_region_data(regions: List[Tuple[Band, Dict[str, List[Any]]]]) -> Dict[str, List[Any]]:
+    """
+    One image_to_data dict for the page from per-crop results, in page order,
+    with word boxes moved back to page coordinates
+    """
+    columns = ("block_num", "par_num", "line_num", "left", "top", "width", "height", "conf", "text")
+    merged: Dict[str, List[Any]] = {column: [] for column in columns}
+
+    for index, ((top, _), data) in enumerate(sorted(regions, key=lambda region: region[0][0]), start=1):
+        for i in range(len(data.get("text", []))):
+            for column in columns:
+                value = data[column][i]
+                if column == "top":
+                    value += top
+                elif column == "block_num":
+                    # Crops are numbered apart so lines from two crops never merge
+                    value += 10000 * index
+                merged[column].append(value)
+    return merged
+
+
+def next_lines(total_lines: int, read: List[int], count: int) -> Optional[List[int]]:
+    """
+    The next `count` unread lines, bottom-up
+    """
+    done = set(read)
+    unread = [index for index in range(total_lines - 1, -1, -1) if index not in done]
+    return unread[:count] or None
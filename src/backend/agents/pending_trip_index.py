@@ -0,0 +1,268 @@
+"""
+Pending Trip Index - In-memory spatial index of unassigned trips
+Lets the availability agent suggest a trip to a newly free driver without querying the database
+"""
+import heapq
+import itertools
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+import os
+import sys
+
+# Add parent directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+try:
+    from agents.route_optimization import CITY_COORDINATES
+except ImportError:
+    CITY_COORDINATES = {}
+
+# Buckets are searched in this order, so a close high-priority trip always wins
+PRIORITY_BUCKETS = ("high", "medium", "low")
+
+# Same weights as AvailabilityAgent._calculate_trip_suitability_score
+BASE_SCORE = 0.3
+LOCATION_MATCH_SCORE = 0.5
+HIGH_PRIORITY_SCORE = 0.2
+
+
+class PendingTripIndex:
+    """
+    Pending trips bucketed by pickup grid cell and priority.
+
+    Each (cell, priority) pair holds a min-heap ordered by creation time, so the
+    oldest trip in a bucket is always at the top. Removals are lazy: the trip is
+    dropped from ``_entries`` and stale heap items are discarded when they surface,
+    or all at once when a heap holds more stale items than live ones (so a bucket
+    no driver looks at cannot grow without bound). A lookup peeks at most 9 cells
+    x 3 buckets, and every push/pop is O(log n) amortized.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.5):
+        self.cell_size_deg = cell_size_deg  # ~55 km at Indian latitudes
+        self.loaded = False
+
+        self._trips: Dict[str, Dict[str, Any]] = {}
+        self._entries: Dict[str, Tuple[Optional[Tuple[int, int]], str, int]] = {}
+        self._grid: Dict[Tuple[int, int], Dict[str, List[Tuple[float, int, str]]]] = {}
+        self._stale: Dict[Tuple[Tuple[int, int], str], int] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def load(self, trips: List[Dict[str, Any]]) -> None:
+        """
+        Replace the index contents with a full list of trips (e.g. on startup)
+        """
+        with self._lock:
+            self._trips.clear()
+            self._entries.clear()
+            self._grid.clear()
+            self._stale.clear()
+
+            for trip in trips:
+                if self._is_pending(trip):
+                    self._insert(trip, push=False)
+
+            for buckets in self._grid.values():
+                for heap in buckets.values():
+                    heapq.heapify(heap)
+
+            self.loaded = True
+
+    def upsert(self, trip: Dict[str, Any]) -> None:
+        """
+        Keep the index in sync with a created or updated trip row.
+        Pending trips are (re)indexed, anything else is removed.
+        """
+        if not trip or trip.get("id") is None:
+            return
+
+        with self._lock:
+            self._discard(str(trip["id"]))
+            if self._is_pending(trip):
+                self._insert(trip, push=True)
+
+    def remove(self, trip_id: Any) -> None:
+        """
+        Drop a trip that was assigned, cancelled or deleted
+        """
+        with self._lock:
+            self._discard(str(trip_id))
+
+    def best_trip_for_driver(self, driver: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Return the most suitable pending trip near the driver, or None.
+
+        Only trips in the driver's cell or its eight neighbours count as close;
+        anything further away cannot clear the suggestion threshold anyway.
+        """
+        point = resolve_point(
+            driver.get("current_location_lat"),
+            driver.get("current_location_lng"),
+            driver.get("current_location")
+        )
+        if point is None:
+            return None
+
+        driver_cell = self._cell_for(point)
+
+        with self._lock:
+            for priority in PRIORITY_BUCKETS:
+                best_entry = None
+
+                for cell in self._neighbour_cells(driver_cell):
+                    heap = self._grid.get(cell, {}).get(priority)
+                    top = self._peek(cell, priority, heap) if heap else None
+                    if top is not None and (best_entry is None or top < best_entry):
+                        best_entry = top
+
+                if best_entry is not None:
+                    trip = dict(self._trips[best_entry[2]])
+                    score = BASE_SCORE + LOCATION_MATCH_SCORE
+                    if priority == "high":
+                        score += HIGH_PRIORITY_SCORE
+                    trip["suitability_score"] = min(1.0, score)
+                    return trip
+
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summary of the index contents for health/debug endpoints
+        """
+        with self._lock:
+            by_priority = {priority: 0 for priority in PRIORITY_BUCKETS}
+            cells = set()
+            unlocated = 0
+            for cell, priority, _ in self._entries.values():
+                by_priority[priority] += 1
+                if cell is None:
+                    unlocated += 1
+                else:
+                    cells.add(cell)
+
+            return {
+                "pending_trips": len(self._entries),
+                "by_priority": by_priority,
+                "unlocated_trips": unlocated,
+                "occupied_cells": len(cells),
+                "loaded": self.loaded
+            }
+
+    def _insert(self, trip: Dict[str, Any], push: bool) -> None:
+        trip_id = str(trip["id"])
+        priority = self._priority_for(trip)
+        point = resolve_point(trip.get("pickup_lat"), trip.get("pickup_lng"), trip.get("pickup_location"))
+        cell = self._cell_for(point) if point is not None else None
+        sequence = next(self._sequence)
+
+        self._trips[trip_id] = trip
+        self._entries[trip_id] = (cell, priority, sequence)
+
+        # Trips without a resolvable pickup point can never be "close" to a
+        # driver, so they are tracked but kept out of the grid.
+        if cell is None:
+            return
+
+        heap = self._grid.setdefault(cell, {}).setdefault(priority, [])
+        item = (self._created_ts(trip), sequence, trip_id)
+        if push:
+            heapq.heappush(heap, item)
+        else:
+            heap.append(item)
+
+    def _discard(self, trip_id: str) -> None:
+        entry = self._entries.pop(trip_id, None)
+        self._trips.pop(trip_id, None)
+        if entry is None or entry[0] is None:
+            return
+
+        cell, priority, _ = entry
+        key = (cell, priority)
+        stale = self._stale.get(key, 0) + 1
+        heap = self._grid[cell][priority]
+        if stale > len(heap) - stale:
+            self._compact(cell, priority)
+        else:
+            self._stale[key] = stale
+
+    def _compact(self, cell: Tuple[int, int], priority: str) -> None:
+        """
+        Rebuild one heap from its live items; O(n), paid for by the stale items it drops
+        """
+        self._stale.pop((cell, priority), None)
+        buckets = self._grid[cell]
+        heap = [item for item in buckets[priority] if self._is_live(item)]
+        if heap:
+            heapq.heapify(heap)
+            buckets[priority] = heap
+        else:
+            del buckets[priority]
+            if not buckets:
+                del self._grid[cell]
+
+    def _is_live(self, item: Tuple[float, int, str]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry[2] == item[1]
+
+    def _peek(self, cell: Tuple[int, int], priority: str,
+              heap: List[Tuple[float, int, str]]) -> Optional[Tuple[float, int, str]]:
+        while heap:
+            if self._is_live(heap[0]):
+                return heap[0]
+            heapq.heappop(heap)  # stale: trip removed or re-indexed since
+            self._stale[(cell, priority)] = self._stale.get((cell, priority), 1) - 1
+        return None
+
+    def _cell_for(self, point: Tuple[float, float]) -> Tuple[int, int]:
+        lat, lng = point
+        return (int(lat // self.cell_size_deg), int(lng // self.cell_size_deg))
+
+    def _neighbour_cells(self, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        row, col = cell
+        return [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+    def _is_pending(self, trip: Dict[str, Any]) -> bool:
+        return trip.get("status") == "pending" and not trip.get("driver_id")
+
+    def _priority_for(self, trip: Dict[str, Any]) -> str:
+        priority = str(trip.get("priority") or "medium").lower()
+        return priority if priority in PRIORITY_BUCKETS else "medium"
+
+    def _created_ts(self, trip: Dict[str, Any]) -> float:
+        created_at = trip.get("created_at")
+        if isinstance(created_at, datetime):
+            return created_at.timestamp()
+        if created_at:
+            try:
+                return datetime.fromisoformat(str(created_at).replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                pass
+        return datetime.utcnow().timestamp()
+
+
+def resolve_point(lat: Any, lng: Any, location: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """
+    Resolve coordinates from explicit lat/lng, falling back to a known city name in the text
+    """
+    try:
+        if lat is not None and lng is not None and (float(lat) != 0 or float(lng) != 0):
+            return (float(lat), float(lng))
+    except (TypeError, ValueError):
+        pass
+
+    if location:
+        location_lower = location.lower()
+        for city, coords in CITY_COORDINATES.items():
+            if city in location_lower:
+                return (coords["lat"], coords["lng"])
+
+    return None
+
+
+# Shared instance used by the agents and the trip routes
+pending_trip_index = PendingTripIndex()
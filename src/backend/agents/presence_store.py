@@ -0,0 +1,222 @@
+"""
+Presence Store - Authoritative in-memory driver availability with write-behind persistence
+WhatsApp FREE/BUSY/LOCATION updates land here in O(1) and are flushed to the drivers table in batches
+"""
+import asyncio
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+# Columns owned by the presence store; everything else on the driver row is read-only here
+PRESENCE_FIELDS = ("is_available", "current_location", "last_seen")
+
+
+class PresenceStore:
+    """
+    Map of driver_id -> driver row, with presence fields kept current in memory.
+
+    Writes only mark the driver dirty; a background task writes all dirty drivers
+    every ``flush_interval_seconds``. Several updates from the same driver between
+    flushes are coalesced into a single update.
+    """
+
+    def __init__(self, flush_interval_seconds: float = 5.0):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.loaded = False
+
+        self._drivers: Dict[str, Dict[str, Any]] = {}
+        self._phone_index: Dict[str, str] = {}
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._client_factory: Optional[Callable[[], Any]] = None
+
+    def load(self, supabase) -> int:
+        """
+        (Re)load all drivers from the database; used on startup and after a restart
+        """
+        result = supabase.table("drivers").select("*").execute()
+        rows = result.data or []
+
+        with self._lock:
+            pending = self._dirty  # keep unflushed updates on top of the reloaded rows
+            self._drivers = {}
+            self._phone_index = {}
+            for row in rows:
+                driver_id = str(row["id"])
+                row.update(pending.get(driver_id, {}))
+                self._drivers[driver_id] = row
+                if row.get("phone"):
+                    self._phone_index[row["phone"]] = driver_id
+            self.loaded = True
+
+        return len(rows)
+
+    def ensure_loaded(self, supabase) -> None:
+        """
+        Lazily load on first use and make sure queued writes have a flusher
+        """
+        if not self.loaded:
+            self.load(supabase)
+        # A task left behind by a short-lived loop (e.g. a worker thread) is done; restart it
+        if self._flush_task is None or self._flush_task.done():
+            self._start_flusher(lambda: supabase)
+
+    def track(self, row: Dict[str, Any], saved_fields: Iterable[str] = ()) -> None:
+        """
+        Add or refresh a driver row (e.g. after the driver is created or edited).
+        `saved_fields` were just written explicitly: they supersede unflushed
+        presence updates, which are dropped instead of being re-applied and flushed.
+        """
+        driver_id = str(row["id"])
+        with self._lock:
+            pending = self._dirty.get(driver_id)
+            if pending is not None:
+                for field in saved_fields:
+                    pending.pop(field, None)
+                if not pending:
+                    del self._dirty[driver_id]
+            driver = {**row, **self._dirty.get(driver_id, {})}
+            self._drivers[driver_id] = driver
+            if driver.get("phone"):
+                self._phone_index[driver["phone"]] = driver_id
+
+    def forget(self, driver_id: Any) -> None:
+        driver_id = str(driver_id)
+        with self._lock:
+            driver = self._drivers.pop(driver_id, None)
+            self._dirty.pop(driver_id, None)
+            if driver and self._phone_index.get(driver.get("phone")) == driver_id:
+                del self._phone_index[driver["phone"]]
+
+    def get_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        driver_id = self._phone_index.get(phone_number)
+        return self.get(driver_id) if driver_id else None
+
+    def get(self, driver_id: Any) -> Optional[Dict[str, Any]]:
+        driver = self._drivers.get(str(driver_id))
+        return dict(driver) if driver else None
+
+    def set_presence(
+        self,
+        driver_id: Any,
+        is_available: Optional[bool] = None,
+        location: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Update a driver's presence in memory and queue it for the next flush
+        """
+        driver_id = str(driver_id)
+        changes: Dict[str, Any] = {"last_seen": datetime.utcnow().isoformat()}
+        if is_available is not None:
+            changes["is_available"] = is_available
+        if location:
+            changes["current_location"] = location
+
+        with self._lock:
+            driver = self._drivers.get(driver_id)
+            if driver is None:
+                return None
+            driver.update(changes)
+            self._dirty.setdefault(driver_id, {}).update(changes)
+            return dict(driver)
+
+    def available_drivers(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(driver) for driver in self._drivers.values() if driver.get("is_available")]
+
+    def driver_ids(self, is_available: Optional[bool] = None) -> List[str]:
+        with self._lock:
+            return [
+                driver_id for driver_id, driver in self._drivers.items()
+                if is_available is None or bool(driver.get("is_available")) == is_available
+            ]
+
+    def overlay(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Patch presence fields from memory onto rows fetched from the database
+        """
+        for row in rows:
+            driver = self._drivers.get(str(row.get("id")))
+            if driver:
+                for field in PRESENCE_FIELDS:
+                    if field in driver:
+                        row[field] = driver[field]
+        return rows
+
+    def flush(self, supabase) -> int:
+        """
+        Write all dirty presence fields, one update per driver; failed drivers are re-queued.
+
+        Updates rather than an upsert: an upsert of partial rows would be checked
+        against the NOT NULL columns (name, phone) before ON CONFLICT resolves, and
+        rows with different key sets would null out each other's missing columns.
+        """
+        with self._lock:
+            batch, self._dirty = self._dirty, {}
+
+        failed: Dict[str, Dict[str, Any]] = {}
+        error: Optional[Exception] = None
+        for driver_id, changes in batch.items():
+            try:
+                supabase.table("drivers").update(changes).eq("id", driver_id).execute()
+            except Exception as e:
+                failed[driver_id] = changes
+                error = e
+
+        if failed:
+            with self._lock:
+                for driver_id, changes in failed.items():
+                    # Newer in-memory changes win over the failed write
+                    self._dirty[driver_id] = {**changes, **self._dirty.get(driver_id, {})}
+            raise error
+
+        return len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "drivers": len(self._drivers),
+            "available": sum(1 for driver in self._drivers.values() if driver.get("is_available")),
+            "pending_writes": len(self._dirty),
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "loaded": self.loaded
+        }
+
+    def start(self, client_factory: Callable[[], Any]) -> None:
+        """
+        Load drivers and start the periodic flush task (call from the app startup hook)
+        """
+        self._start_flusher(client_factory)
+        self.ensure_loaded(client_factory())
+
+    async def stop(self) -> None:
+        """
+        Cancel the flush task and write out anything still pending
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._client_factory is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush, self._client_factory())
+
+    def _start_flusher(self, client_factory: Callable[[], Any]) -> None:
+        self._client_factory = client_factory
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no event loop yet; the startup hook or the next async caller starts it
+        self._flush_task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                # Supabase calls are blocking, keep them off the event loop
+                await loop.run_in_executor(None, self.flush, self._client_factory())
+            except Exception as e:
+                print(f"Presence flush failed, will retry: {e}")
+
+
+# Shared instance used by the availability agent, WhatsApp handlers and driver routes
+presence_store = PresenceStore()
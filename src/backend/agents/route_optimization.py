@@ -25,6 +25,20 @@ class RouteSegment:
     fuel_cost: float
     toll_cost: float = 0.0
 
+# Simplified city coordinates for demonstration (also used by the pending-trip index)
+CITY_COORDINATES = {
+    "mumbai": {"lat": 19.0760, "lng": 72.8777},
+    "delhi": {"lat": 28.7041, "lng": 77.1025},
+    "bangalore": {"lat": 12.9716, "lng": 77.5946},
+    "chennai": {"lat": 13.0827, "lng": 80.2707},
+    "kolkata": {"lat": 22.5726, "lng": 88.3639},
+    "pune": {"lat": 18.5204, "lng": 73.8567},
+    "hyderabad": {"lat": 17.3850, "lng": 78.4867},
+    "ahmedabad": {"lat": 23.0225, "lng": 72.5714},
+    "jaipur": {"lat": 26.9124, "lng": 75.7873},
+    "surat": {"lat": 21.1702, "lng": 72.8311}
+}
+
 class RouteOptimizationAgent:
     def __init__(self):
         self.name = "Route Optimization Agent"
@@ -36,18 +50,7 @@ class RouteOptimizationAgent:
         self.driver_hourly_rate = 150.0    # INR per hour
         
         # Simplified city coordinates for demonstration
-        self.city_coordinates = {
-            "mumbai": {"lat": 19.0760, "lng": 72.8777},
-            "delhi": {"lat": 28.7041, "lng": 77.1025},
-            "bangalore": {"lat": 12.9716, "lng": 77.5946},
-            "chennai": {"lat": 13.0827, "lng": 80.2707},
-            "kolkata": {"lat": 22.5726, "lng": 88.3639},
-            "pune": {"lat": 18.5204, "lng": 73.8567},
-            "hyderabad": {"lat": 17.3850, "lng": 78.4867},
-            "ahmedabad": {"lat": 23.0225, "lng": 72.5714},
-            "jaipur": {"lat": 26.9124, "lng": 75.7873},
-            "surat": {"lat": 21.1702, "lng": 72.8311}
-        }
+        self.city_coordinates = CITY_COORDINATES
     
     async def optimize_single_route(
         self, 
@@ -0,0 +1,324 @@
+"""
+Schedule Optimizer - Revenue-maximising driver schedules via weighted interval scheduling
+Fits pending trips around a driver's committed trips, charging empty (deadhead) legs between them
+"""
+import heapq
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
+import os
+import sys
+
+# Add parent directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+try:
+    from agents.pending_trip_index import resolve_point
+except ImportError:
+    resolve_point = None
+
+# Same highway speed the route agent uses for loaded legs
+LOADED_SPEED_KMH = 60.0
+# Road distance is longer than the great-circle distance between two cities
+ROAD_FACTOR = 1.2
+# Used when either end of a deadhead leg cannot be located (matches RouteOptimizationAgent)
+UNKNOWN_DEADHEAD_KM = 100.0
+# Committed trips outweigh any revenue, so the DP only drops one when two commitments collide
+COMMITTED_BONUS = 1e9
+
+Point = Tuple[float, float]
+
+
+@dataclass
+class ScheduleItem:
+    trip: Dict[str, Any]
+    trip_id: str
+    start: datetime
+    end: datetime
+    revenue: float
+    origin: Optional[Point]
+    destination: Optional[Point]
+    committed: bool
+
+
+@dataclass
+class _Stop:
+    point: Optional[Point]
+    ready_at: datetime
+    location: Optional[str]
+
+
+class _LocationStops:
+    """
+    Finished schedules ending at one drop-off location, in the order their driver
+    becomes free, with a running best so "best schedule free by time t" is one bisect
+    """
+
+    def __init__(self, stop: _Stop):
+        self.stop = stop
+        self.ready: List[datetime] = []
+        self.running_best: List[Tuple[float, int]] = []
+
+    def append(self, ready_at: datetime, value: float, index: int) -> None:
+        self.ready.append(ready_at)
+        if self.running_best and self.running_best[-1][0] >= value:
+            self.running_best.append(self.running_best[-1])
+        else:
+            self.running_best.append((value, index))
+
+    def best_ready_by(self, when: datetime) -> Optional[Tuple[float, int]]:
+        position = bisect_right(self.ready, when)
+        return self.running_best[position - 1] if position else None
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """
+    ISO string / datetime -> naive UTC datetime
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    lat1, lng1 = map(math.radians, a)
+    lat2, lng2 = map(math.radians, b)
+    h = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * 6371 * math.asin(math.sqrt(h))
+
+
+class ScheduleOptimizer:
+    """
+    Weighted interval scheduling with deadhead legs.
+
+    best[j] is the highest net revenue of any feasible schedule that ends with
+    trip j. Because the empty leg into j depends on where the previous trip
+    dropped off, finished schedules are grouped by drop-off location; each group
+    keeps its free-again times in order with a running maximum, so "best schedule
+    that can still reach this pickup" is one bisect per location. With L distinct
+    drop-off locations (bounded by the known city list) the whole pass is
+    O(n log n + n L log n) and the result is exact for the deadhead model.
+    """
+
+    def __init__(
+        self,
+        deadhead_speed_kmh: float = 45.0,
+        deadhead_cost_per_km: float = 100.0 / 12.0,  # fuel at 100 INR/l and 12 km/l, as in the route agent
+        turnaround_minutes: float = 30.0
+    ):
+        self.deadhead_speed_kmh = deadhead_speed_kmh
+        self.deadhead_cost_per_km = deadhead_cost_per_km
+        self.turnaround = timedelta(minutes=turnaround_minutes)
+
+    def build_item(self, trip: Dict[str, Any], committed: bool) -> Optional[ScheduleItem]:
+        """
+        Turn a trip row into a time interval; None when it has no usable pickup time
+        """
+        start = parse_time(trip.get("pickup_date") or trip.get("pickup_datetime") or trip.get("scheduled_pickup_time"))
+        if start is None:
+            return None
+
+        end = parse_time(trip.get("delivery_date") or trip.get("delivery_datetime"))
+        if end is None or end <= start:
+            hours = trip.get("estimated_duration_hours")
+            if not hours and trip.get("distance_km"):
+                hours = float(trip["distance_km"]) / LOADED_SPEED_KMH
+            end = start + timedelta(hours=float(hours or 4.0))
+
+        revenue = trip.get("freight_amount") or trip.get("revenue_inr") or trip.get("estimated_cost") or 0
+        destination = trip.get("delivery_location") or trip.get("destination")
+
+        return ScheduleItem(
+            trip=trip,
+            trip_id=str(trip.get("id")),
+            start=start,
+            end=end,
+            revenue=float(revenue),
+            origin=self._locate(trip.get("pickup_lat"), trip.get("pickup_lng"), trip.get("pickup_location")),
+            destination=self._locate(trip.get("delivery_lat"), trip.get("delivery_lng"), destination),
+            committed=committed
+        )
+
+    def optimize(
+        self,
+        driver: Dict[str, Any],
+        committed_trips: List[Dict[str, Any]],
+        candidate_trips: List[Dict[str, Any]],
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+
+        items: List[ScheduleItem] = []
+        unscheduled: List[str] = []
+        for trips, committed in ((committed_trips, True), (candidate_trips, False)):
+            for trip in trips:
+                item = self.build_item(trip, committed)
+                if item is None:
+                    unscheduled.append(str(trip.get("id")))
+                elif committed or item.start >= now:
+                    items.append(item)
+
+        location = driver.get("current_location") if isinstance(driver.get("current_location"), str) else None
+        start_stop = _Stop(
+            point=self._locate(driver.get("current_location_lat"), driver.get("current_location_lng"), location),
+            ready_at=now,
+            location=location
+        )
+
+        # Trips are processed by pickup time; once a trip is decided it waits in a
+        # heap until its driver is free again, then joins its drop-off location's list
+        items.sort(key=lambda item: item.start)
+        best = [0.0] * len(items)
+        previous: List[Optional[int]] = [None] * len(items)
+        waiting: List[Tuple[datetime, int]] = []
+        stops: Dict[Any, _LocationStops] = {}
+
+        for j, item in enumerate(items):
+            while waiting and waiting[0][0] <= item.start:
+                _, i = heapq.heappop(waiting)
+                key = self._location_key(items[i])
+                if key not in stops:
+                    stops[key] = _LocationStops(self._drop_stop(items[i]))
+                stops[key].append(items[i].end + self.turnaround, best[i], i)
+
+            # Option 1: first trip of the schedule, driving empty from the driver's position
+            deadhead_km = self._deadhead_km(start_stop.point, item.origin, start_stop.location,
+                                            item.trip.get("pickup_location"))
+            arrival = now + timedelta(hours=deadhead_km / self.deadhead_speed_kmh)
+            # Commitments are honoured even if the driver looks out of reach
+            value, pred = None, None
+            if arrival <= item.start or item.committed:
+                value = -deadhead_km * self.deadhead_cost_per_km
+
+            # Option 2: follow the best finished schedule ending at each drop-off location
+            for stop_list in stops.values():
+                deadhead_km = self._deadhead_km(stop_list.stop.point, item.origin, stop_list.stop.location,
+                                                item.trip.get("pickup_location"))
+                latest_ready = item.start - timedelta(hours=deadhead_km / self.deadhead_speed_kmh)
+                prior = stop_list.best_ready_by(latest_ready)
+                if prior is None:
+                    continue
+                candidate = prior[0] - deadhead_km * self.deadhead_cost_per_km
+                if value is None or candidate > value:
+                    value, pred = candidate, prior[1]
+
+            if value is None:
+                best[j] = float("-inf")
+                continue
+
+            best[j] = value + self._weight(item)
+            previous[j] = pred
+            heapq.heappush(waiting, (item.end + self.turnaround, j))
+
+        schedule: List[Dict[str, Any]] = []
+        if items and max(best) > 0:
+            j = max(range(len(items)), key=best.__getitem__)
+            while j is not None:
+                pred = previous[j]
+                schedule.append(self._entry(items[j], self._leg_km(items, pred, j, start_stop)))
+                j = pred
+            schedule.reverse()
+
+        selected = {entry["trip_id"] for entry in schedule}
+        return {
+            "schedule": schedule,
+            "conflicts": [item.trip_id for item in items if item.committed and item.trip_id not in selected],
+            "unscheduled": unscheduled,
+            "candidates_considered": sum(1 for item in items if not item.committed)
+        }
+
+    def metrics(self, schedule: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not schedule:
+            return {
+                "trips": 0,
+                "new_trips": 0,
+                "utilization_rate": 0.0,
+                "estimated_revenue": 0.0,
+                "deadhead_cost": 0.0,
+                "net_revenue": 0.0,
+                "total_distance_km": 0.0,
+                "deadhead_km": 0.0
+            }
+
+        loaded_hours = sum((parse_time(e["end"]) - parse_time(e["start"])).total_seconds() for e in schedule) / 3600
+        span_hours = (parse_time(schedule[-1]["end"]) - parse_time(schedule[0]["start"])).total_seconds() / 3600
+        revenue = sum(e["revenue_inr"] for e in schedule)
+        deadhead_cost = sum(e["deadhead_cost_inr"] for e in schedule)
+        deadhead_km = sum(e["deadhead_km"] for e in schedule)
+        loaded_km = sum(float(e.get("distance_km") or 0) for e in schedule)
+
+        return {
+            "trips": len(schedule),
+            "new_trips": sum(1 for e in schedule if e["status"] == "proposed"),
+            "utilization_rate": round(loaded_hours / span_hours, 3) if span_hours > 0 else 1.0,
+            "estimated_revenue": round(revenue, 2),
+            "deadhead_cost": round(deadhead_cost, 2),
+            "net_revenue": round(revenue - deadhead_cost, 2),
+            "total_distance_km": round(loaded_km + deadhead_km, 1),
+            "deadhead_km": round(deadhead_km, 1)
+        }
+
+    def _leg_km(self, items: List[ScheduleItem], pred: Optional[int], j: int, start_stop: "_Stop") -> float:
+        stop = start_stop if pred is None else self._drop_stop(items[pred])
+        return self._deadhead_km(stop.point, items[j].origin, stop.location, items[j].trip.get("pickup_location"))
+
+    def _drop_stop(self, item: ScheduleItem) -> "_Stop":
+        return _Stop(item.destination, item.end + self.turnaround,
+                     item.trip.get("delivery_location") or item.trip.get("destination"))
+
+    def _location_key(self, item: ScheduleItem) -> Any:
+        if item.destination is not None:
+            return (round(item.destination[0], 3), round(item.destination[1], 3))
+        name = item.trip.get("delivery_location") or item.trip.get("destination")
+        return (name or "").strip().lower() or ("trip", item.trip_id)
+
+    def _weight(self, item: ScheduleItem) -> float:
+        return item.revenue + (COMMITTED_BONUS if item.committed else 0.0)
+
+    def _entry(self, item: ScheduleItem, deadhead_km: float) -> Dict[str, Any]:
+        trip = item.trip
+        return {
+            "trip_id": item.trip_id,
+            "status": "assigned" if item.committed else "proposed",
+            "pickup_location": trip.get("pickup_location"),
+            "destination": trip.get("delivery_location") or trip.get("destination"),
+            "start": item.start.isoformat(),
+            "end": item.end.isoformat(),
+            "distance_km": trip.get("distance_km"),
+            "revenue_inr": round(item.revenue, 2),
+            "deadhead_km": round(deadhead_km, 1),
+            "deadhead_cost_inr": round(deadhead_km * self.deadhead_cost_per_km, 2)
+        }
+
+    def _deadhead_km(
+        self,
+        a: Optional[Point],
+        b: Optional[Point],
+        a_name: Optional[str] = None,
+        b_name: Optional[str] = None
+    ) -> float:
+        if a is not None and b is not None:
+            return haversine_km(a, b) * ROAD_FACTOR
+        if a_name and b_name and a_name.strip().lower() == b_name.strip().lower():
+            return 0.0
+        return UNKNOWN_DEADHEAD_KM
+
+    def _locate(self, lat: Any, lng: Any, location: Optional[str]) -> Optional[Point]:
+        if resolve_point is None:
+            return None
+        return resolve_point(lat, lng, location)
@@ -0,0 +1,149 @@
+"""
+Step Graph - Minimal dependency-graph executor for agent orchestration
+Independent steps run concurrently; each step starts as soon as its own dependencies finish
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    from agents.circuit_breaker import CircuitBreaker
+except ImportError:
+    CircuitBreaker = None
+
+StepFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+StepListener = Callable[[str, Any, Dict[str, Any]], Any]
+
+
+@dataclass
+class Step:
+    name: str
+    func: StepFunc
+    depends_on: List[str] = field(default_factory=list)
+    timeout_seconds: Optional[float] = None
+    breaker: Optional["CircuitBreaker"] = None
+    fallback: Any = None
+    offload: bool = False
+
+
+def _run_in_own_loop(func: StepFunc, results: Dict[str, Any]) -> Any:
+    return asyncio.run(func(results))
+
+
+class StepGraph:
+    """
+    Each step is an ``async def step(results)`` that receives the results of the
+    steps finished so far. Steps are scheduled as tasks that first await their
+    dependencies, so end-to-end latency is the slowest path through the graph
+    rather than the sum of all steps.
+
+    A step that raises, exceeds its ``timeout_seconds`` or finds its circuit
+    breaker open does not fail the graph: its ``fallback`` becomes its result and
+    it is reported in ``degraded``. Dependents still run and see the fallback.
+
+    Steps whose body makes blocking client calls should set ``offload=True`` so
+    they run on a worker thread; otherwise the timeout cannot fire until the
+    blocking call returns control to the event loop.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, Step] = {}
+
+    def add(self, name: str, func: StepFunc, depends_on: Optional[List[str]] = None,
+            timeout_seconds: Optional[float] = None, breaker: Optional["CircuitBreaker"] = None,
+            fallback: Any = None, offload: bool = False) -> "StepGraph":
+        for dependency in depends_on or []:
+            if dependency not in self.steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dependency}'")
+        self.steps[name] = Step(name, func, list(depends_on or []), timeout_seconds, breaker, fallback, offload)
+        return self
+
+    async def run(self, on_step: Optional[StepListener] = None) -> Dict[str, Any]:
+        """
+        Execute the graph and return {"results": {...}, "timings": {...}, "degraded": [...]}.
+        ``on_step(name, result, timing)`` is called as each step finishes, in completion order.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        degraded: List[Dict[str, Any]] = []
+        tasks: Dict[str, asyncio.Task] = {}
+        graph_start = time.perf_counter()
+
+        async def invoke(step: Step) -> Any:
+            if step.offload:
+                loop = asyncio.get_running_loop()
+                # Hand the worker a snapshot so it never sees results mutate mid-step
+                call = loop.run_in_executor(None, _run_in_own_loop, step.func, dict(results))
+            else:
+                call = step.func(results)
+
+            if step.timeout_seconds is not None:
+                return await asyncio.wait_for(call, timeout=step.timeout_seconds)
+            return await call
+
+        async def run_step(step: Step) -> None:
+            if step.depends_on:
+                await asyncio.gather(*(tasks[dependency] for dependency in step.depends_on))
+
+            started = time.perf_counter()
+            status = "ok"
+            error = None
+
+            if step.breaker is not None and not step.breaker.allow():
+                status = "circuit_open"
+                error = f"Circuit '{step.breaker.name}' is open"
+            else:
+                try:
+                    results[step.name] = await invoke(step)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    error = f"Timed out after {step.timeout_seconds}s"
+                except asyncio.CancelledError:
+                    # e.g. an NDJSON client went away: no verdict on the downstream
+                    if step.breaker is not None:
+                        step.breaker.release()
+                    raise
+                except Exception as e:
+                    status = "error"
+                    error = str(e)
+
+                if step.breaker is not None:
+                    if status == "ok":
+                        step.breaker.record_success()
+                    else:
+                        step.breaker.record_failure()
+
+            if status != "ok":
+                results[step.name] = step.fallback
+                degraded.append({"step": step.name, "reason": status, "error": error})
+
+            finished = time.perf_counter()
+            timings[step.name] = {
+                "started_at_ms": round((started - graph_start) * 1000, 2),
+                "duration_ms": round((finished - started) * 1000, 2),
+                "status": status
+            }
+
+            if on_step is not None:
+                on_step(step.name, results[step.name], timings[step.name])
+
+        # Steps can only depend on earlier steps (enforced in add), so insertion order is topological
+        for name, step in self.steps.items():
+            tasks[name] = asyncio.ensure_future(run_step(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return {
+            "results": results,
+            "timings": {
+                "steps": timings,
+                "total_ms": round((time.perf_counter() - graph_start) * 1000, 2)
+            },
+            "degraded": degraded
+        }
@@ -0,0 +1,224 @@
+"""
+Trip Feed Hub - Push live trip progress to dashboard subscribers
+One snapshot and one JSON encoding per trip update, fanned out to every subscriber queue
+"""
+import asyncio
+import json
+import threading
+from typing import Dict, List, Optional, Any, Iterable, Set
+import os
+import sys
+
+# Add parent directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+try:
+    from agents.trip_progress import trip_progress_tracker, progress_issues
+except ImportError:
+    trip_progress_tracker = progress_issues = None
+
+# Snapshot fields pushed as deltas; the rest (points_ingested, last_update) ride along only on snapshots
+WATCHED_FIELDS = (
+    "has_telemetry", "completion_percentage", "distance_covered_km", "distance_remaining_km",
+    "current_speed_kmh", "estimated_remaining_time_hours", "eta", "on_schedule",
+    "off_route", "off_route_km", "current_position"
+)
+
+# Messages a subscriber may fall behind by before it is resynced with full snapshots
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Subscription:
+    def __init__(self, hub: "TripFeedHub", trip_ids: Iterable[str]):
+        self.hub = hub
+        self.trip_ids: Set[str] = {str(trip_id) for trip_id in trip_ids}
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.resyncs = 0
+
+    async def next_message(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Next encoded message, or None when nothing arrived within timeout
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def subscribe(self, trip_ids: Iterable[str]) -> None:
+        self.hub.add_trips(self, trip_ids)
+
+    def unsubscribe(self, trip_ids: Iterable[str]) -> None:
+        self.hub.remove_trips(self, trip_ids)
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class TripFeedHub:
+    """
+    Subscribers register interest in trip IDs. When telemetry updates a trip, the
+    hub reads its progress once, diffs it against the last state it pushed, and
+    hands the same encoded delta to every subscriber of that trip. Publishing is
+    safe from worker threads (sync endpoints); delivery happens on the event loop
+    the subscribers live on.
+    """
+
+    def __init__(self, tracker=None):
+        self.tracker = tracker
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._last_state: Dict[str, Dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._published = 0
+        self._delivered = 0
+
+    def subscribe(self, trip_ids: Iterable[str]) -> Subscription:
+        """
+        Create a subscription (must be called on the event loop); queues a full snapshot per trip
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, [])
+        self.add_trips(subscription, trip_ids)
+        return subscription
+
+    def add_trips(self, subscription: Subscription, trip_ids: Iterable[str]) -> None:
+        trip_ids = [str(trip_id) for trip_id in trip_ids]
+        with self._lock:
+            for trip_id in trip_ids:
+                subscription.trip_ids.add(trip_id)
+                self._subscribers.setdefault(trip_id, set()).add(subscription)
+        for trip_id in trip_ids:
+            self._offer(subscription, self._encode(self._snapshot_message(trip_id)))
+
+    def remove_trips(self, subscription: Subscription, trip_ids: Iterable[str]) -> None:
+        with self._lock:
+            for trip_id in map(str, trip_ids):
+                subscription.trip_ids.discard(trip_id)
+                self._drop(subscription, trip_id)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for trip_id in list(subscription.trip_ids):
+                self._drop(subscription, trip_id)
+            subscription.trip_ids.clear()
+
+    def publish(self, trip_ids: Iterable[str]) -> int:
+        """
+        Push deltas for updated trips that have subscribers; returns messages published
+        """
+        with self._lock:
+            watched = [str(trip_id) for trip_id in trip_ids if self._subscribers.get(str(trip_id))]
+        if not watched or self._loop is None:
+            return 0
+
+        messages = []
+        for trip_id in watched:
+            message = self._delta_message(trip_id)
+            if message is not None:
+                messages.append((trip_id, self._encode(message)))
+
+        if messages:
+            self._published += len(messages)
+            self._loop.call_soon_threadsafe(self._fan_out, messages)
+        return len(messages)
+
+    def close_trip(self, trip_id: Any, reason: str = "ended") -> None:
+        """
+        Tell subscribers a trip stopped being tracked (completed, cancelled or deleted)
+        """
+        trip_id = str(trip_id)
+        with self._lock:
+            self._last_state.pop(trip_id, None)
+            has_subscribers = bool(self._subscribers.get(trip_id))
+        if has_subscribers and self._loop is not None:
+            message = self._encode({"event": "closed", "trip_id": trip_id, "reason": reason})
+            self._loop.call_soon_threadsafe(self._fan_out, [(trip_id, message)])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscriptions = {sub for subs in self._subscribers.values() for sub in subs}
+            return {
+                "watched_trips": len(self._subscribers),
+                "subscriptions": len(subscriptions),
+                "messages_published": self._published,
+                "messages_delivered": self._delivered,
+                "resyncs": sum(sub.resyncs for sub in subscriptions)
+            }
+
+    def _drop(self, subscription: Subscription, trip_id: str) -> None:
+        subscribers = self._subscribers.get(trip_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[trip_id]
+            self._last_state.pop(trip_id, None)
+
+    def _progress(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        return self.tracker.progress(trip_id) if self.tracker is not None else None
+
+    def _snapshot_message(self, trip_id: str) -> Dict[str, Any]:
+        progress = self._progress(trip_id)
+        issues = progress_issues(progress) if progress and progress_issues is not None else []
+        return {"event": "snapshot", "trip_id": trip_id, "progress": progress, "issues": issues}
+
+    def _delta_message(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        progress = self._progress(trip_id)
+        if progress is None:
+            return None
+
+        state = {field: progress.get(field) for field in WATCHED_FIELDS}
+        issues = progress_issues(progress) if progress_issues is not None else []
+        issue_types = {issue["type"] for issue in issues}
+
+        with self._lock:
+            previous = self._last_state.get(trip_id) or {"fields": {}, "issues": set()}
+            self._last_state[trip_id] = {"fields": state, "issues": issue_types}
+
+        changes = {field: value for field, value in state.items() if previous["fields"].get(field) != value}
+        raised = [issue for issue in issues if issue["type"] not in previous["issues"]]
+        cleared = sorted(previous["issues"] - issue_types)
+        if not changes and not raised and not cleared:
+            return None
+
+        message = {"event": "progress", "trip_id": trip_id, "changes": changes, "last_update": progress.get("last_update")}
+        if raised:
+            message["issues_raised"] = raised
+        if cleared:
+            message["issues_cleared"] = cleared
+        return message
+
+    @staticmethod
+    def _encode(message: Dict[str, Any]) -> str:
+        return json.dumps(message, default=str)
+
+    def _fan_out(self, messages: List[tuple]) -> None:
+        for trip_id, payload in messages:
+            with self._lock:
+                subscribers = list(self._subscribers.get(trip_id, ()))
+            for subscription in subscribers:
+                self._offer(subscription, payload)
+
+    def _offer(self, subscription: Subscription, payload: str) -> None:
+        try:
+            subscription.queue.put_nowait(payload)
+            self._delivered += 1
+        except asyncio.QueueFull:
+            self._resync(subscription)
+
+    def _resync(self, subscription: Subscription) -> None:
+        """
+        A subscriber that fell behind loses its queued deltas and gets fresh snapshots instead
+        """
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.resyncs += 1
+        for trip_id in list(subscription.trip_ids)[:SUBSCRIBER_QUEUE_SIZE]:
+            subscription.queue.put_nowait(self._encode(self._snapshot_message(trip_id)))
+
+
+# Shared instance fed by telemetry ingest and trip lifecycle changes
+trip_feed_hub = TripFeedHub(trip_progress_tracker)
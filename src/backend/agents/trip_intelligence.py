@@ -3,7 +3,7 @@ Trip Intelligence Agent - Main AI coordinator for trip management
 Orchestrates other agents to provide comprehensive trip intelligence and automation
 """
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from uuid import UUID
 import json
@@ -29,6 +29,55 @@ except ImportError:
     DocumentDigitizerAgent = None
     get_supabase_client = None
 
+try:
+    from agents.step_graph import StepGraph
+    from agents.circuit_breaker import circuit_breakers
+except ImportError:
+    StepGraph = None
+    circuit_breakers = {}
+
+try:
+    from agents.pending_trip_index import pending_trip_index
+except ImportError:
+    pending_trip_index = None
+
+try:
+    from agents.schedule_optimizer import ScheduleOptimizer
+except ImportError:
+    ScheduleOptimizer = None
+
+try:
+    from agents.trip_progress import trip_progress_tracker, progress_issues, ACTIVE_TRIP_STATUSES
+except ImportError:
+    trip_progress_tracker = progress_issues = None
+    ACTIVE_TRIP_STATUSES = ("assigned", "picked_up", "in_transit", "in_progress")
+
+try:
+    from agents.fleet_monitor import summarize_fleet
+except ImportError:
+    summarize_fleet = None
+
+try:
+    from agents.ocr_pool import OcrQueueFull
+except ImportError:
+    class OcrQueueFull(Exception):
+        pass
+
+try:
+    from app.trip_analytics import TripAnalyticsEngine, TripAnalyticsFilters
+except ImportError:
+    TripAnalyticsEngine = None
+    TripAnalyticsFilters = None
+
+# Rough monthly throughput of one truck, used to size the fleet from demand
+TRIPS_PER_VEHICLE_PER_MONTH = 20
+
+# Trips already on a driver's plate, and how many open trips the schedule optimizer considers
+SCHEDULED_TRIP_STATUSES = ["assigned", "picked_up", "in_transit"]
+MAX_SCHEDULE_CANDIDATES = 500
+# IDs per IN (...) filter so set-based lookups stay within request URL limits
+IN_FILTER_CHUNK = 200
+
 class TripIntelligenceAgent:
     def __init__(self):
         self.name = "Trip Intelligence Agent"
@@ -44,6 +93,18 @@ class TripIntelligenceAgent:
             self.availability_agent = None
             self.route_agent = None
             self.document_agent = None
+        
+        self.schedule_optimizer = ScheduleOptimizer() if ScheduleOptimizer else None
+        
+        # Per-step deadlines (seconds) for intelligent trip creation; a step that
+        # overruns is dropped from the plan instead of holding up the response
+        self.step_timeouts = {
+            "route": 2.0,
+            "driver": 3.0,
+            "acceptance": 2.0,
+            "departure": 2.0
+        }
+        self.document_timeout_seconds = 20.0
     
     async def create_intelligent_trip(
         self, 
@@ -63,71 +124,169 @@ class TripIntelligenceAgent:
                     "error": "Pickup location and destination are required"
                 }
             
-            # Step 1: Optimize route
-            route_optimization = await self.route_agent.optimize_single_route(
+            # Route, driver search and departure analysis are independent and run
+            # concurrently; acceptance prediction waits for route + driver
+            execution = await self._build_trip_step_graph(trip_request).run()
+            return await self._assemble_trip_result(trip_request, execution)
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Trip intelligence creation failed: {str(e)}",
+                "created_at": datetime.utcnow().isoformat()
+            }
+    
+    async def stream_intelligent_trip(self, trip_request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same as create_intelligent_trip, but yields one event per step as soon as it
+        completes ({"event": "route" | "driver" | "acceptance" | "departure", ...})
+        followed by a final "summary" event
+        """
+        if not trip_request.get("pickup_location") or not trip_request.get("destination"):
+            yield {"event": "error", "success": False, "error": "Pickup location and destination are required"}
+            return
+        
+        events: asyncio.Queue = asyncio.Queue()
+        
+        def on_step(name, result, timing):
+            events.put_nowait({
+                "event": name,
+                "data": self._step_event_payload(name, result),
+                "status": timing["status"],
+                "timing": timing
+            })
+        
+        graph_task = asyncio.ensure_future(self._build_trip_step_graph(trip_request).run(on_step=on_step))
+        graph_task.add_done_callback(lambda _: events.put_nowait(None))
+        
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            
+            result = await self._assemble_trip_result(trip_request, graph_task.result())
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Trip intelligence creation failed: {str(e)}",
+                "created_at": datetime.utcnow().isoformat()
+            }
+        finally:
+            if not graph_task.done():
+                graph_task.cancel()
+        
+        # Step payloads were already streamed; the summary carries everything else
+        result.pop("trip_plan", None)
+        yield {"event": "summary", **result}
+    
+    def _step_event_payload(self, name: str, result: Any) -> Any:
+        if name == "departure" and result:
+            return result.get("recommended_options", [])
+        return result
+    
+    async def _assemble_trip_result(self, trip_request: Dict[str, Any], execution: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the trip plan response from a finished step graph
+        """
+        steps = execution["results"]
+        degraded_steps = execution["degraded"]
+        
+        route_optimization = steps["route"]
+        if not route_optimization or not route_optimization.get("success"):
+            return {
+                "success": False,
+                "error": "Route optimization failed" if route_optimization else "Route optimization unavailable",
+                "details": route_optimization,
+                "partial_results": {
+                    "recommended_driver": steps["driver"],
+                    "departure_recommendations": (steps["departure"] or {}).get("recommended_options", [])
+                },
+                "degraded_steps": degraded_steps,
+                "step_timings": execution["timings"]
+            }
+        
+        best_driver = steps["driver"]
+        driver_prediction = steps["acceptance"]
+        departure_optimization = steps["departure"] or {}
+        
+        # Generate comprehensive trip plan
+        trip_plan = {
+            "route_details": route_optimization["route_info"],
+            "recommended_driver": best_driver,
+            "driver_acceptance_prediction": driver_prediction,
+            "departure_recommendations": departure_optimization.get("recommended_options", []),
+            "cost_breakdown": route_optimization["route_info"].get("costs", {}),
+            "recommendations": route_optimization.get("recommendations", [])
+        }
+        
+        # Create trip record if auto-create is enabled
+        trip_record = None
+        if trip_request.get("auto_create", False):
+            trip_record = await self._create_trip_record(trip_request, trip_plan)
+        
+        return {
+            "success": True,
+            "trip_plan": trip_plan,
+            "trip_record": trip_record,
+            "intelligence_summary": await self._generate_intelligence_summary(trip_plan),
+            "degraded": bool(degraded_steps),
+            "degraded_steps": degraded_steps,
+            "step_timings": execution["timings"],
+            "created_at": datetime.utcnow().isoformat()
+        }
+    
+    def _build_trip_step_graph(self, trip_request: Dict[str, Any]) -> StepGraph:
+        """
+        Dependency graph for intelligent trip creation
+        """
+        pickup_location = trip_request.get("pickup_location")
+        destination = trip_request.get("destination")
+        
+        async def optimize_route(results):
+            return await self.route_agent.optimize_single_route(
                 origin=pickup_location,
                 destination=destination,
                 constraints=trip_request.get("constraints")
             )
-            
-            if not route_optimization.get("success"):
-                return {
-                    "success": False,
-                    "error": "Route optimization failed",
-                    "details": route_optimization
-                }
-            
-            # Step 2: Find optimal driver
-            best_driver = await self.availability_agent.find_best_driver_for_trip(
+        
+        async def find_driver(results):
+            return await self.availability_agent.find_best_driver_for_trip(
                 trip_id=None,  # We don't have trip ID yet
                 pickup_location=pickup_location,
                 preferences=trip_request.get("driver_preferences")
             )
-            
-            # Step 3: Predict driver acceptance
-            driver_prediction = None
-            if best_driver:
-                driver_prediction = await self.availability_agent.predict_driver_acceptance(
-                    driver_id=best_driver["id"],
-                    trip_details=route_optimization["route_info"]
-                )
-            
-            # Step 4: Calculate optimal departure time
-            departure_optimization = await self.route_agent.suggest_optimal_departure_time(
+        
+        async def predict_acceptance(results):
+            route, driver = results["route"], results["driver"]
+            if not driver or not route or not route.get("success"):
+                return None
+            return await self.availability_agent.predict_driver_acceptance(
+                driver_id=driver["id"],
+                trip_details=route["route_info"]
+            )
+        
+        async def optimize_departure(results):
+            return await self.route_agent.suggest_optimal_departure_time(
                 origin=pickup_location,
                 destination=destination,
                 preferred_arrival_time=trip_request.get("preferred_arrival_time")
             )
-            
-            # Step 5: Generate comprehensive trip plan
-            trip_plan = {
-                "route_details": route_optimization["route_info"],
-                "recommended_driver": best_driver,
-                "driver_acceptance_prediction": driver_prediction,
-                "departure_recommendations": departure_optimization.get("recommended_options", []),
-                "cost_breakdown": route_optimization["route_info"].get("costs", {}),
-                "recommendations": route_optimization.get("recommendations", [])
-            }
-            
-            # Step 6: Create trip record if auto-create is enabled
-            trip_record = None
-            if trip_request.get("auto_create", False):
-                trip_record = await self._create_trip_record(trip_request, trip_plan)
-            
-            return {
-                "success": True,
-                "trip_plan": trip_plan,
-                "trip_record": trip_record,
-                "intelligence_summary": await self._generate_intelligence_summary(trip_plan),
-                "created_at": datetime.utcnow().isoformat()
-            }
         
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Trip intelligence creation failed: {str(e)}",
-                "created_at": datetime.utcnow().isoformat()
-            }
+        timeouts = self.step_timeouts
+        routing, db = circuit_breakers.get("routing"), circuit_breakers.get("db")
+        
+        # Driver search and acceptance make blocking database calls, so they are
+        # offloaded to worker threads where their deadlines can actually fire
+        return (
+            StepGraph()
+            .add("route", optimize_route, timeout_seconds=timeouts["route"], breaker=routing)
+            .add("driver", find_driver, timeout_seconds=timeouts["driver"], breaker=db, offload=True)
+            .add("departure", optimize_departure, timeout_seconds=timeouts["departure"], breaker=routing)
+            .add("acceptance", predict_acceptance, depends_on=["route", "driver"],
+                 timeout_seconds=timeouts["acceptance"], breaker=db, offload=True)
+        )
     
     async def monitor_trip_progress(self, trip_id: UUID) -> Dict[str, Any]:
         """
@@ -180,6 +339,58 @@ class TripIntelligenceAgent:
                 "monitoring_timestamp": datetime.utcnow().isoformat()
             }
     
+    async def monitor_fleet(self, statuses: Optional[List[str]] = None, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Monitor every active trip at once: trips, their drivers and their expenses
+        are loaded with one set-based query each, then progress and issues are
+        computed for the whole fleet in a single pass
+        """
+        try:
+            supabase = get_supabase_client()
+            statuses = statuses or list(ACTIVE_TRIP_STATUSES)
+            
+            trips = supabase.table("trips").select("*").in_("status", statuses).limit(limit).execute().data or []
+            trip_ids = [str(trip["id"]) for trip in trips]
+            driver_ids = sorted({str(trip["driver_id"]) for trip in trips if trip.get("driver_id")})
+            
+            drivers = {
+                str(driver["id"]): driver
+                for driver in self._select_in(supabase, "drivers", "id,name,vehicle_id", "id", driver_ids)
+            }
+            expenses = self._select_in(supabase, "expenses", "trip_id,amount", "trip_id", trip_ids)
+            
+            progress = {}
+            if trip_progress_tracker is not None:
+                for trip in trips:
+                    snapshot = trip_progress_tracker.progress(trip["id"])
+                    if snapshot is None:
+                        vehicle_id = trip.get("vehicle_id") or drivers.get(str(trip.get("driver_id")), {}).get("vehicle_id")
+                        trip_progress_tracker.track(trip, vehicle_id=vehicle_id)
+                        snapshot = trip_progress_tracker.progress(trip["id"])
+                    progress[str(trip["id"])] = snapshot
+            
+            return {
+                "success": True,
+                **summarize_fleet(trips, drivers, expenses, progress),
+                "monitoring_timestamp": datetime.utcnow().isoformat()
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Fleet monitoring failed: {str(e)}",
+                "monitoring_timestamp": datetime.utcnow().isoformat()
+            }
+    
+    @staticmethod
+    def _select_in(supabase, table: str, columns: str, key: str, values: List[str]) -> List[Dict[str, Any]]:
+        """One IN (...) query per chunk of values"""
+        rows = []
+        for start in range(0, len(values), IN_FILTER_CHUNK):
+            chunk = values[start:start + IN_FILTER_CHUNK]
+            rows.extend(supabase.table(table).select(columns).in_(key, chunk).execute().data or [])
+        return rows
+    
     async def process_trip_document(
         self, 
         trip_id: UUID, 
@@ -189,35 +400,51 @@ class TripIntelligenceAgent:
         """
         Process trip-related documents (receipts, freight bills, etc.)
         """
+        ocr_breaker = circuit_breakers.get("ocr")
+        if ocr_breaker is not None and not ocr_breaker.allow():
+            return {
+                "success": False,
+                "error": "Document processing temporarily unavailable (OCR circuit open)",
+                "degraded_steps": [{"step": "ocr", "reason": "circuit_open", "error": None}],
+                "processing_timestamp": datetime.utcnow().isoformat()
+            }
+        
         try:
             if document_type == "expense_receipt":
-                result = await self.document_agent.process_expense_receipt(image_data)
+                result = await self._run_ocr(self.document_agent.process_expense_receipt, image_data)
                 
                 if result.get("success") and result.get("suggested_expense"):
-                    # Auto-create expense if confidence is high
-                    if result.get("confidence", 0) > 0.7:
+                    # Auto-create expense if confidence is high, unless the receipt
+                    # looks like one that was already claimed
+                    if result.get("confidence", 0) > 0.7 and not result.get("possible_duplicate"):
                         expense_record = await self._create_expense_record(
                             trip_id, 
                             result["suggested_expense"], 
                             image_data
                         )
                         result["auto_created_expense"] = expense_record
+                        if expense_record:
+                            self.document_agent.link_receipt_expense(
+                                result.get("receipt_fingerprint_id"), expense_record.get("id"), trip_id
+                            )
             
             elif document_type == "freight_bill":
-                result = await self.document_agent.extract_freight_bill_details(image_data)
+                result = await self._run_ocr(self.document_agent.extract_freight_bill_details, image_data)
                 
                 # Update trip with extracted details if confidence is high
                 if result.get("success") and result.get("confidence", 0) > 0.8:
                     await self._update_trip_with_freight_details(trip_id, result["freight_details"])
             
             else:
-                result = await self.document_agent.extract_freight_amount(image_data)
+                result = await self._run_ocr(self.document_agent.extract_freight_amount, image_data)
             
             # Add intelligence insights
             result["intelligence_insights"] = await self._generate_document_insights(result, document_type)
             
             return result
         
+        except OcrQueueFull:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -225,6 +452,43 @@ class TripIntelligenceAgent:
                 "processing_timestamp": datetime.utcnow().isoformat()
             }
     
+    async def _run_ocr(self, extractor, image_data: bytes) -> Dict[str, Any]:
+        """
+        Run a document extractor under the OCR deadline and breaker (the OCR itself
+        runs in the worker pool, so the extractor coroutine only awaits it)
+        """
+        ocr_breaker = circuit_breakers.get("ocr")
+        
+        try:
+            result = await asyncio.wait_for(extractor(image_data), timeout=self.document_timeout_seconds)
+        except (OcrQueueFull, asyncio.CancelledError):
+            # Backpressure or a caller that went away, not a downstream failure: free a
+            # half-open trial slot, then let the caller answer 429 / unwind
+            if ocr_breaker is not None:
+                ocr_breaker.release()
+            raise
+        except asyncio.TimeoutError:
+            if ocr_breaker is not None:
+                ocr_breaker.record_failure()
+            return {
+                "success": False,
+                "error": f"OCR timed out after {self.document_timeout_seconds}s",
+                "degraded_steps": [{"step": "ocr", "reason": "timeout", "error": None}]
+            }
+        except Exception:
+            if ocr_breaker is not None:
+                ocr_breaker.record_failure()
+            raise
+        
+        if ocr_breaker is not None:
+            # Extractors catch OCR errors (engine failure, broken pool, missing tessdata)
+            # and report them as success=False: those count against the breaker too
+            if result.get("success"):
+                ocr_breaker.record_success()
+            else:
+                ocr_breaker.record_failure()
+        return result
+    
     async def optimize_driver_schedule(
         self, 
         driver_id: UUID, 
@@ -248,13 +512,14 @@ class TripIntelligenceAgent:
             driver = driver_result.data[0]
             
             # Get pending trips that could be assigned to this driver
-            pending_trips = await self._get_suitable_pending_trips(driver_id)
+            pending_trips = await self._get_suitable_pending_trips(driver_id, time_horizon_days)
             
             # Get driver's current schedule
             current_schedule = await self._get_driver_schedule(driver_id, time_horizon_days)
             
             # Optimize schedule
-            optimized_schedule = await self._optimize_schedule(driver, pending_trips, current_schedule)
+            plan = await self._optimize_schedule(driver, pending_trips, current_schedule)
+            optimized_schedule = plan["schedule"]
             
             # Calculate performance metrics
             performance_metrics = await self._calculate_schedule_metrics(optimized_schedule)
@@ -264,6 +529,9 @@ class TripIntelligenceAgent:
                 "driver_name": driver["name"],
                 "optimized_schedule": optimized_schedule,
                 "performance_metrics": performance_metrics,
+                "schedule_conflicts": plan["conflicts"],
+                "unscheduled_trips": plan["unscheduled"],
+                "candidates_considered": plan["candidates_considered"],
                 "recommendations": await self._generate_schedule_recommendations(optimized_schedule),
                 "optimization_timestamp": datetime.utcnow().isoformat()
             }
@@ -285,30 +553,18 @@ class TripIntelligenceAgent:
         try:
             supabase = get_supabase_client()
             
-            # Build query based on filters
-            query = supabase.table("trips").select("*")
-            
-            if filters:
-                if filters.get("start_date"):
-                    query = query.gte("created_at", filters["start_date"])
-                if filters.get("end_date"):
-                    query = query.lte("created_at", filters["end_date"])
-                if filters.get("status"):
-                    query = query.eq("status", filters["status"])
-                if filters.get("driver_id"):
-                    query = query.eq("driver_id", filters["driver_id"])
-            
-            trips_result = query.execute()
-            trips = trips_result.data if trips_result.data else []
+            # Grouping and summing happen in the database; only one row per group comes back
+            engine = TripAnalyticsEngine(TripAnalyticsFilters.from_dict(filters))
+            aggregates = engine.run_supabase(supabase)
             
             # Calculate analytics
             analytics = {
-                "summary": await self._calculate_trip_summary(trips),
-                "performance_trends": await self._analyze_performance_trends(trips),
-                "cost_analysis": await self._analyze_cost_patterns(trips),
-                "driver_performance": await self._analyze_driver_performance(trips),
-                "route_efficiency": await self._analyze_route_efficiency(trips),
-                "predictions": await self._generate_predictive_insights(trips)
+                "summary": await self._calculate_trip_summary(aggregates),
+                "performance_trends": await self._analyze_performance_trends(aggregates),
+                "cost_analysis": await self._analyze_cost_patterns(aggregates),
+                "driver_performance": await self._analyze_driver_performance(aggregates),
+                "route_efficiency": await self._analyze_route_efficiency(aggregates),
+                "predictions": await self._generate_predictive_insights(aggregates)
             }
             
             return {
@@ -317,7 +573,7 @@ class TripIntelligenceAgent:
                 "data_period": {
                     "start_date": filters.get("start_date") if filters else None,
                     "end_date": filters.get("end_date") if filters else None,
-                    "total_trips_analyzed": len(trips)
+                    "total_trips_analyzed": aggregates["totals"]["trips"]
                 },
                 "generated_at": datetime.utcnow().isoformat()
             }
@@ -360,6 +616,9 @@ class TripIntelligenceAgent:
             
             result = supabase.table("trips").insert(trip_data).execute()
             
+            if result.data and pending_trip_index is not None:
+                pending_trip_index.upsert(result.data[0])
+            
             return result.data[0] if result.data else None
         
         except Exception as e:
@@ -453,16 +712,19 @@ class TripIntelligenceAgent:
         driver: Optional[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """
-        Calculate real-time trip progress metrics
+        Calculate real-time trip progress metrics from the telemetry-fed progress state
         """
-        # This is a simplified version - in production, you'd integrate with GPS tracking
-        return {
-            "completion_percentage": 45.0,  # Example
-            "estimated_remaining_time_hours": 2.5,
-            "current_speed_kmh": 65,
-            "on_schedule": True,
-            "fuel_efficiency": "good"
-        }
+        if trip_progress_tracker is None:
+            return {"has_telemetry": False}
+        
+        progress = trip_progress_tracker.progress(trip["id"])
+        if progress is None:
+            # First look at this trip: bind it to its vehicle so future points update it
+            vehicle_id = trip.get("vehicle_id") or (driver or {}).get("vehicle_id")
+            trip_progress_tracker.track(trip, vehicle_id=vehicle_id)
+            progress = trip_progress_tracker.progress(trip["id"])
+        
+        return progress
     
     async def _generate_real_time_recommendations(
         self, 
@@ -475,12 +737,15 @@ class TripIntelligenceAgent:
         """
         recommendations = []
         
-        if progress.get("current_speed_kmh", 0) > 80:
+        if (progress.get("current_speed_kmh") or 0) > 80:
             recommendations.append("Reduce speed for better fuel efficiency and safety")
         
-        if not progress.get("on_schedule", True):
+        if progress.get("on_schedule") is False:
             recommendations.append("Consider alternative route to make up time")
         
+        if progress.get("off_route"):
+            recommendations.append("Vehicle is away from the planned route - confirm the diversion with the driver")
+        
         return recommendations
     
     async def _detect_potential_issues(
@@ -494,8 +759,7 @@ class TripIntelligenceAgent:
         """
         issues = []
         
-        # Example issue detection
-        if progress.get("completion_percentage", 0) < 20 and trip.get("status") == "in_progress":
+        if progress.get("has_telemetry") and progress.get("completion_percentage", 0) < 20 and trip.get("status") == "in_progress":
             issues.append({
                 "type": "progress_delay",
                 "severity": "medium",
@@ -503,6 +767,9 @@ class TripIntelligenceAgent:
                 "suggested_action": "Contact driver for status update"
             })
         
+        if progress_issues is not None:
+            issues.extend(progress_issues(progress))
+        
         return issues
     
     async def _analyze_trip_expenses(self, trip_id: UUID) -> Dict[str, Any]:
@@ -536,70 +803,145 @@ class TripIntelligenceAgent:
                 "error": str(e)
             }
     
-    # Additional helper methods would be implemented here...
-    async def _get_suitable_pending_trips(self, driver_id: UUID) -> List[Dict[str, Any]]:
-        """Get pending trips suitable for the driver"""
-        # Implementation would filter pending trips based on driver capabilities
-        return []
+    async def _get_suitable_pending_trips(self, driver_id: UUID, days: int = 7) -> List[Dict[str, Any]]:
+        """Get unassigned pending trips picking up within the horizon"""
+        supabase = get_supabase_client()
+        now = datetime.utcnow()
+        
+        result = supabase.table("trips").select("*") \
+            .eq("status", "pending") \
+            .is_("driver_id", "null") \
+            .gte("pickup_date", now.isoformat()) \
+            .lte("pickup_date", (now + timedelta(days=days)).isoformat()) \
+            .limit(MAX_SCHEDULE_CANDIDATES) \
+            .execute()
+        
+        return result.data or []
     
     async def _get_driver_schedule(self, driver_id: UUID, days: int) -> List[Dict[str, Any]]:
         """Get driver's current schedule"""
-        # Implementation would get assigned trips for the driver
-        return []
+        supabase = get_supabase_client()
+        horizon_end = datetime.utcnow() + timedelta(days=days)
+        
+        result = supabase.table("trips").select("*") \
+            .eq("driver_id", str(driver_id)) \
+            .in_("status", SCHEDULED_TRIP_STATUSES) \
+            .lte("pickup_date", horizon_end.isoformat()) \
+            .execute()
+        
+        return result.data or []
     
     async def _optimize_schedule(
         self, 
         driver: Dict[str, Any], 
         pending_trips: List[Dict[str, Any]], 
         current_schedule: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """Optimize driver schedule"""
-        # Implementation would use optimization algorithms
-        return current_schedule
+        return self.schedule_optimizer.optimize(driver, current_schedule, pending_trips)
     
     async def _calculate_schedule_metrics(self, schedule: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate performance metrics for schedule"""
-        return {
-            "utilization_rate": 0.75,
-            "estimated_revenue": 15000,
-            "total_distance_km": 1200
-        }
+        return self.schedule_optimizer.metrics(schedule)
     
     async def _generate_schedule_recommendations(self, schedule: List[Dict[str, Any]]) -> List[str]:
         """Generate schedule optimization recommendations"""
         return ["Consider grouping nearby deliveries", "Add buffer time for traffic"]
     
-    async def _calculate_trip_summary(self, trips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _calculate_trip_summary(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate summary statistics for trips"""
+        totals = aggregates["totals"]
         return {
-            "total_trips": len(trips),
-            "completed_trips": len([t for t in trips if t.get("status") == "completed"]),
-            "total_distance_km": sum(float(t.get("distance_km", 0)) for t in trips),
-            "average_trip_duration": 4.5
+            "total_trips": totals["trips"],
+            "completed_trips": totals["completed_trips"],
+            "completion_rate": totals["completion_rate"],
+            "total_distance_km": totals["total_distance_km"],
+            "average_distance_km": totals["avg_distance_km"],
+            "total_cost_inr": totals["total_cost_inr"],
+            "by_status": {group["status"]: group["trips"] for group in aggregates["by_status"]}
         }
     
-    async def _analyze_performance_trends(self, trips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _analyze_performance_trends(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze performance trends"""
-        return {"trend": "improving", "completion_rate_trend": "+5%"}
+        months = aggregates["by_month"]
+        if len(months) < 2:
+            return {"trend": "insufficient_data", "completion_rate_trend": None, "monthly": months}
+        
+        previous, latest = months[-2], months[-1]
+        change = latest["completion_rate"] - previous["completion_rate"]
+        
+        return {
+            "trend": "improving" if change > 0.02 else "declining" if change < -0.02 else "stable",
+            "completion_rate_trend": f"{change * 100:+.1f}%",
+            "monthly": months
+        }
     
-    async def _analyze_cost_patterns(self, trips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _analyze_cost_patterns(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze cost patterns"""
-        return {"average_cost_per_km": 12.5, "cost_trend": "stable"}
+        months = [m for m in aggregates["by_month"] if m["total_distance_km"]]
+        cost_trend = "insufficient_data"
+        if len(months) >= 2:
+            previous, latest = months[-2]["cost_per_km"], months[-1]["cost_per_km"]
+            if previous:
+                change = (latest - previous) / previous
+                cost_trend = "rising" if change > 0.05 else "falling" if change < -0.05 else "stable"
+        
+        return {
+            "average_cost_per_km": aggregates["totals"]["cost_per_km"],
+            "cost_trend": cost_trend,
+            "monthly_cost_per_km": {m["month"]: m["cost_per_km"] for m in months}
+        }
     
-    async def _analyze_driver_performance(self, trips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _analyze_driver_performance(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze driver performance across trips"""
-        return {"top_performers": [], "improvement_areas": []}
+        drivers = aggregates["by_driver"]
+        ranked = sorted(drivers, key=lambda d: (d["completion_rate"], d["completed_trips"]), reverse=True)
+        
+        return {
+            "top_performers": ranked[:5],
+            "improvement_areas": [
+                {"driver_id": d["driver_id"], "issue": "low completion rate", "completion_rate": d["completion_rate"]}
+                for d in drivers if d["trips"] >= 3 and d["completion_rate"] < 0.5
+            ]
+        }
     
-    async def _analyze_route_efficiency(self, trips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _analyze_route_efficiency(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze route efficiency"""
-        return {"most_efficient_routes": [], "optimization_potential": "15%"}
+        corridors = [c for c in aggregates["by_corridor"] if c["total_distance_km"] and c["total_cost_inr"]]
+        if not corridors:
+            return {"most_efficient_routes": [], "busiest_routes": aggregates["by_corridor"][:5], "optimization_potential": None}
+        
+        by_cost = sorted(corridors, key=lambda c: c["cost_per_km"])
+        average = aggregates["totals"]["cost_per_km"]
+        potential = (average - by_cost[0]["cost_per_km"]) / average if average else 0
+        
+        return {
+            "most_efficient_routes": by_cost[:5],
+            "least_efficient_routes": by_cost[-5:][::-1],
+            "busiest_routes": aggregates["by_corridor"][:5],
+            "optimization_potential": f"{potential * 100:.0f}%"
+        }
     
-    async def _generate_predictive_insights(self, trips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _generate_predictive_insights(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
         """Generate predictive insights"""
+        months = aggregates["by_month"]
+        if not months:
+            return {"predicted_demand": "insufficient_data", "recommended_fleet_size": None, "seasonal_patterns": []}
+        
+        demand = "insufficient_data"
+        if len(months) >= 2:
+            previous, latest = months[-2]["trips"], months[-1]["trips"]
+            demand = "increasing" if latest > previous * 1.05 else "decreasing" if latest < previous * 0.95 else "stable"
+        
+        average_trips = sum(m["trips"] for m in months) / len(months)
+        
         return {
-            "predicted_demand": "increasing",
-            "recommended_fleet_size": 5,
-            "seasonal_patterns": []
+            "predicted_demand": demand,
+            "recommended_fleet_size": max(1, -(-months[-1]["trips"] // TRIPS_PER_VEHICLE_PER_MONTH)),
+            "seasonal_patterns": [
+                {"month": m["month"], "trips": m["trips"], "vs_average": round(m["trips"] / average_trips, 2)}
+                for m in months if m["trips"] > average_trips * 1.25
+            ]
         }
     
     async def _update_trip_with_freight_details(
@@ -650,5 +992,9 @@ class TripIntelligenceAgent:
                 amount = processing_result.get("receipt_info", {}).get("amount", {}).get("amount")
                 if amount and amount > 1000:
                     insights.append("High value expense - consider additional approval")
+                
+                if processing_result.get("possible_duplicate"):
+                    expense_ids = [m["expense_id"] for m in processing_result.get("duplicate_matches", []) if m.get("expense_id")]
+                    insights.append(f"Possible duplicate of expense {', '.join(expense_ids)} - not auto-created, review before reimbursing")
         
         return insights
@@ -0,0 +1,298 @@
+"""
+Trip Progress Tracker - Incremental per-trip progress derived from GPS telemetry
+Each point updates its trip's state in O(1); monitoring reads the state without touching raw points
+"""
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+import os
+import sys
+
+# Add parent directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from agents.schedule_optimizer import haversine_km, parse_time, ROAD_FACTOR, LOADED_SPEED_KMH
+
+try:
+    from agents.pending_trip_index import resolve_point
+except ImportError:
+    resolve_point = None
+
+# Trips in these states are on the road and get telemetry bound to them
+ACTIVE_TRIP_STATUSES = ("assigned", "picked_up", "in_transit", "in_progress")
+
+# Weight of the newest speed sample in the moving average
+SPEED_SMOOTHING = 0.3
+# Below this the vehicle counts as stopped and the ETA falls back to the planned speed
+MIN_MOVING_SPEED_KMH = 5.0
+# Jumps implying more than this are GPS glitches and are ignored for odometer / speed
+MAX_PLAUSIBLE_SPEED_KMH = 150.0
+# Further than this from the straight route line counts as off route
+OFF_ROUTE_KM = 25.0
+
+Point = Tuple[float, float]
+
+
+@dataclass
+class TripProgress:
+    trip_id: str
+    vehicle_id: Optional[str]
+    origin: Optional[Point]
+    destination: Optional[Point]
+    route_km: float
+    planned_start: Optional[datetime] = None
+    planned_end: Optional[datetime] = None
+
+    covered_km: float = 0.0
+    odometer_km: float = 0.0
+    speed_kmh: Optional[float] = None
+    off_route_km: float = 0.0
+    position: Optional[Point] = None
+    last_ts: Optional[datetime] = None
+    points: int = 0
+    started_at: Optional[datetime] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        remaining_km = max(self.route_km - self.covered_km, 0.0)
+        moving_speed = self.speed_kmh if self.speed_kmh and self.speed_kmh >= MIN_MOVING_SPEED_KMH else None
+        eta_speed = moving_speed or LOADED_SPEED_KMH
+        remaining_hours = remaining_km / eta_speed if eta_speed else None
+        eta = (self.last_ts + timedelta(hours=remaining_hours)) if self.last_ts and remaining_hours is not None else None
+
+        on_schedule = None
+        if eta and self.planned_end:
+            on_schedule = eta <= self.planned_end
+
+        return {
+            "trip_id": self.trip_id,
+            "vehicle_id": self.vehicle_id,
+            "has_telemetry": self.points > 0,
+            "completion_percentage": round(100 * self.covered_km / self.route_km, 1) if self.route_km else 0.0,
+            "distance_covered_km": round(self.covered_km, 1),
+            "distance_remaining_km": round(remaining_km, 1),
+            "distance_driven_km": round(self.odometer_km, 1),
+            "route_distance_km": round(self.route_km, 1),
+            "current_speed_kmh": round(self.speed_kmh, 1) if self.speed_kmh is not None else None,
+            "estimated_remaining_time_hours": round(remaining_hours, 2) if remaining_hours is not None else None,
+            "eta": eta.isoformat() if eta else None,
+            "on_schedule": on_schedule,
+            "off_route": self.off_route_km > OFF_ROUTE_KM,
+            "off_route_km": round(self.off_route_km, 1),
+            "current_position": {"lat": self.position[0], "lng": self.position[1]} if self.position else None,
+            "last_update": self.last_ts.isoformat() if self.last_ts else None,
+            "points_ingested": self.points
+        }
+
+
+class TripProgressTracker:
+    """
+    Vehicles are bound to the active trip they are running. Each telemetry point
+    projects onto the trip's origin -> destination line (distance covered along
+    the route), adds the step to an odometer, and folds the speed into an EWMA.
+    Progress along the route never goes backwards, so GPS jitter near a point
+    does not make a trip "un-complete".
+    """
+
+    def __init__(self):
+        self._trips: Dict[str, TripProgress] = {}
+        self._vehicle_trip: Dict[str, str] = {}
+        self._last_seen: Dict[str, Tuple[datetime, Point]] = {}
+        self._lock = threading.Lock()
+
+    def sync_trip(self, trip: Dict[str, Any]) -> None:
+        """
+        Bind / unbind a trip from its row (call on create, assign and status changes)
+        """
+        if trip.get("status") in ACTIVE_TRIP_STATUSES:
+            # Supabase trip rows carry no vehicle_id (the vehicle comes from the driver),
+            # so a row without one keeps the trip's current binding
+            self.track(trip)
+        else:
+            self.untrack(trip.get("id"))
+
+    def track(self, trip: Dict[str, Any], vehicle_id: Optional[str] = None) -> TripProgress:
+        trip_id = str(trip.get("id"))
+        vehicle_id = str(vehicle_id or trip.get("vehicle_id") or "") or None
+
+        with self._lock:
+            state = self._trips.get(trip_id)
+            if state is None:
+                state = self._new_state(trip, vehicle_id)
+                self._trips[trip_id] = state
+            else:
+                if vehicle_id and state.vehicle_id != vehicle_id:
+                    self._vehicle_trip.pop(state.vehicle_id, None)
+                    state.vehicle_id = vehicle_id
+                if not state.route_km:
+                    # Created from a point's explicit trip_id before the row was known
+                    planned = self._new_state(trip, state.vehicle_id)
+                    state.origin, state.destination, state.route_km = planned.origin, planned.destination, planned.route_km
+                    state.planned_start, state.planned_end = planned.planned_start, planned.planned_end
+
+            if vehicle_id:
+                self._vehicle_trip[vehicle_id] = trip_id
+                # Seed the position from the vehicle's last known fix
+                seen = self._last_seen.get(vehicle_id)
+                if seen and state.points == 0:
+                    self._apply(state, seen[0], seen[1], None)
+            return state
+
+    def untrack(self, trip_id: Any) -> None:
+        with self._lock:
+            state = self._trips.pop(str(trip_id), None)
+            if state and state.vehicle_id and self._vehicle_trip.get(state.vehicle_id) == state.trip_id:
+                del self._vehicle_trip[state.vehicle_id]
+
+    def ingest(self, points: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fold a batch of points (vehicle_id, ts, lat, lng, speed[, trip_id]) into trip state
+        """
+        updated = set()
+        stale = 0
+        with self._lock:
+            for point in sorted(points, key=lambda p: (p["vehicle_id"], p["ts"])):
+                vehicle_id = str(point["vehicle_id"])
+                ts, position = point["ts"], (float(point["lat"]), float(point["lng"]))
+
+                seen = self._last_seen.get(vehicle_id)
+                if seen and ts <= seen[0]:
+                    stale += 1
+                    continue
+                self._last_seen[vehicle_id] = (ts, position)
+
+                explicit_trip_id = point.get("trip_id")
+                trip_id = explicit_trip_id or self._vehicle_trip.get(vehicle_id)
+                state = self._trips.get(str(trip_id)) if trip_id else None
+                if state is None:
+                    if not explicit_trip_id:
+                        continue
+                    # The device names its trip before the row has been synced: track it now,
+                    # the route is filled in by the next track() / sync_trip() of the row
+                    state = self._new_state({"id": explicit_trip_id}, None)
+                    self._trips[state.trip_id] = state
+                if state.vehicle_id is None:
+                    state.vehicle_id = vehicle_id
+                    self._vehicle_trip[vehicle_id] = state.trip_id
+
+                self._apply(state, ts, position, point.get("speed"))
+                updated.add(state.trip_id)
+
+        return {"trips_updated": sorted(updated), "stale_points": stale}
+
+    def progress(self, trip_id: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._trips.get(str(trip_id))
+            return state.snapshot() if state else None
+
+    def trip_for_vehicle(self, vehicle_id: str) -> Optional[str]:
+        return self._vehicle_trip.get(str(vehicle_id))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tracked_trips": len(self._trips),
+                "bound_vehicles": len(self._vehicle_trip),
+                "vehicles_seen": len(self._last_seen)
+            }
+
+    def _new_state(self, trip: Dict[str, Any], vehicle_id: Optional[str]) -> TripProgress:
+        origin = destination = None
+        if resolve_point is not None:
+            origin = resolve_point(trip.get("pickup_lat"), trip.get("pickup_lng"), trip.get("pickup_location"))
+            destination = resolve_point(trip.get("delivery_lat"), trip.get("delivery_lng"),
+                                        trip.get("delivery_location") or trip.get("destination"))
+
+        route_km = float(trip.get("distance_km") or 0)
+        if not route_km and origin and destination:
+            route_km = haversine_km(origin, destination) * ROAD_FACTOR
+
+        planned_start = parse_time(trip.get("pickup_date") or trip.get("pickup_datetime"))
+        planned_end = parse_time(trip.get("delivery_date") or trip.get("delivery_datetime"))
+        if planned_end is None and planned_start and trip.get("estimated_duration_hours"):
+            planned_end = planned_start + timedelta(hours=float(trip["estimated_duration_hours"]))
+
+        return TripProgress(
+            trip_id=str(trip.get("id")),
+            vehicle_id=vehicle_id,
+            origin=origin,
+            destination=destination,
+            route_km=route_km,
+            planned_start=planned_start,
+            planned_end=planned_end
+        )
+
+    def _apply(self, state: TripProgress, ts: datetime, position: Point, speed: Optional[float]) -> None:
+        if state.position is not None and state.last_ts is not None:
+            step_km = haversine_km(state.position, position)
+            hours = (ts - state.last_ts).total_seconds() / 3600
+            implied = step_km / hours if hours > 0 else None
+            if implied is not None and implied <= MAX_PLAUSIBLE_SPEED_KMH:
+                state.odometer_km += step_km
+                if speed is None:
+                    speed = implied
+        if speed is not None:
+            state.speed_kmh = speed if state.speed_kmh is None else (
+                SPEED_SMOOTHING * speed + (1 - SPEED_SMOOTHING) * state.speed_kmh)
+
+        if state.origin and state.destination and state.route_km:
+            fraction, cross_km = _project(state.origin, state.destination, position)
+            state.covered_km = max(state.covered_km, fraction * state.route_km)
+            state.off_route_km = cross_km
+
+        state.position = position
+        state.last_ts = ts
+        state.started_at = state.started_at or ts
+        state.points += 1
+
+
+def progress_issues(progress: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Issues that follow from the progress snapshot alone (shared by monitoring and the live feed)
+    """
+    issues = []
+
+    if progress.get("on_schedule") is False:
+        issues.append({
+            "type": "late_arrival",
+            "severity": "high",
+            "description": f"ETA {progress.get('eta')} is past the planned delivery time",
+            "suggested_action": "Notify the consignee of the revised ETA"
+        })
+
+    if progress.get("off_route"):
+        issues.append({
+            "type": "off_route",
+            "severity": "medium",
+            "description": f"Vehicle is {progress.get('off_route_km')} km from the planned route",
+            "suggested_action": "Confirm the diversion with the driver"
+        })
+
+    return issues
+
+
+def _project(origin: Point, destination: Point, position: Point) -> Tuple[float, float]:
+    """
+    Fraction of the way along origin -> destination (clamped to [0, 1]) and the
+    distance in km from the line, on a local equirectangular projection
+    """
+    scale = math.cos(math.radians((origin[0] + destination[0]) / 2))
+    ox, oy = origin[1] * scale, origin[0]
+    dx, dy = destination[1] * scale - ox, destination[0] - oy
+    px, py = position[1] * scale - ox, position[0] - oy
+
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return 1.0, haversine_km(origin, position)
+
+    t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+    cross_deg = math.hypot(px - t * dx, py - t * dy)
+    return t, cross_deg * 111.32
+
+
+# Shared instance fed by the telemetry endpoint and read by trip monitoring
+trip_progress_tracker = TripProgressTracker()
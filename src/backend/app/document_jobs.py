@@ -0,0 +1,241 @@
+"""
+Document jobs - background OCR jobs persisted in SQLite
+
+Uploads are stored as a job row and answered with the job id straight away; the
+OCR runs in a background task and the result is written back to the row for
+polling. Queued and interrupted jobs are picked up again on startup, and finished
+jobs are deleted once their TTL has passed.
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Any, Set
+
+from sqlalchemy import delete, func, select
+
+from .db import SessionLocal
+from .orm_models import DocumentJob
+
+try:
+    from agents.ocr_pool import OcrQueueFull
+except ImportError:
+    class OcrQueueFull(Exception):
+        retry_after_seconds = 1
+
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# A job interrupted this many times (e.g. by restarts mid-OCR) is given up on
+MAX_ATTEMPTS = 3
+
+# handler(document_type, document bytes, trip_id) -> extraction result dict
+JobHandler = Callable[[str, bytes, Optional[str]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting; callers should retry later (HTTP 429)"""
+
+
+class DocumentJobQueue:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl_hours: float = 24,
+        max_queued: int = 100,
+        concurrency: int = 4,
+        sweep_interval_seconds: float = 300
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_queued = max_queued
+        self.concurrency = concurrency
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.handler: Optional[JobHandler] = None
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    def submit(self, document_type: str, document: bytes, trip_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persist a job and schedule it (call from the event loop); returns the job status
+        """
+        with self.session_factory() as db:
+            queued = db.scalar(select(func.count()).select_from(DocumentJob).where(DocumentJob.status == QUEUED))
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} document jobs already queued")
+
+            job = DocumentJob(
+                id=str(uuid.uuid4()),
+                document_type=document_type,
+                trip_id=trip_id,
+                status=QUEUED,
+                document=document,
+                created_at=datetime.utcnow()
+            )
+            db.add(job)
+            db.commit()
+            status = self._to_dict(job)
+
+        self._schedule(status["job_id"])
+        return status
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            job = db.get(DocumentJob, job_id)
+            if job is None or (job.expires_at is not None and job.expires_at <= datetime.utcnow()):
+                return None
+            return self._to_dict(job)
+
+    def evict_expired(self) -> int:
+        """
+        Delete finished jobs whose TTL has passed
+        """
+        with self.session_factory() as db:
+            result = db.execute(delete(DocumentJob).where(DocumentJob.expires_at <= datetime.utcnow()))
+            db.commit()
+            return result.rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            counts = dict(db.execute(select(DocumentJob.status, func.count()).group_by(DocumentJob.status)).all())
+        return {
+            "jobs_by_status": counts,
+            "running_tasks": len(self._tasks),
+            "max_queued": self.max_queued,
+            "ttl_hours": self.ttl.total_seconds() / 3600
+        }
+
+    def start(self) -> int:
+        """
+        Resume jobs left queued or interrupted by a restart and start the TTL sweeper
+        (call from the app startup hook); returns the number of jobs resumed
+        """
+        with self.session_factory() as db:
+            pending = db.scalars(
+                select(DocumentJob)
+                .where(DocumentJob.status.in_((QUEUED, PROCESSING)))
+                .order_by(DocumentJob.created_at)
+            ).all()
+            resumed = []
+            for job in pending:
+                if job.status == PROCESSING and job.attempts >= MAX_ATTEMPTS:
+                    self._finish(job, FAILED, error="Job was interrupted too many times")
+                    continue
+                job.status = QUEUED
+                resumed.append(job.id)
+            db.commit()
+
+        for job_id in resumed:
+            self._schedule(job_id)
+        if self._sweep_task is None or self._sweep_task.done():
+            self._sweep_task = asyncio.get_running_loop().create_task(self._sweep_loop())
+        return len(resumed)
+
+    async def stop(self) -> None:
+        """
+        Cancel running work; interrupted jobs stay in the table and resume on the next start
+        """
+        tasks = list(self._tasks)
+        if self._sweep_task is not None:
+            tasks.append(self._sweep_task)
+            self._sweep_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _schedule(self, job_id: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        task = asyncio.get_running_loop().create_task(self._process(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, job_id: str) -> None:
+        async with self._semaphore:
+            with self.session_factory() as db:
+                job = db.get(DocumentJob, job_id)
+                if job is None or job.status != QUEUED:
+                    return
+                job.status = PROCESSING
+                job.started_at = datetime.utcnow()
+                job.attempts = (job.attempts or 0) + 1
+                db.commit()
+                document_type, document, trip_id = job.document_type, job.document, job.trip_id
+
+            status, result, error = FAILED, None, None
+            try:
+                if self.handler is None:
+                    raise RuntimeError("Document processing is not available")
+                while True:
+                    try:
+                        result = await self.handler(document_type, document, trip_id)
+                        break
+                    except OcrQueueFull as e:
+                        # The OCR pool is saturated by interactive uploads; wait our turn
+                        await asyncio.sleep(e.retry_after_seconds)
+                status = COMPLETED if result.get("success") else FAILED
+                error = None if result.get("success") else result.get("error")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e)
+
+            with self.session_factory() as db:
+                job = db.get(DocumentJob, job_id)
+                if job is not None:
+                    self._finish(job, status, result=result, error=error)
+                    db.commit()
+
+    def _finish(self, job: DocumentJob, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        job.status = status
+        job.result = json.dumps(result, default=str) if result is not None else None
+        job.error = error
+        job.document = None  # the upload is no longer needed once the job is done
+        job.completed_at = now
+        job.expires_at = now + self.ttl
+
+    async def _sweep_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                await loop.run_in_executor(None, self.evict_expired)
+            except Exception as e:
+                print(f"Document job sweep failed, will retry: {e}")
+
+    @staticmethod
+    def _to_dict(job: DocumentJob) -> Dict[str, Any]:
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "document_type": job.document_type,
+            "trip_id": job.trip_id,
+            "attempts": job.attempts or 0,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error
+        }
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return max(1, float(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# Shared queue used by the document job endpoints
+document_job_queue = DocumentJobQueue(
+    ttl_hours=_env_number("DOCUMENT_JOB_TTL_HOURS", 24),
+    max_queued=int(_env_number("DOCUMENT_JOB_MAX_QUEUED", 100)),
+    concurrency=int(_env_number("DOCUMENT_JOB_CONCURRENCY", 4))
+)
@@ -0,0 +1,158 @@
+"""
+Driver query builder - pushes driver search predicates into the database
+
+The same filter set can be applied to a Supabase (PostgREST) query or to a
+SQLAlchemy query on the local SQLite models, so only qualifying driver rows
+are ever fetched.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any
+
+# Supabase / Postgres indexes backing these predicates (run once in the SQL editor)
+SUPABASE_INDEX_DDL = """
+CREATE INDEX IF NOT EXISTS ix_drivers_available_rating ON drivers (is_available, rating DESC);
+CREATE INDEX IF NOT EXISTS ix_drivers_vehicle_type ON drivers (vehicle_type);
+CREATE INDEX IF NOT EXISTS ix_vehicles_driver_capacity ON vehicles (driver_id, capacity_tons);
+"""
+
+# Ids per IN (...) filter; longer id lists are queried in chunks so the request URL stays bounded
+IN_FILTER_CHUNK = 200
+
+
+@dataclass
+class DriverFilters:
+    is_available: Optional[bool] = None
+    min_rating: Optional[float] = None
+    vehicle_type: Optional[str] = None
+    min_capacity_tons: Optional[float] = None
+    driver_ids: Optional[List[str]] = None
+    ranked: bool = False
+    limit: Optional[int] = None
+
+
+class DriverQuery:
+    """
+    Fluent builder: DriverQuery().available().min_rating(4).vehicle_type("truck")
+    """
+
+    def __init__(self):
+        self.filters = DriverFilters()
+
+    def available(self, is_available: bool = True) -> "DriverQuery":
+        self.filters.is_available = is_available
+        return self
+
+    def min_rating(self, rating: Optional[float]) -> "DriverQuery":
+        self.filters.min_rating = rating
+        return self
+
+    def vehicle_type(self, vehicle_type: Optional[str]) -> "DriverQuery":
+        self.filters.vehicle_type = vehicle_type
+        return self
+
+    def min_capacity(self, capacity_tons: Optional[float]) -> "DriverQuery":
+        self.filters.min_capacity_tons = capacity_tons
+        return self
+
+    def ids(self, driver_ids: Optional[List[str]]) -> "DriverQuery":
+        """
+        Restrict to a known id set (e.g. drivers the presence store reports as available)
+        """
+        self.filters.driver_ids = [str(driver_id) for driver_id in driver_ids] if driver_ids is not None else None
+        return self
+
+    def ranked(self) -> "DriverQuery":
+        """
+        Highest rated drivers first
+        """
+        self.filters.ranked = True
+        return self
+
+    def limit(self, limit: Optional[int]) -> "DriverQuery":
+        self.filters.limit = limit
+        return self
+
+    def is_empty(self) -> bool:
+        """
+        True when the id restriction already rules out every row
+        """
+        return self.filters.driver_ids is not None and not self.filters.driver_ids
+
+    def fetch_supabase(self, supabase) -> List[Dict[str, Any]]:
+        if self.is_empty():
+            return []
+        f = self.filters
+        if f.driver_ids is None or len(f.driver_ids) <= IN_FILTER_CHUNK:
+            return self.apply_supabase(supabase).execute().data or []
+
+        rows: List[Dict[str, Any]] = []
+        for start in range(0, len(f.driver_ids), IN_FILTER_CHUNK):
+            chunk = f.driver_ids[start:start + IN_FILTER_CHUNK]
+            rows.extend(self.apply_supabase(supabase, chunk).execute().data or [])
+        # Each chunk is ordered and limited on its own; redo both over the union
+        if f.ranked:
+            rows.sort(key=lambda row: row.get("rating") or 0, reverse=True)
+        return rows[:f.limit] if f.limit else rows
+
+    def apply_supabase(self, supabase, driver_ids: Optional[List[str]] = None):
+        """
+        The filters as a PostgREST query; `driver_ids` overrides the id set (one chunk of it)
+        """
+        f = self.filters
+        driver_ids = f.driver_ids if driver_ids is None else driver_ids
+
+        # Capacity lives on the vehicle, so join it in and filter the embedded rows;
+        # !inner drops drivers without a qualifying vehicle server-side
+        if f.min_capacity_tons is not None:
+            query = supabase.table("drivers").select("*, vehicles!inner(capacity_tons)")
+            query = query.gte("vehicles.capacity_tons", f.min_capacity_tons)
+        else:
+            query = supabase.table("drivers").select("*")
+
+        if driver_ids is not None:
+            query = query.in_("id", driver_ids)
+        elif f.is_available is not None:
+            query = query.eq("is_available", f.is_available)
+
+        if f.min_rating is not None:
+            query = query.gte("rating", f.min_rating)
+        if f.vehicle_type:
+            query = query.eq("vehicle_type", f.vehicle_type)
+
+        if f.ranked:
+            query = query.order("rating", desc=True)
+        if f.limit:
+            query = query.limit(f.limit)
+
+        return query
+
+    def apply_sqlalchemy(self, db):
+        from sqlalchemy import select
+        from .orm_models import Driver, Vehicle
+
+        f = self.filters
+        query = db.query(Driver)
+
+        if f.min_capacity_tons is not None:
+            qualifying = select(Vehicle.driver_id).where(Vehicle.capacity_tons >= f.min_capacity_tons)
+            query = query.filter(Driver.id.in_(qualifying))
+
+        if f.driver_ids is not None:
+            query = query.filter(Driver.id.in_(f.driver_ids))
+        if f.is_available is not None:
+            if f.is_available:
+                query = query.filter(Driver.availability_status == 'available')
+            else:
+                query = query.filter(Driver.availability_status != 'available')
+
+        if f.min_rating is not None:
+            query = query.filter(Driver.rating >= f.min_rating)
+        if f.vehicle_type:
+            query = query.filter(Driver.vehicle_type == f.vehicle_type)
+
+        if f.ranked:
+            query = query.order_by(Driver.rating.desc())
+        if f.limit:
+            query = query.limit(f.limit)
+
+        return query
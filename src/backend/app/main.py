@@ -2,12 +2,24 @@ from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 import uvicorn
-from .routes import auth, drivers, trips, expenses, whatsapp, ai_agents
+from .routes import auth, drivers, trips, expenses, whatsapp, ai_agents, telemetry
 from .routes_sqlite import router as sqlite_router
 from .seed_db import init_db, seed_from_csvs
 from .db import SessionLocal
+from .document_jobs import document_job_queue
+from .ocr_cache import ocr_cache, OCR_CACHE_RETENTION_DAYS
 import os
 
+try:
+    from agents.presence_store import presence_store
+except ImportError:
+    presence_store = None
+
+try:
+    from agents.ocr_pool import ocr_pool
+except ImportError:
+    ocr_pool = None
+
 app = FastAPI(
     title="Logistics Automation API",
     description="AI-powered logistics management system",
@@ -36,6 +48,7 @@ app.include_router(trips.router, prefix="/api/v1", tags=["trips"])
 app.include_router(expenses.router, prefix="/api/v1", tags=["expenses"])
 app.include_router(whatsapp.router, prefix="/api/v1", tags=["whatsapp"])
 app.include_router(ai_agents.router, prefix="/api/v1", tags=["ai-agents"])
+app.include_router(telemetry.router, prefix="/api/v1", tags=["telemetry"])
 app.include_router(sqlite_router, prefix="/api/v1", tags=["sqlite-api"])  # expose under /api/v1
 app.include_router(sqlite_router, tags=["sqlite-api-root"])  # also at root for current frontend baseURL
 
@@ -66,3 +79,50 @@ def startup_seed():
             db.close()
         except Exception:
             pass
+
+
+@app.on_event("startup")
+async def startup_presence():
+    # Load driver presence into memory and start the write-behind flusher
+    if presence_store is None:
+        return
+    try:
+        from .database import get_supabase_client
+        presence_store.start(get_supabase_client)
+    except Exception as e:
+        print(f"[startup] Presence store warning: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_presence():
+    # Flush any presence updates still queued in memory
+    if presence_store is None:
+        return
+    try:
+        await presence_store.stop()
+    except Exception as e:
+        print(f"[shutdown] Presence flush warning: {e}")
+
+
+@app.on_event("startup")
+async def startup_document_jobs():
+    # Resume document jobs left queued or interrupted by the last shutdown
+    try:
+        resumed = document_job_queue.start()
+        if resumed:
+            print(f"[startup] Resumed {resumed} document jobs")
+        ocr_cache.purge(OCR_CACHE_RETENTION_DAYS)
+    except Exception as e:
+        print(f"[startup] Document job warning: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_document_jobs():
+    await document_job_queue.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_ocr_pool():
+    # Stop OCR worker processes
+    if ocr_pool is not None:
+        ocr_pool.shutdown()
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from datetime import datetime, timezone
+from ..position_buffer import BUFFER_EPOCH, BUFFER_END
+
+class TelemetryPoint(BaseModel):
+    vehicle_id: str
+    ts: datetime
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    speed: Optional[float] = Field(None, ge=0, description="Reported speed in km/h")
+    trip_id: Optional[str] = None  # lets a device bind itself to a trip explicitly
+
+    @field_validator("ts")
+    @classmethod
+    def ts_in_buffer_range(cls, ts: datetime) -> datetime:
+        # Rejected up front, before any point of the batch is written
+        utc = ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo is not None else ts
+        if not BUFFER_EPOCH <= utc < BUFFER_END:
+            raise ValueError(f"ts must be between {BUFFER_EPOCH.year} and {BUFFER_END.year}")
+        return ts
+
+class TelemetryBatch(BaseModel):
+    points: List[TelemetryPoint] = Field(..., min_length=1, max_length=10000)
@@ -0,0 +1,131 @@
+"""
+OCR cache - content-addressed OCR results (SHA-256 of the image bytes + pipeline version)
+
+An in-memory LRU of OcrDocument objects sits in front of the ocr_cache table, so a
+photo resent over WhatsApp or re-uploaded in the app is answered from memory (or
+one primary-key read) instead of another OCR run. Documents kept in memory also
+carry their memoized extraction fields, so repeat extractions are dict lookups.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .db import SessionLocal
+from .orm_models import OcrCacheEntry
+from agents.ocr_document import OcrDocument
+
+CacheKey = Tuple[str, str]
+
+
+def content_key(image_data: bytes, pipeline_version: str) -> CacheKey:
+    return hashlib.sha256(image_data).hexdigest(), pipeline_version
+
+
+class OcrResultCache:
+    def __init__(self, session_factory=SessionLocal, memory_entries: int = 512):
+        self.session_factory = session_factory
+        self.memory_entries = memory_entries
+
+        self._memory: "OrderedDict[CacheKey, OcrDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._store_hits = 0
+        self._misses = 0
+
+    def get(self, key: CacheKey) -> Optional[OcrDocument]:
+        with self._lock:
+            document = self._memory.get(key)
+            if document is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                document.from_cache = True
+                return document
+
+        with self.session_factory() as db:
+            entry = db.get(OcrCacheEntry, key)
+            if entry is None:
+                with self._lock:
+                    self._misses += 1
+                return None
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_hit_at = datetime.utcnow()
+            payload = entry.document
+            db.commit()
+
+        document = OcrDocument.from_dict(json.loads(payload), from_cache=True)
+        with self._lock:
+            self._store_hits += 1
+            self._remember(key, document)
+        return document
+
+    def put(self, key: CacheKey, document: OcrDocument) -> None:
+        payload = json.dumps(document.to_dict(), separators=(",", ":"))
+        with self.session_factory() as db:
+            statement = sqlite_insert(OcrCacheEntry).values(
+                sha256=key[0],
+                pipeline_version=key[1],
+                document=payload,
+                hits=0,
+                created_at=datetime.utcnow()
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["sha256", "pipeline_version"],
+                set_={"document": statement.excluded.document}
+            ))
+            db.commit()
+
+        with self._lock:
+            self._remember(key, document)
+
+    def purge(self, older_than_days: int) -> int:
+        """
+        Drop stored entries not created or hit within the window
+        """
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        with self.session_factory() as db:
+            result = db.execute(
+                delete(OcrCacheEntry)
+                .where(OcrCacheEntry.created_at < cutoff)
+                .where((OcrCacheEntry.last_hit_at.is_(None)) | (OcrCacheEntry.last_hit_at < cutoff))
+            )
+            db.commit()
+        return result.rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._memory_hits + self._store_hits + self._misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.memory_entries,
+                "memory_hits": self._memory_hits,
+                "store_hits": self._store_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._memory_hits + self._store_hits) / lookups, 3) if lookups else None
+            }
+
+    def _remember(self, key: CacheKey, document: OcrDocument) -> None:
+        self._memory[key] = document
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# Days an unused entry is kept in the ocr_cache table
+OCR_CACHE_RETENTION_DAYS = _env_int("OCR_CACHE_RETENTION_DAYS", 90)
+
+# Shared cache used by the document digitizer
+ocr_cache = OcrResultCache(memory_entries=_env_int("OCR_CACHE_MEMORY_ENTRIES", 512))
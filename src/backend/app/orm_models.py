@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Boolean, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .db import Base
@@ -22,6 +22,12 @@ class Driver(Base):
 
     trips = relationship('Trip', back_populates='driver')
 
+    __table_args__ = (
+        # Backs DriverQuery: availability + rating range, vehicle type equality
+        Index('ix_drivers_status_rating', 'availability_status', 'rating'),
+        Index('ix_drivers_vehicle_type', 'vehicle_type'),
+    )
+
 
 class Vehicle(Base):
     __tablename__ = 'vehicles'
@@ -42,6 +48,10 @@ class Vehicle(Base):
     driver = relationship('Driver')
     trips = relationship('Trip', back_populates='vehicle')
 
+    __table_args__ = (
+        Index('ix_vehicles_driver_capacity', 'driver_id', 'capacity_tons'),
+    )
+
 
 class Trip(Base):
     __tablename__ = 'trips'
@@ -90,3 +100,92 @@ class Expense(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     trip = relationship('Trip', back_populates='expenses')
+
+
+class TripDailyRollup(Base):
+    """
+    Per-day trip totals for one dimension value (a driver, a vehicle, a corridor
+    or the whole fleet). Maintained incrementally by app.rollups.
+    """
+    __tablename__ = 'trip_daily_rollups'
+
+    dimension = Column(String, primary_key=True)  # 'fleet' | 'driver' | 'vehicle' | 'corridor'
+    day = Column(Date, primary_key=True)
+    key = Column(String, primary_key=True)
+    trips = Column(Integer, default=0)
+    completed_trips = Column(Integer, default=0)
+    distance_km = Column(Float, default=0.0)
+    fuel_cost = Column(Float, default=0.0)
+    cargo_value_inr = Column(Float, default=0.0)
+
+
+class ExpenseDailyRollup(Base):
+    """
+    Per-day expense totals by expense_type. Maintained incrementally by app.rollups.
+    """
+    __tablename__ = 'expense_daily_rollups'
+
+    day = Column(Date, primary_key=True)
+    expense_type = Column(String, primary_key=True)
+    expenses = Column(Integer, default=0)
+    amount_inr = Column(Float, default=0.0)
+
+
+class DocumentJob(Base):
+    """
+    Background OCR job for an uploaded document. Managed by app.document_jobs;
+    the upload is kept until the job finishes so queued work survives a restart.
+    """
+    __tablename__ = 'document_jobs'
+
+    id = Column(String, primary_key=True)
+    document_type = Column(String, nullable=False)
+    trip_id = Column(String, nullable=True)
+    status = Column(String, nullable=False, default='queued')  # queued | processing | completed | failed
+    document = Column(LargeBinary, nullable=True)
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_document_jobs_status', 'status'),
+        Index('ix_document_jobs_expires_at', 'expires_at'),
+    )
+
+
+class OcrCacheEntry(Base):
+    """
+    OCR output for one image under one pipeline version, keyed by the SHA-256 of
+    the image bytes. Managed by app.ocr_cache.
+    """
+    __tablename__ = 'ocr_cache'
+
+    sha256 = Column(String, primary_key=True)
+    pipeline_version = Column(String, primary_key=True)
+    document = Column(Text, nullable=False)  # JSON from OcrDocument.to_dict()
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, nullable=True)
+
+
+class ReceiptFingerprint(Base):
+    """
+    Perceptual hash (64-bit dHash, stored signed) of a processed receipt image, its
+    OCRed amount / date / number and the expense created from it, for near-duplicate
+    detection. Indexed in memory by app.receipt_fingerprints.
+    """
+    __tablename__ = 'receipt_fingerprints'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dhash = Column(Integer, nullable=False)
+    sha256 = Column(String, nullable=False, unique=True)
+    amount = Column(Float, nullable=True)
+    receipt_date = Column(String, nullable=True)
+    receipt_number = Column(String, nullable=True)
+    trip_id = Column(String, nullable=True)
+    expense_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,220 @@
+"""
+Position buffer - recent vehicle positions in preallocated NumPy ring buffers
+
+Each vehicle gets one fixed-size structured array (ts int32, lat/lng/speed float32,
+16 bytes per point), so live monitoring keeps the last few hours of points without
+per-point Python objects. Appends are O(1); window queries are a searchsorted over
+the chronologically ordered view. Total memory is bounded by
+points_per_vehicle x max_vehicles; the least recently updated vehicle is evicted
+when a new one arrives at the limit.
+
+Configuration (environment):
+    TELEMETRY_BUFFER_POINTS_PER_VEHICLE  default 2880 (8 hours at one point / 10 s)
+    TELEMETRY_BUFFER_MAX_VEHICLES        default 5000
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterable
+
+import numpy as np
+
+POSITION_DTYPE = np.dtype([
+    ("ts", np.int32),
+    ("lat", np.float32),
+    ("lng", np.float32),
+    ("speed", np.float32)
+])
+
+# Timestamps are stored as int32 seconds from this epoch (good until 2088)
+BUFFER_EPOCH = datetime(2020, 1, 1)
+BUFFER_END = BUFFER_EPOCH + timedelta(seconds=int(np.iinfo(np.int32).max))
+
+
+def to_buffer_ts(ts: datetime) -> int:
+    return int((ts - BUFFER_EPOCH).total_seconds())
+
+
+class PositionRingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=POSITION_DTYPE)
+        self._head = 0  # next write slot
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return int(self._data["ts"][(self._head - 1) % self.capacity])
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
+
+    def append(self, ts: int, lat: float, lng: float, speed: float) -> None:
+        self._data[self._head] = (ts, lat, lng, speed)
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, rows: np.ndarray) -> None:
+        """
+        Append a chronologically ordered structured array in at most two slice copies
+        """
+        if len(rows) >= self.capacity:
+            self._data[:] = rows[-self.capacity:]
+            self._head = 0
+            self._size = self.capacity
+            return
+
+        first = min(len(rows), self.capacity - self._head)
+        self._data[self._head:self._head + first] = rows[:first]
+        self._data[:len(rows) - first] = rows[first:]
+        self._head = (self._head + len(rows)) % self.capacity
+        self._size = min(self._size + len(rows), self.capacity)
+
+    def ordered(self) -> np.ndarray:
+        """
+        Oldest-first view of the stored points (a copy only when the buffer has wrapped)
+        """
+        if self._size < self.capacity:
+            return self._data[:self._size]
+        if self._head == 0:
+            return self._data
+        return np.concatenate((self._data[self._head:], self._data[:self._head]))
+
+    def window(self, start_ts: int, end_ts: int) -> np.ndarray:
+        ordered = self.ordered()
+        ts = ordered["ts"]
+        lo = np.searchsorted(ts, start_ts, side="left")
+        hi = np.searchsorted(ts, end_ts, side="right")
+        return ordered[lo:hi]
+
+
+class PositionBufferStore:
+    def __init__(self, points_per_vehicle: int = 2880, max_vehicles: int = 5000):
+        self.points_per_vehicle = points_per_vehicle
+        self.max_vehicles = max_vehicles
+
+        self._buffers: "OrderedDict[str, PositionRingBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._out_of_order = 0
+        self._appended = 0
+
+    def append_batch(self, points: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append points (vehicle_id, ts, lat, lng, speed); points older than a
+        vehicle's newest buffered point are dropped so each buffer stays sorted
+        """
+        by_vehicle: Dict[str, List[tuple]] = {}
+        for point in points:
+            if not BUFFER_EPOCH <= point["ts"] < BUFFER_END:
+                continue  # not representable as int32 seconds; the request model rejects these
+            by_vehicle.setdefault(str(point["vehicle_id"]), []).append((
+                to_buffer_ts(point["ts"]), point["lat"], point["lng"],
+                point.get("speed") if point.get("speed") is not None else np.nan
+            ))
+
+        appended = 0
+        with self._lock:
+            for vehicle_id, rows in by_vehicle.items():
+                array = np.array(rows, dtype=POSITION_DTYPE)
+                array = array[np.argsort(array["ts"], kind="stable")]
+
+                buffer = self._buffer_for(vehicle_id)
+                if buffer.last_ts is not None:
+                    fresh = array["ts"] > buffer.last_ts
+                    self._out_of_order += int(len(array) - fresh.sum())
+                    array = array[fresh]
+
+                if len(array) == 1:
+                    buffer.append(*array[0].tolist())
+                elif len(array):
+                    buffer.extend(array)
+                appended += len(array)
+
+            self._appended += appended
+        return appended
+
+    def window(self, vehicle_id: str, start: datetime, end: datetime) -> Optional[np.ndarray]:
+        with self._lock:
+            buffer = self._buffers.get(str(vehicle_id))
+            if buffer is None:
+                return None
+            return buffer.window(to_buffer_ts(start), to_buffer_ts(end)).copy()
+
+    def latest(self, vehicle_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            buffer = self._buffers.get(str(vehicle_id))
+            if buffer is None or not len(buffer):
+                return None
+            return rows_to_dicts(buffer.ordered()[-1:])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            points = sum(len(buffer) for buffer in self._buffers.values())
+            allocated = sum(buffer._data.nbytes for buffer in self._buffers.values())
+            return {
+                "vehicles": len(self._buffers),
+                "points": points,
+                "points_per_vehicle": self.points_per_vehicle,
+                "max_vehicles": self.max_vehicles,
+                "bytes_per_point": POSITION_DTYPE.itemsize,
+                "allocated_bytes": allocated,
+                "memory_limit_bytes": self.points_per_vehicle * self.max_vehicles * POSITION_DTYPE.itemsize,
+                "fill_ratio": round(points / (len(self._buffers) * self.points_per_vehicle), 3) if self._buffers else 0.0,
+                "points_appended": self._appended,
+                "out_of_order_dropped": self._out_of_order,
+                "vehicles_evicted": self._evictions
+            }
+
+    def _buffer_for(self, vehicle_id: str) -> PositionRingBuffer:
+        buffer = self._buffers.get(vehicle_id)
+        if buffer is not None:
+            self._buffers.move_to_end(vehicle_id)
+            return buffer
+
+        if len(self._buffers) >= self.max_vehicles:
+            # Reuse the stalest vehicle's allocation rather than growing past the limit
+            _, buffer = self._buffers.popitem(last=False)
+            buffer.clear()
+            self._evictions += 1
+        else:
+            buffer = PositionRingBuffer(self.points_per_vehicle)
+
+        self._buffers[vehicle_id] = buffer
+        return buffer
+
+
+def rows_to_dicts(rows: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Structured rows -> JSON-ready dicts (vectorised conversion, one tolist per column)
+    """
+    ts = (np.datetime64(BUFFER_EPOCH, "s") + rows["ts"].astype("timedelta64[s]")).astype(str).tolist()
+    speed = rows["speed"]
+    speeds = np.where(np.isnan(speed), None, np.round(speed, 1).astype(object)).tolist()
+    lats = np.round(rows["lat"].astype(np.float64), 6).tolist()
+    lngs = np.round(rows["lng"].astype(np.float64), 6).tolist()
+    return [
+        {"ts": t, "lat": lat, "lng": lng, "speed": s}
+        for t, lat, lng, s in zip(ts, lats, lngs, speeds)
+    ]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# Shared instance fed by the telemetry endpoint
+position_buffer = PositionBufferStore(
+    points_per_vehicle=_env_int("TELEMETRY_BUFFER_POINTS_PER_VEHICLE", 2880),
+    max_vehicles=_env_int("TELEMETRY_BUFFER_MAX_VEHICLES", 5000)
+)
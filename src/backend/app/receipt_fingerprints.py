@@ -0,0 +1,218 @@
+"""
+Receipt fingerprints - near-duplicate receipt detection on 64-bit perceptual hashes
+
+Two photos of the same receipt hash to nearby dHashes, so "is this a re-submitted
+receipt" is "is there a stored hash within Hamming distance k". A multi-index hash
+table answers that without scanning every receipt: the 64 bits are split into
+four 16-bit chunks, and by pigeonhole any hash within distance k agrees with the
+query to within floor(k / 4) bits on at least one chunk. Each query probes only
+those chunk neighbourhoods and verifies the few candidates with a popcount.
+
+A whole-photo dHash encodes the receipt's layout, not its content: two receipts
+from one vendor's template (or any two shot on the same table) hash alike. A
+hash match is therefore only a candidate; it counts as the same receipt when the
+OCRed amount agrees and so does the date or the receipt number.
+"""
+import itertools
+import os
+import threading
+from typing import Dict, List, Optional, Any, Set
+
+from sqlalchemy import select
+
+from .db import SessionLocal
+from .orm_models import ReceiptFingerprint
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def fields_agree(stored: Dict[str, Any], fields: Dict[str, Any]) -> bool:
+    """
+    Whether two receipts' OCRed fields say they are the same receipt: equal
+    amounts, plus an equal date or receipt number (missing fields never agree)
+    """
+    if stored.get("amount") is None or fields.get("amount") is None:
+        return False
+    if abs(float(stored["amount"]) - float(fields["amount"])) >= 0.01:
+        return False
+    return any(
+        stored.get(key) is not None and _normalized(stored[key]) == _normalized(fields.get(key))
+        for key in ("receipt_date", "receipt_number")
+    )
+
+
+def _normalized(value: Any) -> Optional[str]:
+    return "".join(ch for ch in str(value).upper() if ch.isalnum()) if value is not None else None
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+class MultiIndexHashTable:
+    def __init__(self):
+        self._hashes: Dict[int, int] = {}
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(CHUNKS)]
+        # Bit flips within one chunk, by radius, so probes are not rebuilt per query
+        self._flips: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, item_id: int, value: int) -> None:
+        self._hashes[item_id] = value
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(item_id)
+
+    def query(self, value: int, max_distance: int) -> List[tuple]:
+        """
+        (item_id, distance) for every stored hash within max_distance, nearest first
+        """
+        radius = max_distance // CHUNKS
+        seen: Set[int] = set()
+        matches = []
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for flip in self._flips_within(radius):
+                for item_id in table.get(chunk ^ flip, ()):
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                    distance = hamming(self._hashes[item_id], value)
+                    if distance <= max_distance:
+                        matches.append((item_id, distance))
+        return sorted(matches, key=lambda match: match[1])
+
+    @staticmethod
+    def _chunks(value: int) -> List[int]:
+        return [(value >> (i * CHUNK_BITS)) & _CHUNK_MASK for i in range(CHUNKS)]
+
+    def _flips_within(self, radius: int) -> List[int]:
+        if radius not in self._flips:
+            flips = []
+            for r in range(radius + 1):
+                for bits in itertools.combinations(range(CHUNK_BITS), r):
+                    flips.append(sum(1 << bit for bit in bits))
+            self._flips[radius] = flips
+        return self._flips[radius]
+
+
+class ReceiptFingerprintIndex:
+    """
+    receipt_fingerprints rows mirrored into a MultiIndexHashTable (loaded on first use)
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_distance: int = 6):
+        self.session_factory = session_factory
+        self.max_distance = max_distance
+
+        self._table = MultiIndexHashTable()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._by_sha: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def find_near(self, dhash: int, max_distance: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Stored receipts within Hamming distance of dhash, nearest first
+        """
+        self._ensure_loaded()
+        with self._lock:
+            matches = self._table.query(dhash, self.max_distance if max_distance is None else max_distance)
+            return [{**self._rows[item_id], "distance": distance} for item_id, distance in matches]
+
+    def register(self, dhash: int, sha256: str, trip_id: Optional[str] = None,
+                 fields: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Remember a processed receipt and its OCRed fields (amount, receipt_date,
+        receipt_number); re-registering the same bytes returns the existing id
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if sha256 in self._by_sha:
+                return self._by_sha[sha256]
+
+        fields = fields or {}
+        with self.session_factory() as db:
+            row = ReceiptFingerprint(
+                dhash=_to_signed(dhash), sha256=sha256, trip_id=trip_id,
+                amount=fields.get("amount"),
+                receipt_date=fields.get("receipt_date"),
+                receipt_number=fields.get("receipt_number")
+            )
+            db.add(row)
+            db.commit()
+            with self._lock:
+                self._add(row)
+            return row.id
+
+    def attach_expense(self, fingerprint_id: int, expense_id: Any, trip_id: Any = None) -> None:
+        with self.session_factory() as db:
+            row = db.get(ReceiptFingerprint, fingerprint_id)
+            if row is None:
+                return
+            row.expense_id = str(expense_id)
+            if trip_id is not None:
+                row.trip_id = str(trip_id)
+            db.commit()
+            with self._lock:
+                if fingerprint_id in self._rows:
+                    self._rows[fingerprint_id].update(expense_id=row.expense_id, trip_id=row.trip_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "fingerprints": len(self._table),
+                "max_distance": self.max_distance
+            }
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self.session_factory() as db:
+            rows = db.scalars(select(ReceiptFingerprint)).all()
+            with self._lock:
+                if self._loaded:
+                    return
+                for row in rows:
+                    self._add(row)
+                self._loaded = True
+
+    def _add(self, row: ReceiptFingerprint) -> None:
+        if row.id in self._rows:
+            return
+        self._rows[row.id] = {
+            "fingerprint_id": row.id,
+            "sha256": row.sha256,
+            "trip_id": row.trip_id,
+            "expense_id": row.expense_id,
+            "amount": row.amount,
+            "receipt_date": row.receipt_date,
+            "receipt_number": row.receipt_number,
+            "seen_at": row.created_at.isoformat() if row.created_at else None
+        }
+        self._by_sha[row.sha256] = row.id
+        self._table.add(row.id, _to_unsigned(row.dhash))
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# Shared index used by the document digitizer
+receipt_fingerprints = ReceiptFingerprintIndex(max_distance=_env_int("RECEIPT_DUPLICATE_MAX_DISTANCE", 6))
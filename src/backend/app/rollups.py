@@ -0,0 +1,303 @@
+"""
+Daily analytics rollups - incrementally maintained per driver / vehicle / corridor / expense_type
+
+Every flush that inserts, updates or deletes a Trip or Expense computes the
+change in that row's contribution (old values from the attribute history,
+new values from the object) and applies it to the rollup tables with a
+single upsert per touched rollup row, inside the same transaction.
+
+Bulk writes that bypass the ORM unit of work (bulk_insert_mappings, raw SQL)
+are not seen by the hooks; run rebuild_rollups() after those.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+from sqlalchemy import event, func, literal, select, case, delete, insert, inspect as orm_inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .orm_models import Trip, Expense, TripDailyRollup, ExpenseDailyRollup
+
+TRIP_DIMENSIONS = ("fleet", "driver", "vehicle", "corridor")
+FLEET_KEY = "all"
+UNCATEGORIZED = "other"
+
+_TRIP_FIELDS = (
+    "driver_id", "vehicle_id", "pickup_location", "delivery_location", "pickup_date", "created_at",
+    "status", "distance_km", "actual_fuel_cost", "estimated_fuel_cost", "cargo_value_inr"
+)
+_EXPENSE_FIELDS = ("expense_type", "amount_inr", "expense_date", "created_at")
+
+_PENDING_KEY = "rollup_deltas"
+
+
+def corridor_key(origin: Optional[str], destination: Optional[str]) -> Optional[str]:
+    if not origin or not destination:
+        return None
+    return f"{origin} -> {destination}"
+
+
+def _day(primary: Optional[date], created_at: Optional[datetime]) -> date:
+    # created_at is filled in by the column default at INSERT, after the hook runs
+    if primary is not None:
+        return primary
+    return (created_at or datetime.utcnow()).date()
+
+
+def _trip_contributions(v: Dict[str, Any]) -> List[Tuple[Tuple[str, date, str], Dict[str, float]]]:
+    fuel_cost = v["actual_fuel_cost"] if v["actual_fuel_cost"] is not None else v["estimated_fuel_cost"]
+    measures = {
+        "trips": 1,
+        "completed_trips": 1 if v["status"] == "completed" else 0,
+        "distance_km": v["distance_km"] or 0.0,
+        "fuel_cost": fuel_cost or 0.0,
+        "cargo_value_inr": v["cargo_value_inr"] or 0.0
+    }
+    day = _day(v["pickup_date"], v["created_at"])
+    keys = (
+        ("fleet", FLEET_KEY),
+        ("driver", v["driver_id"]),
+        ("vehicle", v["vehicle_id"]),
+        ("corridor", corridor_key(v["pickup_location"], v["delivery_location"]))
+    )
+    return [((dimension, day, key), measures) for dimension, key in keys if key]
+
+
+def _expense_contributions(v: Dict[str, Any]) -> List[Tuple[Tuple[date, str], Dict[str, float]]]:
+    day = _day(v["expense_date"], v["created_at"])
+    return [((day, v["expense_type"] or UNCATEGORIZED), {"expenses": 1, "amount_inr": v["amount_inr"] or 0.0})]
+
+
+def _current_values(obj, fields) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in fields}
+
+
+def _previous_values(obj, fields) -> Dict[str, Any]:
+    # history.deleted holds the old value even when the attribute was set on an
+    # expired instance (the default after commit): see _keep_old_value
+    state = orm_inspect(obj)
+    values = {}
+    for name in fields:
+        history = state.attrs[name].history
+        values[name] = history.deleted[0] if history.deleted else getattr(obj, name)
+    return values
+
+
+class _RollupDeltas:
+    def __init__(self):
+        self.trips: Dict[Tuple[str, date, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.expenses: Dict[Tuple[date, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def add(self, target, contributions, sign: int) -> None:
+        for pk, measures in contributions:
+            bucket = target[pk]
+            for name, value in measures.items():
+                bucket[name] += sign * value
+
+    def collect(self, obj, sign_old: bool, sign_new: bool) -> None:
+        if isinstance(obj, Trip):
+            fields, contributions, target = _TRIP_FIELDS, _trip_contributions, self.trips
+        elif isinstance(obj, Expense):
+            fields, contributions, target = _EXPENSE_FIELDS, _expense_contributions, self.expenses
+        else:
+            return
+
+        if sign_old:
+            self.add(target, contributions(_previous_values(obj, fields)), -1)
+        if sign_new:
+            self.add(target, contributions(_current_values(obj, fields)), +1)
+
+    def apply(self, connection) -> None:
+        for (dimension, day, key), measures in self.trips.items():
+            if not any(measures.values()):
+                continue
+            _upsert(connection, TripDailyRollup, {"dimension": dimension, "day": day, "key": key}, measures)
+        for (day, expense_type), measures in self.expenses.items():
+            if not any(measures.values()):
+                continue
+            _upsert(connection, ExpenseDailyRollup, {"day": day, "expense_type": expense_type}, measures)
+
+
+def _upsert(connection, model, pk: Dict[str, Any], measures: Dict[str, float]) -> None:
+    table = model.__table__
+    stmt = sqlite_insert(table).values(**pk, **measures)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(pk.keys()),
+        set_={name: table.c[name] + stmt.excluded[name] for name in measures}
+    )
+    connection.execute(stmt)
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    # Replace rather than reuse: deltas left behind by a failed flush were rolled back with it
+    deltas = session.info[_PENDING_KEY] = _RollupDeltas()
+    for obj in session.new:
+        deltas.collect(obj, sign_old=False, sign_new=True)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            deltas.collect(obj, sign_old=True, sign_new=True)
+    for obj in session.deleted:
+        deltas.collect(obj, sign_old=True, sign_new=False)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas is not None:
+        deltas.apply(session.connection())
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def register_rollup_hooks(target=Session) -> None:
+    """
+    Attach the maintenance hooks to a Session class or sessionmaker (idempotent)
+    """
+    if not event.contains(target, "before_flush", _before_flush):
+        event.listen(target, "before_flush", _before_flush)
+        event.listen(target, "after_flush", _after_flush)
+
+    # active_history loads the committed value before a tracked column is overwritten,
+    # so the flush can subtract the row's old contribution even on expired instances
+    for model, fields in ((Trip, _TRIP_FIELDS), (Expense, _EXPENSE_FIELDS)):
+        for name in fields:
+            attribute = getattr(model, name)
+            if not event.contains(attribute, "set", _keep_old_value):
+                event.listen(attribute, "set", _keep_old_value, active_history=True, retval=True)
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """
+    Backfill job: recompute every rollup row from the fact tables in SQL
+    """
+    day = func.coalesce(Trip.pickup_date, func.date(Trip.created_at))
+    fuel_cost = func.coalesce(Trip.actual_fuel_cost, Trip.estimated_fuel_cost, 0)
+    measures = (
+        func.count(Trip.id),
+        func.sum(case((Trip.status == 'completed', 1), else_=0)),
+        func.coalesce(func.sum(Trip.distance_km), 0),
+        func.sum(fuel_cost),
+        func.coalesce(func.sum(Trip.cargo_value_inr), 0)
+    )
+    columns = ["dimension", "day", "key", "trips", "completed_trips", "distance_km", "fuel_cost", "cargo_value_inr"]
+    corridor = Trip.pickup_location + literal(" -> ") + Trip.delivery_location
+
+    dimension_keys = {
+        "fleet": (literal(FLEET_KEY), None),
+        # "!= ''" also excludes NULL, matching the hooks' truthiness check
+        "driver": (Trip.driver_id, Trip.driver_id != ''),
+        "vehicle": (Trip.vehicle_id, Trip.vehicle_id != ''),
+        "corridor": (corridor, (Trip.pickup_location != '') & (Trip.delivery_location != ''))
+    }
+
+    db.execute(delete(TripDailyRollup))
+    db.execute(delete(ExpenseDailyRollup))
+
+    for dimension, (key, condition) in dimension_keys.items():
+        source = select(literal(dimension), day, key, *measures)
+        if condition is not None:
+            source = source.where(condition)
+        source = source.group_by(day, key)
+        db.execute(insert(TripDailyRollup).from_select(columns, source))
+
+    expense_day = func.coalesce(Expense.expense_date, func.date(Expense.created_at))
+    expense_type = func.coalesce(Expense.expense_type, UNCATEGORIZED)
+    db.execute(insert(ExpenseDailyRollup).from_select(
+        ["day", "expense_type", "expenses", "amount_inr"],
+        select(expense_day, expense_type, func.count(Expense.id), func.coalesce(func.sum(Expense.amount_inr), 0))
+        .group_by(expense_day, expense_type)
+    ))
+    db.commit()
+
+    return {
+        "trip_rollup_rows": db.query(TripDailyRollup).count(),
+        "expense_rollup_rows": db.query(ExpenseDailyRollup).count()
+    }
+
+
+def ensure_rollups(db: Session) -> bool:
+    """
+    Backfill once for databases created before the rollup tables existed
+    """
+    if db.query(TripDailyRollup).first() or db.query(ExpenseDailyRollup).first():
+        return False
+    if not (db.query(Trip).first() or db.query(Expense).first()):
+        return False
+    rebuild_rollups(db)
+    return True
+
+
+def trip_rollup_totals(
+    db: Session,
+    dimension: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Totals per key of one dimension over a date range, busiest first
+    """
+    trips = func.sum(TripDailyRollup.trips)
+    query = db.query(
+        TripDailyRollup.key,
+        trips,
+        func.sum(TripDailyRollup.completed_trips),
+        func.sum(TripDailyRollup.distance_km),
+        func.sum(TripDailyRollup.fuel_cost),
+        func.sum(TripDailyRollup.cargo_value_inr)
+    ).filter(TripDailyRollup.dimension == dimension)
+
+    if start_date:
+        query = query.filter(TripDailyRollup.day >= start_date)
+    if end_date:
+        query = query.filter(TripDailyRollup.day <= end_date)
+
+    query = query.group_by(TripDailyRollup.key).having(trips > 0).order_by(trips.desc())
+    if limit:
+        query = query.limit(limit)
+
+    return [
+        {
+            "key": key,
+            "trips": int(n or 0),
+            "completed_trips": int(done or 0),
+            "distance_km": round(float(distance or 0), 2),
+            "fuel_cost": round(float(cost or 0), 2),
+            "cargo_value_inr": round(float(value or 0), 2)
+        }
+        for key, n, done, distance, cost, value in query
+    ]
+
+
+def expense_rollup_totals(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[str, float]:
+    """
+    Total amount per expense_type over a date range
+    """
+    query = db.query(ExpenseDailyRollup.expense_type, func.sum(ExpenseDailyRollup.amount_inr))
+    if start_date:
+        query = query.filter(ExpenseDailyRollup.day >= start_date)
+    if end_date:
+        query = query.filter(ExpenseDailyRollup.day <= end_date)
+    query = query.group_by(ExpenseDailyRollup.expense_type).having(func.sum(ExpenseDailyRollup.expenses) > 0)
+    return {expense_type: float(amount or 0) for expense_type, amount in query}
+
+
+register_rollup_hooks()
+
+
+if __name__ == "__main__":
+    from .db import SessionLocal
+    from .seed_db import init_db
+
+    init_db()
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt rollups: {rebuild_rollups(session)}")
+    finally:
+        session.close()
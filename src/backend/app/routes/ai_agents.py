@@ -1,9 +1,53 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Optional, Any
 from uuid import UUID
+from datetime import datetime
+import asyncio
+import json
 import sys
 import os
 
+try:
+    from agents.circuit_breaker import circuit_breakers
+except ImportError:
+    circuit_breakers = {}
+
+try:
+    from agents.trip_feed import trip_feed_hub
+except ImportError:
+    trip_feed_hub = None
+
+try:
+    from agents.ocr_pool import ocr_pool, OcrQueueFull
+    from agents.ocr_pdf import is_pdf
+except ImportError:
+    ocr_pool = None
+
+    def is_pdf(data: bytes) -> bool:
+        return False
+
+    class OcrQueueFull(Exception):
+        retry_after_seconds = 1
+
+try:
+    from ..document_jobs import document_job_queue, JobQueueFull
+except ImportError:
+    document_job_queue = None
+
+try:
+    from ..ocr_cache import ocr_cache
+except ImportError:
+    ocr_cache = None
+
+try:
+    from ..receipt_fingerprints import receipt_fingerprints
+except ImportError:
+    receipt_fingerprints = None
+
+# Idle interval after which live feeds send a keepalive
+LIVE_FEED_KEEPALIVE_SECONDS = 15
+
 # Dynamic agent loading function
 def load_agents():
     """Dynamically load AI agents with proper path handling"""
@@ -83,13 +127,26 @@ else:
     document_agent = None
 
 @router.post("/trips/create-intelligent")
-async def create_intelligent_trip(trip_request: Dict[str, Any]):
+async def create_intelligent_trip(trip_request: Dict[str, Any], stream: bool = False):
     """
     Create a trip with full AI assistance - route optimization, driver assignment, cost estimation
+
+    With ?stream=true the response is NDJSON: one line per step (route, driver,
+    acceptance, departure) as soon as it completes, then a final summary line.
     """
     if not AGENTS_AVAILABLE or not trip_intelligence:
         raise HTTPException(status_code=503, detail="AI agents not available")
     
+    if stream:
+        if not trip_request.get("pickup_location") or not trip_request.get("destination"):
+            raise HTTPException(status_code=400, detail="Pickup location and destination are required")
+        
+        async def ndjson_lines():
+            async for event in trip_intelligence.stream_intelligent_trip(trip_request):
+                yield json.dumps(event, default=str) + "\n"
+        
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+    
     try:
         result = await trip_intelligence.create_intelligent_trip(trip_request)
         
@@ -101,6 +158,25 @@ async def create_intelligent_trip(trip_request: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI trip creation failed: {str(e)}")
 
+@router.get("/trips/monitor-batch")
+async def monitor_fleet(
+    status: Optional[str] = Query(None, description="Comma-separated trip statuses (defaults to all active)"),
+    limit: int = Query(1000, ge=1, le=5000)
+):
+    """
+    Compact progress and issue summary for every active trip in one call
+    """
+    if not AGENTS_AVAILABLE or not trip_intelligence:
+        raise HTTPException(status_code=503, detail="AI agents not available")
+    
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+    result = await trip_intelligence.monitor_fleet(statuses=statuses, limit=limit)
+    
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error", "Fleet monitoring failed"))
+    
+    return result
+
 @router.get("/trips/{trip_id}/monitor")
 async def monitor_trip_progress(trip_id: UUID):
     """
@@ -120,6 +196,83 @@ async def monitor_trip_progress(trip_id: UUID):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Trip monitoring failed: {str(e)}")
 
+def _ocr_busy(error: "OcrQueueFull") -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Document processing is at capacity, please retry shortly",
+        headers={"Retry-After": str(error.retry_after_seconds)}
+    )
+
+def _parse_trip_ids(trip_ids: str) -> List[str]:
+    ids = [trip_id.strip() for trip_id in trip_ids.split(",") if trip_id.strip()]
+    if not ids:
+        raise HTTPException(status_code=400, detail="trip_ids must list at least one trip")
+    return ids
+
+@router.get("/trips/live/stream")
+async def stream_trip_updates(trip_ids: str = Query(..., description="Comma-separated trip IDs")):
+    """
+    Server-Sent Events feed of live trip progress.
+
+    Sends a full snapshot per trip on connect, then progress/issue/ETA deltas as
+    telemetry changes them, and a closed event when a trip stops being tracked.
+    """
+    if trip_feed_hub is None:
+        raise HTTPException(status_code=503, detail="Live trip feed not available")
+    ids = _parse_trip_ids(trip_ids)
+
+    async def events():
+        subscription = trip_feed_hub.subscribe(ids)
+        try:
+            while True:
+                message = await subscription.next_message(LIVE_FEED_KEEPALIVE_SECONDS)
+                yield f"data: {message}\n\n" if message is not None else ": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/trips/live")
+async def live_trip_updates(websocket: WebSocket, trip_ids: str = ""):
+    """
+    WebSocket feed of live trip progress (same messages as the SSE feed).
+
+    Clients may change their trips at any time by sending
+    {"subscribe": [...]} or {"unsubscribe": [...]}.
+    """
+    await websocket.accept()
+    if trip_feed_hub is None:
+        await websocket.close(code=1013, reason="Live trip feed not available")
+        return
+
+    subscription = trip_feed_hub.subscribe([t.strip() for t in trip_ids.split(",") if t.strip()])
+
+    async def receive_commands():
+        while True:
+            command = await websocket.receive_json()
+            if isinstance(command, dict):
+                subscription.subscribe(command.get("subscribe") or [])
+                subscription.unsubscribe(command.get("unsubscribe") or [])
+
+    async def send_updates():
+        while True:
+            message = await subscription.next_message(LIVE_FEED_KEEPALIVE_SECONDS)
+            await websocket.send_text(message if message is not None else '{"event": "keepalive"}')
+
+    tasks = [asyncio.ensure_future(receive_commands()), asyncio.ensure_future(send_updates())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
+
 @router.post("/trips/{trip_id}/process-document")
 async def process_trip_document(
     trip_id: UUID,
@@ -144,6 +297,8 @@ async def process_trip_document(
         
         return result
     
+    except OcrQueueFull as e:
+        raise _ocr_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Document processing failed: {str(e)}")
 
@@ -320,17 +475,35 @@ async def extract_receipt_details(document: UploadFile = File(...)):
         
         return result
     
+    except OcrQueueFull as e:
+        raise _ocr_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Receipt extraction failed: {str(e)}")
 
 @router.post("/documents/extract-freight-bill")
-async def extract_freight_bill(document: UploadFile = File(...)):
+async def extract_freight_bill(document: UploadFile = File(...), stream: bool = False):
     """
     Extract details from freight bills using OCR
+
+    Multi-page PDFs are OCRed page by page in parallel and the fields merged.
+    With ?stream=true a PDF's response is NDJSON: one line per page as soon as it
+    is read (its fields and the fields merged so far), then the final result line.
     """
     try:
         image_data = await document.read()
         
+        if stream and is_pdf(image_data):
+            events = document_agent.stream_freight_bill_pages(image_data)
+            # The first page is awaited here so a full OCR queue is still a 429, not a broken stream
+            first = await events.__anext__()
+            
+            async def ndjson_lines():
+                yield json.dumps(first, default=str) + "\n"
+                async for event in events:
+                    yield json.dumps(event, default=str) + "\n"
+            
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+        
         result = await document_agent.extract_freight_bill_details(image_data)
         
         if not result.get("success"):
@@ -338,9 +511,71 @@ async def extract_freight_bill(document: UploadFile = File(...)):
         
         return result
     
+    except OcrQueueFull as e:
+        raise _ocr_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Freight bill extraction failed: {str(e)}")
 
+DOCUMENT_JOB_TYPES = ("expense_receipt", "freight_bill", "freight_amount")
+
+async def _run_document_job(document_type: str, image_data: bytes, trip_id: Optional[str]) -> Dict[str, Any]:
+    """Background handler for document jobs; same extraction as the synchronous endpoints"""
+    if trip_id and trip_intelligence:
+        return await trip_intelligence.process_trip_document(
+            trip_id=UUID(trip_id),
+            document_type=document_type,
+            image_data=image_data
+        )
+    if not document_agent:
+        return {"success": False, "error": "Document digitizer not available"}
+    if document_type == "expense_receipt":
+        return await document_agent.process_expense_receipt(image_data)
+    if document_type == "freight_bill":
+        return await document_agent.extract_freight_bill_details(image_data)
+    return await document_agent.extract_freight_amount(image_data)
+
+if document_job_queue is not None:
+    document_job_queue.handler = _run_document_job
+
+@router.post("/documents/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_document_job(
+    document_type: str = Form("expense_receipt"),
+    trip_id: Optional[UUID] = Form(None),
+    document: UploadFile = File(...)
+):
+    """
+    Queue a receipt / freight bill for OCR and return a job id straight away.
+    Poll GET /ai/documents/jobs/{job_id} for the status and result.
+    """
+    if document_job_queue is None:
+        raise HTTPException(status_code=503, detail="Document jobs not available")
+    if document_type not in DOCUMENT_JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"document_type must be one of {', '.join(DOCUMENT_JOB_TYPES)}")
+    
+    image_data = await document.read()
+    if not image_data:
+        raise HTTPException(status_code=400, detail="Empty document")
+    
+    try:
+        job = document_job_queue.submit(document_type, image_data, str(trip_id) if trip_id else None)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    
+    return {**job, "status_url": f"/api/v1/ai/documents/jobs/{job['job_id']}"}
+
+@router.get("/documents/jobs/{job_id}")
+async def get_document_job(job_id: str):
+    """
+    Status of a document job, with the extraction result once it has completed
+    """
+    if document_job_queue is None:
+        raise HTTPException(status_code=503, detail="Document jobs not available")
+    
+    job = document_job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Document job not found or expired")
+    return job
+
 @router.post("/drivers/availability/update")
 async def update_driver_availability_ai(
     phone_number: str,
@@ -369,7 +604,9 @@ async def update_driver_availability_ai(
 async def get_available_drivers_ai(
     location: Optional[str] = None,
     radius_km: float = 50.0,
-    min_rating: float = 3.0
+    min_rating: float = 3.0,
+    vehicle_type: Optional[str] = None,
+    min_capacity_tons: Optional[float] = None
 ):
     """
     Get available drivers with AI-powered filtering and ranking
@@ -378,7 +615,9 @@ async def get_available_drivers_ai(
         result = await availability_agent.get_available_drivers(
             location=location,
             radius_km=radius_km,
-            min_rating=min_rating
+            min_rating=min_rating,
+            vehicle_type=vehicle_type,
+            min_capacity_tons=min_capacity_tons
         )
         
         return {
@@ -388,7 +627,9 @@ async def get_available_drivers_ai(
             "search_criteria": {
                 "location": location,
                 "radius_km": radius_km,
-                "min_rating": min_rating
+                "min_rating": min_rating,
+                "vehicle_type": vehicle_type,
+                "min_capacity_tons": min_capacity_tons
             },
             "timestamp": trip_intelligence.datetime.utcnow().isoformat()
         }
@@ -420,6 +661,30 @@ async def predict_driver_acceptance(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Acceptance prediction failed: {str(e)}")
 
+@router.post("/drivers/predict-acceptance-batch")
+async def predict_driver_acceptance_batch(pairs: List[Dict[str, Any]]):
+    """
+    Predict acceptance for many (driver_id, trip_details) pairs in one vectorized pass
+    """
+    if not AGENTS_AVAILABLE or not availability_agent:
+        raise HTTPException(status_code=503, detail="AI agents not available")
+    
+    if any("driver_id" not in pair for pair in pairs):
+        raise HTTPException(status_code=400, detail="Each pair requires a driver_id")
+    
+    try:
+        predictions = await availability_agent.predict_acceptance_batch(pairs)
+        
+        return {
+            "success": True,
+            "predictions": predictions,
+            "count": len(predictions),
+            "analysis_timestamp": datetime.utcnow().isoformat()
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch acceptance prediction failed: {str(e)}")
+
 @router.get("/health")
 async def ai_agents_health():
     """
@@ -433,6 +698,12 @@ async def ai_agents_health():
             "route_optimization": route_agent.name,
             "document_digitizer": document_agent.name
         },
+        "circuit_breakers": {name: breaker.stats() for name, breaker in circuit_breakers.items()},
+        "live_feed": trip_feed_hub.stats() if trip_feed_hub is not None else None,
+        "ocr_pool": ocr_pool.stats() if ocr_pool is not None else None,
+        "document_jobs": document_job_queue.stats() if document_job_queue is not None else None,
+        "ocr_cache": ocr_cache.stats() if ocr_cache is not None else None,
+        "receipt_fingerprints": receipt_fingerprints.stats() if receipt_fingerprints is not None else None,
         "capabilities": [
             "Intelligent trip creation",
             "Real-time trip monitoring",
@@ -5,6 +5,11 @@ from ..models.driver import Driver, DriverCreate, DriverUpdate
 from ..database import get_supabase_client
 from supabase import Client
 
+try:
+    from agents.presence_store import presence_store
+except ImportError:
+    presence_store = None
+
 router = APIRouter(prefix="/drivers", tags=["drivers"])
 
 @router.post("/", response_model=Driver, status_code=status.HTTP_201_CREATED)
@@ -23,6 +28,9 @@ async def create_driver(
                 detail="Failed to create driver"
             )
         
+        if presence_store is not None:
+            presence_store.track(result.data[0])
+        
         return Driver(**result.data[0])
     
     except Exception as e:
@@ -40,6 +48,14 @@ async def get_drivers(
 ):
     """Get all drivers with optional filtering"""
     try:
+        # Availability is authoritative in the presence store, which holds every driver
+        # row: filter and paginate there rather than sending its id list to the database
+        if is_available is not None and presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            driver_ids = presence_store.driver_ids(is_available=is_available)[skip:skip + limit]
+            drivers = [driver for driver in map(presence_store.get, driver_ids) if driver is not None]
+            return [Driver(**driver) for driver in drivers]
+        
         query = supabase.table("drivers").select("*")
         
         # Apply filters
@@ -48,8 +64,9 @@ async def get_drivers(
         
         # Apply pagination
         result = query.range(skip, skip + limit - 1).execute()
+        drivers = presence_store.overlay(result.data) if presence_store is not None else result.data
         
-        return [Driver(**driver) for driver in result.data]
+        return [Driver(**driver) for driver in drivers]
     
     except Exception as e:
         raise HTTPException(
@@ -72,7 +89,9 @@ async def get_driver(
                 detail="Driver not found"
             )
         
-        return Driver(**result.data[0])
+        drivers = presence_store.overlay(result.data) if presence_store is not None else result.data
+        
+        return Driver(**drivers[0])
     
     except HTTPException:
         raise
@@ -107,6 +126,10 @@ async def update_driver(
                 detail="Driver not found"
             )
         
+        if presence_store is not None:
+            # The admin's explicit availability / location edit wins over queued presence
+            presence_store.track(result.data[0], saved_fields=update_data.keys())
+        
         return Driver(**result.data[0])
     
     except HTTPException:
@@ -132,6 +155,9 @@ async def delete_driver(
                 detail="Driver not found"
             )
         
+        if presence_store is not None:
+            presence_store.forget(driver_id)
+        
         return {"message": "Driver deleted successfully"}
     
     except HTTPException:
@@ -151,13 +177,18 @@ async def update_driver_availability(
 ):
     """Update driver availability status (used by WhatsApp bot)"""
     try:
-        update_data = {"is_available": is_available}
-        if current_location:
-            update_data["current_location"] = current_location
-        
-        result = supabase.table("drivers").update(update_data).eq("id", str(driver_id)).execute()
-        
-        if not result.data:
+        if presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            driver = presence_store.set_presence(driver_id, is_available, current_location)
+        else:
+            update_data = {"is_available": is_available}
+            if current_location:
+                update_data["current_location"] = current_location
+            
+            result = supabase.table("drivers").update(update_data).eq("id", str(driver_id)).execute()
+            driver = result.data[0] if result.data else None
+        
+        if not driver:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Driver not found"
@@ -165,7 +196,7 @@ async def update_driver_availability(
         
         return {
             "message": f"Driver availability updated to {'available' if is_available else 'busy'}",
-            "driver": Driver(**result.data[0])
+            "driver": Driver(**driver)
         }
     
     except HTTPException:
@@ -14,6 +14,41 @@ try:
 except ImportError:
     availability_agent = None
 
+try:
+    from agents.pending_trip_index import pending_trip_index
+except ImportError:
+    pending_trip_index = None
+
+try:
+    from agents.acceptance_model import driver_feature_store
+except ImportError:
+    driver_feature_store = None
+
+try:
+    from agents.presence_store import presence_store
+except ImportError:
+    presence_store = None
+
+try:
+    from agents.availability_intent import availability_matcher
+except ImportError:
+    availability_matcher = None
+
+# Exact commands handled by the original router even though they carry a yes/no intent
+TRIP_COMMANDS = ["YES", "ACCEPT", "OK", "NO", "DECLINE", "REJECT"]
+
+def is_availability_message(message_text: str) -> bool:
+    """
+    True for FREE/BUSY style keywords and free-form status messages ("abhi khali hu")
+    """
+    if message_text in ["FREE", "AVAILABLE", "READY", "BUSY", "OCCUPIED", "NOT AVAILABLE"]:
+        return True
+    
+    if availability_matcher is None or message_text in TRIP_COMMANDS or message_text.startswith("LOCATION"):
+        return False
+    
+    return availability_matcher.classify(message_text) is not None
+
 async def process_whatsapp_message(
     from_number: str, 
     message_text: str, 
@@ -28,7 +63,7 @@ async def process_whatsapp_message(
         message_text = message_text.upper().strip()
         
         # Use AI agent for availability updates if available
-        if availability_agent and message_text in ["FREE", "AVAILABLE", "READY", "BUSY", "OCCUPIED", "NOT AVAILABLE"]:
+        if availability_agent and is_availability_message(message_text):
             result = await availability_agent.update_driver_availability(
                 phone_number=from_number,
                 status=message_text
@@ -112,6 +147,10 @@ async def get_driver_by_phone(phone_number: str, supabase: Client) -> Optional[D
     Get driver information by phone number
     """
     try:
+        if presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            return presence_store.get_by_phone(phone_number)
+        
         result = supabase.table("drivers").select("*").eq("phone", phone_number).execute()
         
         if result.data:
@@ -131,11 +170,16 @@ async def handle_driver_availability(
     Update driver availability status
     """
     try:
-        result = supabase.table("drivers").update({
-            "is_available": is_available
-        }).eq("id", driver_id).execute()
+        if presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            updated = presence_store.set_presence(driver_id, is_available=is_available)
+        else:
+            result = supabase.table("drivers").update({
+                "is_available": is_available
+            }).eq("id", driver_id).execute()
+            updated = result.data
         
-        if result.data:
+        if updated:
             status = "available" if is_available else "busy"
             return f"✅ Your status has been updated to: {status.upper()}"
         else:
@@ -157,11 +201,16 @@ async def handle_location_update(
         if not location:
             return "❌ Please provide a location. Example: LOCATION Mumbai Central"
         
-        result = supabase.table("drivers").update({
-            "current_location": location
-        }).eq("id", driver_id).execute()
+        if presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            updated = presence_store.set_presence(driver_id, location=location)
+        else:
+            result = supabase.table("drivers").update({
+                "current_location": location
+            }).eq("id", driver_id).execute()
+            updated = result.data
         
-        if result.data:
+        if updated:
             return f"✅ Your location has been updated to: {location}"
         else:
             return "❌ Failed to update your location. Please try again."
@@ -210,6 +259,10 @@ async def handle_trip_rejection(driver_id: str, supabase: Client) -> str:
         
         trip = trip_result.data[0]
         
+        # Record the decline against the driver before the assignment is cleared
+        if driver_feature_store is not None:
+            driver_feature_store.observe({**trip, "status": "cancelled"})
+        
         # Update trip back to pending and remove driver assignment
         update_result = supabase.table("trips").update({
             "status": "pending",
@@ -217,10 +270,17 @@ async def handle_trip_rejection(driver_id: str, supabase: Client) -> str:
         }).eq("id", trip["id"]).execute()
         
         if update_result.data:
+            # Declined trip goes back into the pending pool
+            if pending_trip_index is not None:
+                pending_trip_index.upsert(update_result.data[0])
+            
             # Make driver available again
-            supabase.table("drivers").update({
-                "is_available": True
-            }).eq("id", driver_id).execute()
+            if presence_store is not None:
+                presence_store.set_presence(driver_id, is_available=True)
+            else:
+                supabase.table("drivers").update({
+                    "is_available": True
+                }).eq("id", driver_id).execute()
             
             return "✅ Trip declined. You are now available for new assignments."
         else:
@@ -236,13 +296,16 @@ async def handle_status_request(driver_id: str, supabase: Client) -> str:
     """
     try:
         # Get driver info
-        driver_result = supabase.table("drivers").select("*").eq("id", driver_id).execute()
+        if presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            driver = presence_store.get(driver_id)
+        else:
+            driver_result = supabase.table("drivers").select("*").eq("id", driver_id).execute()
+            driver = driver_result.data[0] if driver_result.data else None
         
-        if not driver_result.data:
+        if not driver:
             return "❌ Driver not found."
         
-        driver = driver_result.data[0]
-        
         # Get active trips
         trip_result = supabase.table("trips").select("*").eq("driver_id", driver_id).in_("status", ["assigned", "in_progress"]).execute()
         
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+from ..models.telemetry import TelemetryBatch
+from ..telemetry_store import telemetry_store
+from ..position_buffer import position_buffer, rows_to_dicts
+
+try:
+    from agents.trip_progress import trip_progress_tracker
+except ImportError:
+    trip_progress_tracker = None
+
+try:
+    from agents.trip_feed import trip_feed_hub
+except ImportError:
+    trip_feed_hub = None
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+def _utc_naive(ts: datetime) -> datetime:
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+@router.post("/batch")
+def ingest_telemetry(batch: TelemetryBatch):
+    """
+    Ingest many GPS points in one request.
+
+    Points are appended to the day-partitioned telemetry store and folded into
+    the progress state of the trip each vehicle is running. Vehicles are bound
+    to trips when a trip with a vehicle_id becomes active, or explicitly via the
+    point's trip_id.
+    """
+    points = [
+        {**point.dict(), "ts": _utc_naive(point.ts)}
+        for point in batch.points
+    ]
+
+    try:
+        written = telemetry_store.append(points)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Telemetry write failed: {str(e)}")
+
+    buffered = position_buffer.append_batch(points)
+    progress = trip_progress_tracker.ingest(points) if trip_progress_tracker is not None else {}
+    if trip_feed_hub is not None and progress.get("trips_updated"):
+        trip_feed_hub.publish(progress["trips_updated"])
+
+    return {
+        "accepted": len(points),
+        "buffered": buffered,
+        "partitions": written,
+        "trips_updated": progress.get("trips_updated", []),
+        "stale_points": progress.get("stale_points", 0)
+    }
+
+@router.get("/trips/{trip_id}/progress")
+def get_trip_progress(trip_id: str):
+    """Precomputed progress for a tracked trip"""
+    progress = trip_progress_tracker.progress(trip_id) if trip_progress_tracker is not None else None
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Trip is not being tracked")
+    return progress
+
+@router.get("/vehicles/{vehicle_id}/points")
+def get_vehicle_points(
+    vehicle_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(5000, ge=1, le=50000)
+):
+    """Raw points for one vehicle (defaults to the last 24 hours)"""
+    end = _utc_naive(end) if end else datetime.utcnow()
+    start = _utc_naive(start) if start else end - timedelta(hours=24)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    points = telemetry_store.points_for_vehicle(vehicle_id, start, end, limit)
+    return {"vehicle_id": vehicle_id, "count": len(points), "points": points}
+
+@router.get("/vehicles/{vehicle_id}/recent")
+def get_recent_positions(vehicle_id: str, minutes: int = Query(60, ge=1, le=24 * 60)):
+    """Recent points for one vehicle from the in-memory ring buffer"""
+    end = datetime.utcnow()
+    rows = position_buffer.window(vehicle_id, end - timedelta(minutes=minutes), end)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="No recent positions for this vehicle")
+    return {"vehicle_id": vehicle_id, "count": len(rows), "points": rows_to_dicts(rows)}
+
+@router.get("/stats")
+def telemetry_stats():
+    return {
+        "partitions": telemetry_store.partitions(),
+        "buffer": position_buffer.stats(),
+        "progress": trip_progress_tracker.stats() if trip_progress_tracker is not None else None
+    }
+
+@router.get("/buffer/stats")
+def position_buffer_stats():
+    """Ring buffer occupancy and memory bound"""
+    return position_buffer.stats()
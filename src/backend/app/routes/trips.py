@@ -6,8 +6,48 @@ from ..models.trip import Trip, TripCreate, TripUpdate, TripStatus
 from ..database import get_supabase_client
 from supabase import Client
 
+try:
+    from agents.pending_trip_index import pending_trip_index
+except ImportError:
+    pending_trip_index = None
+
+try:
+    from agents.acceptance_model import driver_feature_store
+except ImportError:
+    driver_feature_store = None
+
+try:
+    from agents.presence_store import presence_store
+except ImportError:
+    presence_store = None
+
+try:
+    from agents.trip_progress import trip_progress_tracker, ACTIVE_TRIP_STATUSES
+except ImportError:
+    trip_progress_tracker = None
+    ACTIVE_TRIP_STATUSES = ()
+
+try:
+    from agents.trip_feed import trip_feed_hub
+except ImportError:
+    trip_feed_hub = None
+
 router = APIRouter(prefix="/trips", tags=["trips"])
 
+def _sync_trip_caches(trip: dict) -> None:
+    """Propagate a created/updated trip row to the in-memory agent indexes"""
+    if pending_trip_index is not None:
+        pending_trip_index.upsert(trip)
+    if driver_feature_store is not None:
+        driver_feature_store.observe(trip)
+    if trip_progress_tracker is not None:
+        trip_progress_tracker.sync_trip(trip)
+    if trip_feed_hub is not None:
+        if trip.get("status") in ACTIVE_TRIP_STATUSES:
+            trip_feed_hub.publish([trip.get("id")])
+        else:
+            trip_feed_hub.close_trip(trip.get("id"), reason=trip.get("status") or "inactive")
+
 @router.post("/", response_model=Trip, status_code=status.HTTP_201_CREATED)
 async def create_trip(
     trip: TripCreate,
@@ -27,6 +67,8 @@ async def create_trip(
                 detail="Failed to create trip"
             )
         
+        _sync_trip_caches(result.data[0])
+        
         return Trip(**result.data[0])
     
     except Exception as e:
@@ -120,6 +162,8 @@ async def update_trip(
                 detail="Trip not found"
             )
         
+        _sync_trip_caches(result.data[0])
+        
         return Trip(**result.data[0])
     
     except HTTPException:
@@ -155,6 +199,9 @@ async def update_trip_status(
                 detail="Trip not found"
             )
         
+        # Cancelled/assigned trips leave the pending index, re-opened ones rejoin it
+        _sync_trip_caches(result.data[0])
+        
         return {
             "message": f"Trip status updated to {new_status.value}",
             "trip": Trip(**result.data[0])
@@ -177,15 +224,19 @@ async def assign_driver_to_trip(
     """Assign a driver to a trip"""
     try:
         # Check if driver exists and is available
-        driver_result = supabase.table("drivers").select("*").eq("id", str(driver_id)).execute()
+        if presence_store is not None:
+            presence_store.ensure_loaded(supabase)
+            driver = presence_store.get(driver_id)
+        else:
+            driver_result = supabase.table("drivers").select("*").eq("id", str(driver_id)).execute()
+            driver = driver_result.data[0] if driver_result.data else None
         
-        if not driver_result.data:
+        if not driver:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Driver not found"
             )
         
-        driver = driver_result.data[0]
         if not driver.get("is_available", False):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -207,8 +258,13 @@ async def assign_driver_to_trip(
                 detail="Trip not found"
             )
         
+        _sync_trip_caches(trip_result.data[0])
+        
         # Mark driver as busy
-        supabase.table("drivers").update({"is_available": False}).eq("id", str(driver_id)).execute()
+        if presence_store is not None:
+            presence_store.set_presence(driver_id, is_available=False)
+        else:
+            supabase.table("drivers").update({"is_available": False}).eq("id", str(driver_id)).execute()
         
         return {
             "message": "Driver assigned to trip successfully",
@@ -271,6 +327,13 @@ async def delete_trip(
         
         result = supabase.table("trips").delete().eq("id", str(trip_id)).execute()
         
+        if pending_trip_index is not None:
+            pending_trip_index.remove(trip_id)
+        if trip_progress_tracker is not None:
+            trip_progress_tracker.untrack(trip_id)
+        if trip_feed_hub is not None:
+            trip_feed_hub.close_trip(trip_id, reason="deleted")
+        
         return {"message": "Trip deleted successfully"}
     
     except HTTPException:
@@ -4,6 +4,9 @@ from typing import Optional, List
 from datetime import date
 from .db import get_db_session
 from .orm_models import Driver, Vehicle, Trip, Expense
+from .driver_query import DriverQuery
+from .trip_analytics import TripAnalyticsEngine, TripAnalyticsFilters
+from .rollups import TRIP_DIMENSIONS, trip_rollup_totals, expense_rollup_totals
 
 
 router = APIRouter()
@@ -15,10 +18,11 @@ def dashboard_stats(db: Session = Depends(get_db_session)):
     total_trips = db.query(Trip).count()
     active_trips = db.query(Trip).filter(Trip.status.in_(['scheduled', 'in_progress', 'assigned'])).count()
     available_drivers = db.query(Driver).filter(Driver.availability_status == 'available').count()
-    total_expenses = float(db.query(Expense).with_entities((Expense.amount_inr)).all() and sum([e[0] or 0 for e in db.query(Expense.amount_inr).all()]) or 0)
+    total_expenses = sum(expense_rollup_totals(db).values())
 
-    # Rough revenue estimation as cargo_value sum (placeholder)
-    total_revenue = float(db.query(Trip).with_entities((Trip.cargo_value_inr)).all() and sum([t[0] or 0 for t in db.query(Trip.cargo_value_inr).all()]) or 0)
+    # Rough revenue estimation as cargo_value sum (placeholder), read from the daily rollups
+    fleet = trip_rollup_totals(db, 'fleet')
+    total_revenue = fleet[0]['cargo_value_inr'] if fleet else 0.0
 
     # Fleet utilization heuristic
     total_vehicles = db.query(Vehicle).count()
@@ -63,7 +67,16 @@ def dashboard_activities(db: Session = Depends(get_db_session)):
 
 # Drivers
 @router.get('/drivers')
-def list_drivers(db: Session = Depends(get_db_session)):
+def list_drivers(
+    available: Optional[bool] = None,
+    min_rating: Optional[float] = None,
+    vehicle_type: Optional[str] = None,
+    min_capacity_tons: Optional[float] = None,
+    db: Session = Depends(get_db_session),
+):
+    q = DriverQuery().min_rating(min_rating).vehicle_type(vehicle_type).min_capacity(min_capacity_tons)
+    if available is not None:
+        q = q.available(available)
     return [
         {
             'id': d.id,
@@ -80,7 +93,7 @@ def list_drivers(db: Session = Depends(get_db_session)):
             },
             'vehicle_type': d.vehicle_type,
         }
-        for d in db.query(Driver).all()
+        for d in q.apply_sqlalchemy(db).all()
     ]
 
 
@@ -138,6 +151,19 @@ def list_trips(
     return out
 
 
+@router.get('/trips/analytics')
+def trips_analytics(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    driver_id: Optional[str] = None,
+    db: Session = Depends(get_db_session),
+):
+    # Per status / driver / corridor / month totals, grouped in SQL
+    filters = TripAnalyticsFilters(start_date=start_date, end_date=end_date, status=status, driver_id=driver_id)
+    return TripAnalyticsEngine(filters).run_sqlalchemy(db)
+
+
 # Expenses
 @router.get('/expenses')
 def list_expenses(
@@ -171,9 +197,22 @@ def list_expenses(
 
 @router.get('/expenses/analytics')
 def expenses_analytics(db: Session = Depends(get_db_session)):
-    # Simple grouping by expense_type
-    rows = db.query(Expense.expense_type, Expense.amount_inr).all()
-    summary = {}
-    for etype, amt in rows:
-        summary[etype] = summary.get(etype, 0) + float(amt or 0)
+    # Grouping by expense_type, read from the daily rollups
+    summary = expense_rollup_totals(db)
     return { 'byType': summary, 'total': sum(summary.values()) }
+
+
+# Rollups
+@router.get('/analytics/rollups')
+def analytics_rollups(
+    dimension: str = 'driver',
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db_session),
+):
+    if dimension == 'expense_type':
+        return {'dimension': dimension, 'byType': expense_rollup_totals(db, start_date, end_date)}
+    if dimension not in TRIP_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of {', '.join(TRIP_DIMENSIONS)}, expense_type")
+    return {'dimension': dimension, 'groups': trip_rollup_totals(db, dimension, start_date, end_date, limit)}
@@ -1,9 +1,11 @@
 import csv
 import os
 from datetime import datetime, date
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 from .db import Base, engine
 from .orm_models import Driver, Vehicle, Trip, Expense
+from .rollups import ensure_rollups
 
 
 def _parse_date(value: str):
@@ -20,10 +22,28 @@ def _parse_date(value: str):
 def init_db():
     Base.metadata.create_all(bind=engine)
 
+    # create_all skips tables that already exist, so add any nullable columns and
+    # indexes introduced since
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 
 def seed_from_csvs(db: Session, project_root: str):
     raw_dir = os.path.join(project_root, 'data', 'raw')
 
+    # Databases seeded before the rollup tables existed get a one-off backfill;
+    # rows added below are picked up by the rollup flush hooks
+    ensure_rollups(db)
+
     # Seed drivers
     drivers_csv = os.path.join(raw_dir, 'drivers.csv')
     if os.path.exists(drivers_csv):
@@ -0,0 +1,151 @@
+"""
+Telemetry store - append-only, day-partitioned GPS point storage
+
+Points land in one table per UTC day (telemetry_points_YYYYMMDD). Writes are
+plain batched INSERTs into the partitions a batch touches, range reads only open
+the partitions inside the range, and retention is a DROP TABLE per expired day
+instead of a DELETE scan over everything.
+"""
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Any, Iterable
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, Float, DateTime, Index, inspect, insert, select
+
+from .db import engine as default_engine
+
+PARTITION_PREFIX = "telemetry_points_"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+# Postgres equivalent for a Supabase deployment (declarative range partitions on ts)
+POSTGRES_TELEMETRY_DDL = """
+CREATE TABLE IF NOT EXISTS telemetry_points (
+    id bigserial,
+    vehicle_id text NOT NULL,
+    trip_id text,
+    ts timestamptz NOT NULL,
+    lat double precision NOT NULL,
+    lng double precision NOT NULL,
+    speed_kmh real,
+    PRIMARY KEY (id, ts)
+) PARTITION BY RANGE (ts);
+-- one partition per day, e.g.
+-- CREATE TABLE telemetry_points_20250101 PARTITION OF telemetry_points
+--     FOR VALUES FROM ('2025-01-01') TO ('2025-01-02');
+CREATE INDEX IF NOT EXISTS ix_telemetry_vehicle_ts ON telemetry_points (vehicle_id, ts);
+"""
+
+
+class TelemetryStore:
+    def __init__(self, engine=None):
+        self.engine = engine or default_engine
+        self._metadata = MetaData()
+        self._known: Dict[str, Table] = {}
+        self._lock = threading.Lock()
+
+    def append(self, points: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Insert points (dicts with vehicle_id, ts, lat, lng, speed, trip_id) into their day partitions
+        """
+        by_day: Dict[date, List[Dict[str, Any]]] = defaultdict(list)
+        for point in points:
+            by_day[point["ts"].date()].append({
+                "vehicle_id": point["vehicle_id"],
+                "trip_id": point.get("trip_id"),
+                "ts": point["ts"],
+                "lat": point["lat"],
+                "lng": point["lng"],
+                "speed_kmh": point.get("speed")
+            })
+
+        written = {}
+        with self.engine.begin() as connection:
+            for day, rows in by_day.items():
+                table = self._partition(day, create=True)
+                connection.execute(insert(table), rows)
+                written[table.name] = len(rows)
+        return written
+
+    def points_for_vehicle(
+        self,
+        vehicle_id: str,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Points for one vehicle in [start, end], oldest first; only partitions in the range are read
+        """
+        out: List[Dict[str, Any]] = []
+        with self.engine.connect() as connection:
+            day = start.date()
+            while day <= end.date():
+                table = self._partition(day, create=False)
+                if table is not None:
+                    query = (select(table)
+                             .where(table.c.vehicle_id == vehicle_id)
+                             .where(table.c.ts >= start, table.c.ts <= end)
+                             .order_by(table.c.ts))
+                    out.extend(dict(row._mapping) for row in connection.execute(query))
+                    if limit and len(out) >= limit:
+                        return out[:limit]
+                day += timedelta(days=1)
+        return out
+
+    def partitions(self) -> List[str]:
+        return sorted(name for name in inspect(self.engine).get_table_names() if _PARTITION_RE.match(name))
+
+    def drop_partitions_before(self, cutoff: date) -> List[str]:
+        """
+        Retention: drop whole day partitions older than cutoff
+        """
+        dropped = []
+        for name in self.partitions():
+            day = datetime.strptime(_PARTITION_RE.match(name).group(1), "%Y%m%d").date()
+            if day < cutoff:
+                table = self._table(name)
+                table.drop(self.engine, checkfirst=True)
+                with self._lock:
+                    self._known.pop(name, None)
+                    self._metadata.remove(table)
+                dropped.append(name)
+        return dropped
+
+    def _partition(self, day: date, create: bool) -> Optional[Table]:
+        name = f"{PARTITION_PREFIX}{day:%Y%m%d}"
+        with self._lock:
+            table = self._known.get(name)
+        if table is not None:
+            return table
+
+        if not create and not inspect(self.engine).has_table(name):
+            return None
+
+        table = self._table(name)
+        if create:
+            table.create(self.engine, checkfirst=True)
+        with self._lock:
+            self._known[name] = table
+        return table
+
+    def _table(self, name: str) -> Table:
+        with self._lock:
+            if name in self._metadata.tables:
+                return self._metadata.tables[name]
+            return Table(
+                name, self._metadata,
+                Column("id", Integer, primary_key=True, autoincrement=True),
+                Column("vehicle_id", String, nullable=False),
+                Column("trip_id", String, nullable=True),
+                Column("ts", DateTime, nullable=False),
+                Column("lat", Float, nullable=False),
+                Column("lng", Float, nullable=False),
+                Column("speed_kmh", Float, nullable=True),
+                Index(f"ix_{name}_vehicle_ts", "vehicle_id", "ts")
+            )
+
+
+# Shared instance bound to the application database
+telemetry_store = TelemetryStore()
@@ -0,0 +1,202 @@
+"""
+Trip analytics engine - pushes trip grouping and summing into the database
+
+Every breakdown (per status, per driver, per corridor, per month) is a GROUP BY
+evaluated by the database, so the payload is one row per group no matter how
+many trips match. SQLite runs the queries through SQLAlchemy; Supabase runs the
+same aggregation inside a single RPC (see SUPABASE_ANALYTICS_DDL).
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any
+
+# Largest driver / corridor breakdowns returned; both are ordered by trip count
+DEFAULT_GROUP_LIMIT = 50
+
+# Supabase / Postgres function behind TripAnalyticsEngine.run_supabase (run once in the SQL editor)
+SUPABASE_ANALYTICS_DDL = """
+CREATE OR REPLACE FUNCTION trip_analytics(
+    p_start_date timestamptz DEFAULT NULL,
+    p_end_date timestamptz DEFAULT NULL,
+    p_status text DEFAULT NULL,
+    p_driver_id uuid DEFAULT NULL,
+    p_group_limit int DEFAULT 50
+) RETURNS jsonb LANGUAGE sql STABLE AS $$
+WITH filtered AS (
+    SELECT status, driver_id, pickup_location, destination, created_at,
+           COALESCE(distance_km, 0) AS distance_km,
+           COALESCE(estimated_cost, 0) AS cost_inr
+    FROM trips
+    WHERE (p_start_date IS NULL OR created_at >= p_start_date)
+      AND (p_end_date IS NULL OR created_at <= p_end_date)
+      AND (p_status IS NULL OR status = p_status)
+      AND (p_driver_id IS NULL OR driver_id = p_driver_id)
+)
+SELECT jsonb_build_object(
+    'totals', (
+        SELECT jsonb_build_object(
+            'trips', count(*),
+            'completed_trips', count(*) FILTER (WHERE status = 'completed'),
+            'total_distance_km', COALESCE(sum(distance_km), 0),
+            'total_cost_inr', COALESCE(sum(cost_inr), 0))
+        FROM filtered),
+    'by_status', (
+        SELECT COALESCE(jsonb_agg(g), '[]'::jsonb) FROM (
+            SELECT status, count(*) AS trips,
+                   sum(distance_km) AS total_distance_km, sum(cost_inr) AS total_cost_inr
+            FROM filtered GROUP BY status ORDER BY count(*) DESC) g),
+    'by_driver', (
+        SELECT COALESCE(jsonb_agg(g), '[]'::jsonb) FROM (
+            SELECT driver_id, count(*) AS trips,
+                   count(*) FILTER (WHERE status = 'completed') AS completed_trips,
+                   sum(distance_km) AS total_distance_km, sum(cost_inr) AS total_cost_inr
+            FROM filtered WHERE driver_id IS NOT NULL
+            GROUP BY driver_id ORDER BY count(*) DESC LIMIT p_group_limit) g),
+    'by_corridor', (
+        SELECT COALESCE(jsonb_agg(g), '[]'::jsonb) FROM (
+            SELECT pickup_location AS origin, destination, count(*) AS trips,
+                   sum(distance_km) AS total_distance_km, sum(cost_inr) AS total_cost_inr
+            FROM filtered
+            GROUP BY pickup_location, destination ORDER BY count(*) DESC LIMIT p_group_limit) g),
+    'by_month', (
+        SELECT COALESCE(jsonb_agg(g), '[]'::jsonb) FROM (
+            SELECT to_char(created_at, 'YYYY-MM') AS month, count(*) AS trips,
+                   count(*) FILTER (WHERE status = 'completed') AS completed_trips,
+                   sum(distance_km) AS total_distance_km, sum(cost_inr) AS total_cost_inr
+            FROM filtered WHERE created_at IS NOT NULL
+            GROUP BY 1 ORDER BY 1) g)
+);
+$$;
+"""
+
+
+@dataclass
+class TripAnalyticsFilters:
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    status: Optional[str] = None
+    driver_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, filters: Optional[Dict[str, Any]]) -> "TripAnalyticsFilters":
+        filters = filters or {}
+        return cls(
+            start_date=filters.get("start_date"),
+            end_date=filters.get("end_date"),
+            status=filters.get("status"),
+            driver_id=str(filters["driver_id"]) if filters.get("driver_id") else None
+        )
+
+
+class TripAnalyticsEngine:
+    """
+    Both backends return the same shape:
+
+        {"totals": {...}, "by_status": [...], "by_driver": [...],
+         "by_corridor": [...], "by_month": [...]}
+
+    Each group carries trips, total_distance_km and total_cost_inr (plus
+    completed_trips where it matters); finish() adds derived ratios.
+    """
+
+    def __init__(self, filters: Optional[TripAnalyticsFilters] = None, group_limit: int = DEFAULT_GROUP_LIMIT):
+        self.filters = filters or TripAnalyticsFilters()
+        self.group_limit = group_limit
+
+    def run_supabase(self, supabase) -> Dict[str, Any]:
+        f = self.filters
+        result = supabase.rpc("trip_analytics", {
+            "p_start_date": f.start_date,
+            "p_end_date": f.end_date,
+            "p_status": f.status,
+            "p_driver_id": f.driver_id,
+            "p_group_limit": self.group_limit
+        }).execute()
+        return self.finish(result.data or {})
+
+    def run_sqlalchemy(self, db) -> Dict[str, Any]:
+        from sqlalchemy import case, func
+        from .orm_models import Trip
+
+        f = self.filters
+        distance = func.coalesce(func.sum(Trip.distance_km), 0)
+        cost = func.coalesce(func.sum(func.coalesce(Trip.actual_fuel_cost, Trip.estimated_fuel_cost)), 0)
+        trips = func.count(Trip.id)
+        completed = func.sum(case((Trip.status == 'completed', 1), else_=0))
+        month = func.strftime('%Y-%m', Trip.created_at)  # same column as the Supabase function and the date filters
+
+        def filtered(*columns):
+            query = db.query(*columns)
+            if f.start_date:
+                query = query.filter(Trip.created_at >= f.start_date)
+            if f.end_date:
+                query = query.filter(Trip.created_at <= f.end_date)
+            if f.status:
+                query = query.filter(Trip.status == f.status)
+            if f.driver_id:
+                query = query.filter(Trip.driver_id == f.driver_id)
+            return query
+
+        total_trips, total_completed, total_distance, total_cost = filtered(trips, completed, distance, cost).one()
+
+        aggregates = {
+            "totals": {
+                "trips": total_trips,
+                "completed_trips": total_completed or 0,
+                "total_distance_km": total_distance,
+                "total_cost_inr": total_cost
+            },
+            "by_status": [
+                {"status": status, "trips": n, "total_distance_km": dist, "total_cost_inr": c}
+                for status, n, dist, c in filtered(Trip.status, trips, distance, cost)
+                .group_by(Trip.status).order_by(trips.desc())
+            ],
+            "by_driver": [
+                {"driver_id": driver_id, "trips": n, "completed_trips": done or 0,
+                 "total_distance_km": dist, "total_cost_inr": c}
+                for driver_id, n, done, dist, c in filtered(Trip.driver_id, trips, completed, distance, cost)
+                .filter(Trip.driver_id.isnot(None))
+                .group_by(Trip.driver_id).order_by(trips.desc()).limit(self.group_limit)
+            ],
+            "by_corridor": [
+                {"origin": origin, "destination": destination, "trips": n,
+                 "total_distance_km": dist, "total_cost_inr": c}
+                for origin, destination, n, dist, c in filtered(
+                    Trip.pickup_location, Trip.delivery_location, trips, distance, cost)
+                .group_by(Trip.pickup_location, Trip.delivery_location)
+                .order_by(trips.desc()).limit(self.group_limit)
+            ],
+            "by_month": [
+                {"month": m, "trips": n, "completed_trips": done or 0,
+                 "total_distance_km": dist, "total_cost_inr": c}
+                for m, n, done, dist, c in filtered(month, trips, completed, distance, cost)
+                .filter(month.isnot(None))
+                .group_by(month).order_by(month)
+            ]
+        }
+        return self.finish(aggregates)
+
+    @staticmethod
+    def finish(aggregates: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalise numeric types and add completion rate / average distance / cost per km
+        """
+        def enrich(group: Dict[str, Any]) -> Dict[str, Any]:
+            n = int(group.get("trips") or 0)
+            distance = float(group.get("total_distance_km") or 0)
+            cost = float(group.get("total_cost_inr") or 0)
+            group.update({
+                "trips": n,
+                "total_distance_km": round(distance, 2),
+                "total_cost_inr": round(cost, 2),
+                "avg_distance_km": round(distance / n, 2) if n else 0.0,
+                "cost_per_km": round(cost / distance, 2) if distance else 0.0
+            })
+            if "completed_trips" in group:
+                group["completed_trips"] = int(group["completed_trips"] or 0)
+                group["completion_rate"] = round(group["completed_trips"] / n, 3) if n else 0.0
+            return group
+
+        result: Dict[str, Any] = {"totals": enrich(dict(aggregates.get("totals") or {"completed_trips": 0}))}
+        for key in ("by_status", "by_driver", "by_corridor", "by_month"):
+            result[key] = [enrich(dict(group)) for group in aggregates.get(key) or []]
+        return result
@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from agents.document_digitizer import DocumentDigitizerAgent
+from agents.ocr_document import OcrDocument
+from app.db import Base
+from app.receipt_fingerprints import ReceiptFingerprintIndex
+
+# Same station template photographed the same way: the whole-photo dHash is identical
+TEMPLATE_DHASH = 0x3C7E_FF81_8181_FF7E
+
+
+def _receipt(sha256, bill_number, date, total):
+    lines = ["HIGHWAY FUELS PVT LTD", f"BILL NO: {bill_number}", f"DATE: {date}",
+             "DIESEL 62.40 L @ 89.62", f"TOTAL: {total}"]
+    return OcrDocument(tokens=[], lines=lines, dhash=TEMPLATE_DHASH, sha256=sha256)
+
+
+def _agent():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    agent = DocumentDigitizerAgent()
+    agent.receipt_fingerprints = ReceiptFingerprintIndex(session_factory=sessionmaker(bind=engine))
+    return agent
+
+
+def test_distinct_receipts_sharing_a_template_are_not_duplicates():
+    agent = _agent()
+    first = agent._check_duplicate_receipt(_receipt("a" * 64, "458213", "14/03/2024", "5592.29"))
+    agent.link_receipt_expense(first["receipt_fingerprint_id"], "exp-A")
+
+    other = agent._check_duplicate_receipt(_receipt("b" * 64, "458377", "15/03/2024", "4410.00"))
+
+    assert other["possible_duplicate"] is False
+    assert other["duplicate_matches"] == []
+
+
+def test_rephotographed_receipt_is_a_duplicate():
+    agent = _agent()
+    first = agent._check_duplicate_receipt(_receipt("a" * 64, "458213", "14/03/2024", "5592.29"))
+    agent.link_receipt_expense(first["receipt_fingerprint_id"], "exp-A")
+
+    again = agent._check_duplicate_receipt(_receipt("c" * 64, "458213", "14/03/2024", "5592.29"))
+
+    assert again["possible_duplicate"] is True
+    assert again["duplicate_matches"][0]["expense_id"] == "exp-A"
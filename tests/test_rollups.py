@@ -0,0 +1,57 @@
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'backend'))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.orm_models import Trip, Expense, TripDailyRollup, ExpenseDailyRollup
+from app.rollups import rebuild_rollups
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _fleet_days(db):
+    rows = db.scalars(select(TripDailyRollup).where(TripDailyRollup.dimension == "fleet")).all()
+    return {row.day: (row.trips, row.completed_trips, row.distance_km) for row in rows if row.trips}
+
+
+def test_trip_update_after_commit_moves_rollup():
+    db = _session()
+    trip = Trip(id="t1", driver_id="d1", pickup_date=date(2025, 3, 1), status="in_transit", distance_km=120.0)
+    db.add(trip)
+    db.commit()
+
+    # Set on the instance commit expired: the old values must still come out of the old day
+    trip.pickup_date = date(2025, 3, 2)
+    trip.status = "completed"
+    db.commit()
+
+    incremental = _fleet_days(db)
+    assert incremental == {date(2025, 3, 2): (1, 1, 120.0)}
+
+    rebuild_rollups(db)
+    assert _fleet_days(db) == incremental
+
+
+def test_expense_update_after_commit_moves_rollup():
+    db = _session()
+    expense = Expense(id="e1", expense_type="fuel", amount_inr=500.0, expense_date=date(2025, 3, 1))
+    db.add(expense)
+    db.commit()
+
+    expense.amount_inr = 650.0  # set on the instance commit expired, without reloading it first
+    db.commit()
+
+    rows = db.scalars(select(ExpenseDailyRollup)).all()
+    assert {(row.day, row.expense_type): (row.expenses, row.amount_inr) for row in rows if row.expenses} == {
+        (date(2025, 3, 1), "fuel"): (1, 650.0)
+    }
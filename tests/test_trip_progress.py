@@ -0,0 +1,61 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'backend'))
+
+from agents.trip_progress import TripProgressTracker
+
+START = datetime(2025, 3, 1, 8, 0)
+
+# Supabase trip rows carry no vehicle_id; monitoring binds the vehicle from the driver row
+TRIP = {
+    "id": "trip-1",
+    "status": "picked_up",
+    "pickup_lat": 28.61, "pickup_lng": 77.21,
+    "delivery_lat": 26.91, "delivery_lng": 75.79,
+    "distance_km": 280
+}
+
+
+def _point(minutes, lat, lng, **extra):
+    return {"vehicle_id": "veh-1", "ts": START + timedelta(minutes=minutes), "lat": lat, "lng": lng, **extra}
+
+
+def test_status_change_keeps_progress_and_vehicle_binding():
+    tracker = TripProgressTracker()
+    tracker.track(TRIP, vehicle_id="veh-1")
+    tracker.ingest([_point(0, 28.61, 77.21), _point(60, 27.8, 76.6)])
+    before = tracker.progress("trip-1")["completion_percentage"]
+    assert before > 0
+
+    # PATCH /trips/{id}/status picked_up -> in_transit re-syncs the row
+    tracker.sync_trip({**TRIP, "status": "in_transit"})
+
+    assert tracker.progress("trip-1")["completion_percentage"] == before
+    assert tracker.trip_for_vehicle("veh-1") == "trip-1"
+    assert tracker.ingest([_point(90, 27.4, 76.3)])["trips_updated"] == ["trip-1"]
+
+
+def test_finished_status_untracks_trip():
+    tracker = TripProgressTracker()
+    tracker.track(TRIP, vehicle_id="veh-1")
+
+    tracker.sync_trip({**TRIP, "status": "completed"})
+
+    assert tracker.progress("trip-1") is None
+    assert tracker.trip_for_vehicle("veh-1") is None
+
+
+def test_explicit_trip_id_binds_untracked_trip():
+    tracker = TripProgressTracker()
+
+    result = tracker.ingest([_point(0, 28.61, 77.21, trip_id="trip-1")])
+
+    assert result["trips_updated"] == ["trip-1"]
+    assert tracker.trip_for_vehicle("veh-1") == "trip-1"
+
+    # The route arrives with the row; later points then count towards completion
+    tracker.sync_trip(TRIP)
+    tracker.ingest([_point(60, 27.8, 76.6)])
+    assert tracker.progress("trip-1")["completion_percentage"] > 0